@@ -1,11 +1,15 @@
 from .collectionmodel import CollectionModel, CollectionModelException, \
     CollectionModelMementoErrorException, CollectionModelTimeMapErrorException, \
     CollectionModelNoSuchMementoException, CollectionModelNoSuchTimeMapException
+from .sqlitecollectionmodel import SQLiteCollectionModel
+from .warccollectionmodel import WARCCollectionModel
 from .input_types import get_collection_model, supported_input_types, \
-    discover_raw_urims, working_directory_default
+    discover_raw_urims, working_directory_default, supported_storage_types, \
+    storage_type_default
 from .argument_processing import process_collection_similarity_measure_inputs, \
     process_timemap_similarity_measure_inputs, process_input_types, \
-    get_logger, calculate_loglevel, process_output_types
+    get_logger, calculate_loglevel, process_output_types, process_storage_types, \
+    process_tokenizers
 from .output_types import supported_output_types
 from .archive_information import generate_raw_urim, archive_mappings
 from .timemap_measures import compute_bytecount_across_TimeMap, \
@@ -14,11 +18,25 @@ from .timemap_measures import compute_bytecount_across_TimeMap, \
     compute_levenshtein_across_TimeMap, compute_nlevenshtein_across_TimeMap, \
     compute_tfintersection_across_TimeMap, supported_timemap_measures, \
     compute_rawsimhash_across_TimeMap, compute_tfsimhash_across_TimeMap, \
-    compute_gensim_lsi_across_TimeMap, compute_gensim_lda_across_TimeMap
+    compute_gensim_lsi_across_TimeMap, compute_gensim_lda_across_TimeMap, \
+    compute_timemap_measures, timemap_representations, cosine_batch_size_default, \
+    prepare_collection_topic_model
+from .simhashes import SimhashCache, simhash_bytes, simhash_token_ids, \
+    simhash_distance, SimhashIndex, SimhashIndexException, \
+    simhash_distance_graph, cluster_simhashes
+from .textpipeline import TextPipeline, get_text_pipeline, \
+    set_text_pipeline, supported_tokenizers, tokenizer_default
 from .collection_measures import compute_jaccard_accross_collection, \
     compute_sorensen_accross_collection, supported_collection_measures
 from .measuremodel import MeasureModel, MeasureModelNoSuchMemento, \
     MeasureModelNoSuchTimeMap, MeasureModelNoSuchMeasure, MeasureModelNoSuchMeasureType
+from .output_reader import read_output_records, read_consideration_file, \
+    MementoRecord, OutputReaderException
+from .slicing import parse_memento_datetimes, default_slice_count, \
+    slice_by_count, slice_by_time, slice_mementos, supported_slicing_methods, \
+    SlicingException
+from .memento_damage import MementoDamageClient, MementoDamageCache, \
+    MementoDamageException, memento_damage_workers_default
 from .metadata_calcluations import compute_Simhashes, compute_raw_content_lengths, \
     detect_languages, extract_memento_datetimes
 
@@ -28,8 +46,12 @@ from .metadata_calcluations import compute_Simhashes, compute_raw_content_length
 __all__ = ["CollectionModel", "CollectionModelException",
     "CollectionModelMementoErrorException", 
     "CollectionModelTimeMapErrorException", 
-    "CollectionModelNoSuchMementoException",
-    "get_collection_model", "process_collection_similarity_measure_inputs",
+    "CollectionModelNoSuchMementoException", "SQLiteCollectionModel",
+    "WARCCollectionModel",
+    "get_collection_model", "supported_storage_types", "storage_type_default",
+    "process_storage_types", "process_tokenizers", "TextPipeline",
+    "get_text_pipeline", "set_text_pipeline", "supported_tokenizers",
+    "tokenizer_default", "process_collection_similarity_measure_inputs",
     "process_timemap_similarity_measure_inputs",
     "process_input_types", "get_logger", "calculate_loglevel", 
     "supported_input_types", "supported_output_types",
@@ -41,11 +63,22 @@ __all__ = ["CollectionModel", "CollectionModelException",
     "compute_levenshtein_across_TimeMap", "compute_nlevenshtein_across_TimeMap",
     "compute_tfintersection_across_TimeMap", "supported_timemap_measures",
     "compute_rawsimhash_across_TimeMap", "compute_tfsimhash_across_TimeMap",
+    "compute_timemap_measures", "timemap_representations",
+    "cosine_batch_size_default", "prepare_collection_topic_model",
+    "SimhashCache", "simhash_bytes", "simhash_token_ids", "simhash_distance",
+    "SimhashIndex", "SimhashIndexException", "simhash_distance_graph",
+    "cluster_simhashes",
     "MeasureModel", "MeasureModelNoSuchMemento",
     "MeasureModelNoSuchTimeMap", "MeasureModelNoSuchMeasure",
     "compute_Simhashes", "compute_raw_content_lengths",
     "compute_jaccard_accross_collection", "compute_sorensen_accross_collection",
-    "supported_collection_measures", "detect_languages", "extract_memento_datetimes"
+    "supported_collection_measures", "detect_languages", "extract_memento_datetimes",
+    "read_output_records", "read_consideration_file", "MementoRecord",
+    "OutputReaderException", "parse_memento_datetimes", "default_slice_count",
+    "slice_by_count", "slice_by_time", "slice_mementos",
+    "supported_slicing_methods", "SlicingException", "MementoDamageClient",
+    "MementoDamageCache", "MementoDamageException",
+    "memento_damage_workers_default"
     ]
 
 import logging
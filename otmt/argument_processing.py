@@ -14,8 +14,9 @@ import logging.config
 
 from .timemap_measures import supported_timemap_measures
 from .collection_measures import supported_collection_measures
-from .input_types import supported_input_types
+from .input_types import supported_input_types, supported_storage_types
 from .output_types import supported_output_types
+from .textpipeline import supported_tokenizers
 
 def process_timemap_similarity_measure_inputs(input_argument):
 
@@ -77,6 +78,30 @@ def process_output_types(input_argument):
             "{}".format(output_type, list(supported_output_types.keys()))
         )
 
+def process_storage_types(input_argument):
+
+    storage_type = input_argument
+
+    if storage_type in supported_storage_types:
+        return storage_type
+    else:
+        raise argparse.ArgumentTypeError(
+            "{} is not a supported storage type, supported storage types are "
+            "{}".format(storage_type, list(supported_storage_types.keys()))
+        )
+
+def process_tokenizers(input_argument):
+
+    tokenizer = input_argument
+
+    if tokenizer in supported_tokenizers:
+        return tokenizer
+    else:
+        raise argparse.ArgumentTypeError(
+            "{} is not a supported tokenizer, supported tokenizers are "
+            "{}".format(tokenizer, list(supported_tokenizers.keys()))
+        )
+
 def process_input_types(input_argument):
 
     if '=' not in input_argument:
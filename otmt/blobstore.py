@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.blobstore
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module stores memento content by the hash of that content so that
+identical HTTP entities are only stored once, no matter how many URI-Ms
+lead to them. Blobs are compressed with zstd, if the zstandard library is
+installed, or gzip otherwise.
+"""
+
+import os
+import gzip
+import json
+import mmap
+import hashlib
+import logging
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+class BlobStoreException(Exception):
+    """An exception class to be used by the functions in this file so that the
+    source of error can be detected.
+    """
+    pass
+
+class BlobStoreNoSuchBlobException(BlobStoreException):
+    """An exception indicating that a given blob is not stored in this
+    object.
+    """
+    pass
+
+def _gzip_compress(data):
+    return gzip.compress(data)
+
+def _gzip_decompress(data):
+    return gzip.decompress(data)
+
+def _zstd_compress(data):
+    return zstandard.ZstdCompressor().compress(data)
+
+def _zstd_decompress(data):
+    return zstandard.ZstdDecompressor().decompress(data)
+
+def _none_compress(data):
+    return bytes(data)
+
+def _none_decompress(data):
+    return data
+
+supported_compression_types = {
+    "zstd": {
+        "extension": "zst",
+        "compress": _zstd_compress,
+        "decompress": _zstd_decompress
+    },
+    "gzip": {
+        "extension": "gz",
+        "compress": _gzip_compress,
+        "decompress": _gzip_decompress
+    },
+    "none": {
+        "extension": "blob",
+        "compress": _none_compress,
+        "decompress": _none_decompress
+    }
+}
+
+def sharded_filename(directory, filename, create_directories=False):
+    """Returns the path of `filename` within `directory` in the sharded
+    layout, which spreads files over two levels of subdirectories named
+    after the first four characters of `filename`, e.g.,
+    `directory/ab/cd/abcdef...`, much like the objects directory of git.
+
+    `filename` must begin with a hex digest. If `create_directories` is
+    True, the subdirectories are created if they do not yet exist.
+    """
+
+    shard_directory = "{}/{}/{}".format(directory, filename[0:2], filename[2:4])
+
+    if create_directories:
+        os.makedirs(shard_directory, exist_ok=True)
+
+    return "{}/{}".format(shard_directory, filename)
+
+def map_file(filename):
+    """Returns a read-only memoryview of the content of `filename`, backed
+    by a memory map so that only the pages actually used are read.
+    """
+
+    with open(filename, 'rb') as f:
+
+        # empty files cannot be memory-mapped
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b"")
+
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+def default_compression():
+    """Returns zstd if the zstandard library is available, gzip otherwise."""
+
+    if zstandard is not None:
+        return "zstd"
+
+    return "gzip"
+
+class BlobStore:
+    """
+        Stores byte strings in `directory`, keyed by the SHA3-256 digest of
+        their content.
+
+        The compression chosen when the store is first created is recorded
+        in the directory and reused when it is opened again, so that a store
+        never contains a mix of compression types.
+    """
+
+    def __init__(self, directory, compression=None):
+
+        self.directory = directory
+        config_filename = "{}/blobstore.json".format(directory)
+
+        if os.path.exists(config_filename):
+
+            with open(config_filename) as f:
+                config = json.load(f)
+
+            if compression is not None and compression != config["compression"]:
+                logger.warning("blob store at {} was created with compression "
+                    "{}, ignoring requested compression {}".format(
+                        directory, config["compression"], compression))
+
+            compression = config["compression"]
+
+        else:
+
+            if compression is None:
+                compression = default_compression()
+
+            if compression not in supported_compression_types:
+                raise BlobStoreException(
+                    "Unsupported compression type {}, supported types are "
+                    "{}".format(compression, list(supported_compression_types.keys()))
+                )
+
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+
+            with open(config_filename, 'w') as f:
+                json.dump({"compression": compression}, f)
+
+        if compression == "zstd" and zstandard is None:
+            raise BlobStoreException(
+                "blob store at {} uses zstd compression, but the zstandard "
+                "library is not installed".format(directory))
+
+        self.compression = compression
+        self.extension = supported_compression_types[compression]["extension"]
+        self._compress = supported_compression_types[compression]["compress"]
+        self._decompress = supported_compression_types[compression]["decompress"]
+
+    def blob_filename(self, digest, create_directories=False):
+        """Returns the name of the file holding the blob for `digest`."""
+
+        return sharded_filename(self.directory,
+            "{}.{}".format(digest, self.extension),
+            create_directories=create_directories)
+
+    def exists(self, digest):
+        """Returns True if a blob for `digest` is stored in this object."""
+
+        return os.path.exists(self.blob_filename(digest))
+
+    def put(self, content, digest=None):
+        """Stores `content` and returns its digest. Content that is already
+        stored is not written again.
+
+        If the caller already computed the `digest` of `content`, it can be
+        supplied to avoid hashing the content again.
+        """
+
+        if digest is None:
+            digest = hashlib.sha3_256(content).hexdigest()
+
+        filename = self.blob_filename(digest, create_directories=True)
+
+        if not os.path.exists(filename):
+
+            # write to a temporary file first so that a crash never leaves
+            # a truncated blob under its final name
+            tmpfilename = "{}.tmp".format(filename)
+
+            with open(tmpfilename, 'wb') as out:
+                out.write(self._compress(content))
+
+            os.replace(tmpfilename, filename)
+
+        else:
+            logger.debug("blob {} is already stored, not writing again".format(digest))
+
+        return digest
+
+    def get(self, digest):
+        """Returns the content stored for `digest`.
+
+        If no blob was stored for `digest`, then
+        `BlobStoreNoSuchBlobException` is thrown.
+        """
+
+        try:
+            with open(self.blob_filename(digest), 'rb') as fileinput:
+                data = fileinput.read()
+        except FileNotFoundError:
+            raise BlobStoreNoSuchBlobException(
+                "No blob with digest {} is stored in {}".format(
+                    digest, self.directory))
+
+        return self._decompress(data)
+
+    def get_view(self, digest):
+        """Returns a read-only memoryview of the content stored for `digest`.
+
+        Content stored without compression is memory-mapped rather than
+        read, other content has to be decompressed into memory first.
+
+        If no blob was stored for `digest`, then
+        `BlobStoreNoSuchBlobException` is thrown.
+        """
+
+        if self.compression != "none":
+            return memoryview(self.get(digest))
+
+        try:
+            return map_file(self.blob_filename(digest))
+        except FileNotFoundError:
+            raise BlobStoreNoSuchBlobException(
+                "No blob with digest {} is stored in {}".format(
+                    digest, self.directory))
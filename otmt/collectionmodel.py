@@ -16,12 +16,14 @@ subclass can be used with the measurement functions of timemap_measures,
 provided that such a subclass has the same methods and parameters.
 """
 
-import copy
 import os
 import hashlib
 import json
 import csv
 import logging
+import multiprocessing
+
+from collections import OrderedDict
 
 import lxml.etree
 
@@ -30,10 +32,22 @@ from datetime import date
 
 from justext import justext, get_stoplist
 
-from .timemap import convert_LinkTimeMap_to_dict
+from .timemap import convert_LinkTimeMap_to_dict, freeze, FrozenList
+from .blobstore import BlobStore, sharded_filename, map_file
+from .tokencache import TokenCache
+from .simhashes import SimhashCache
+from .writebehind import WriteBehindWriter, WriteBehindWriterException, \
+    max_queue_size_default
 
 logger = logging.getLogger(__name__)
 
+timemap_cache_size_default = 1024
+
+# the file in a working directory recording how its files are laid out,
+# working directories without it keep all files of a type in one directory
+layout_filename = "layout.json"
+sharded_directories = [ "timemaps", "mementos", "memento_errors", "blobs" ]
+
 # Disabled this pylint rule because of too many false positives
 # Ref: http://pylint-messages.wikidot.com/messages:e1101
 # pylint: disable=no-member
@@ -79,6 +93,181 @@ class CollectionModelBoilerPlateRemovalFailureException(CollectionModelException
     """
     pass
 
+def convert_timemap_datetimes(timemap):
+    """Converts the datetime strings in the dict form of a JSON TimeMap
+    into datetime objects, returning the updated `timemap`.
+    """
+
+    timemap["mementos"]["first"]["datetime"] = datetime.strptime(
+        timemap["mementos"]["first"]["datetime"],
+        "%Y-%m-%dT%H:%M:%S"
+    )
+
+    timemap["mementos"]["last"]["datetime"] = datetime.strptime(
+        timemap["mementos"]["last"]["datetime"],
+        "%Y-%m-%dT%H:%M:%S"
+    )
+
+    updated_memlist = []
+
+    for mem in timemap["mementos"]["list"]:
+        updated_memlist.append({
+            "datetime": datetime.strptime(mem["datetime"], "%Y-%m-%dT%H:%M:%S"),
+            "uri": mem["uri"]
+        })
+
+    timemap["mementos"]["list"] = updated_memlist
+
+    return timemap
+
+def remove_boilerplate(data):
+    """Runs justext over the HTML in `data`, returning the text of the
+    remaining paragraphs as bytes, one paragraph per line.
+
+    If justext cannot parse `data`, then
+    CollectionModelBoilerPlateRemovalFailureException is thrown.
+    """
+
+    try:
+        paragraphs = justext(data, get_stoplist('English'))
+    except (lxml.etree.ParserError, lxml.etree.XMLSyntaxError) as e:
+        raise CollectionModelBoilerPlateRemovalFailureException(repr(e))
+
+    return b"".join(
+        bytes("{}\n".format(paragraph.text), "utf8") for paragraph in paragraphs
+    )
+
+def is_digest(value):
+    """Returns True if `value` looks like a hex encoded SHA3-256 digest."""
+
+    return len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+def truncate_partial_row(filename):
+    """Removes a final line without a line ending from the CSV file
+    `filename`, as left behind by a crash while the row was being written,
+    so that new rows are not appended to it.
+    """
+
+    if not os.path.exists(filename):
+        return
+
+    with open(filename, 'rb+') as f:
+
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+
+        if size == 0:
+            return
+
+        f.seek(size - 1)
+
+        if f.read(1) == b"\n":
+            return
+
+        f.seek(0)
+        data = f.read()
+
+        logger.warning("discarding incomplete final row of {}".format(filename))
+
+        f.truncate(data.rfind(b"\n") + 1)
+
+def write_layout(working_directory):
+    """Records that the files of `working_directory` use the sharded layout
+    described in otmt.blobstore.sharded_filename.
+    """
+
+    with open("{}/{}".format(working_directory, layout_filename), 'w') as out:
+        json.dump({ "layout": "sharded" }, out)
+
+def migrate_to_sharded_layout(working_directory):
+    """Moves the files of a working directory written by earlier versions of
+    this module, which kept all files of a type in one flat directory, into
+    the sharded layout.
+
+    Files are moved one at a time and the layout is only recorded once all
+    of them have been moved, so an interrupted migration is finished by
+    running it again.
+    """
+
+    logger.info("migrating working directory {} to the sharded "
+        "layout".format(working_directory))
+
+    for subdirectory in sharded_directories:
+
+        directory = "{}/{}".format(working_directory, subdirectory)
+
+        if not os.path.exists(directory):
+            continue
+
+        moved = 0
+
+        for filename in os.listdir(directory):
+
+            if is_digest(filename[0:64]) and \
+                os.path.isfile("{}/{}".format(directory, filename)):
+
+                os.replace("{}/{}".format(directory, filename),
+                    sharded_filename(directory, filename, create_directories=True))
+
+                moved += 1
+
+        logger.info("moved {} files in {}".format(moved, directory))
+
+    write_layout(working_directory)
+
+def _write_memento(memento_directory, filename_digest, headers, blobstore,
+    content, blob_digest, csvwriter, urim):
+    """Writes the files of a memento stored via addMemento, the metadata.csv
+    row is written last so that it only describes complete mementos.
+    """
+
+    with open(sharded_filename(memento_directory,
+        "{}_headers.json".format(filename_digest),
+        create_directories=True), 'w') as out:
+        json.dump(headers, out, default=json_serial)
+
+    blobstore.put(content, digest=blob_digest)
+
+    csvwriter.writerow([urim, filename_digest, blob_digest, len(content)])
+
+def _write_memento_error(memento_errors_directory, filename_digest, headers,
+    content, errorinformation, csvwriter, urim):
+    """Writes the files of a memento error stored via addMementoError, the
+    metadata.csv row is written last so that it only describes complete
+    memento errors.
+    """
+
+    with open(sharded_filename(memento_errors_directory,
+        "{}_headers.json".format(filename_digest),
+        create_directories=True), 'w') as out:
+        json.dump(headers, out, default=json_serial, indent=4)
+
+    with open(sharded_filename(memento_errors_directory,
+        "{}.orig".format(filename_digest),
+        create_directories=True), 'wb') as out:
+        out.write(content)
+
+    with open(sharded_filename(memento_errors_directory,
+        "{}_error_info.txt".format(filename_digest),
+        create_directories=True), 'wb') as out:
+        out.write(errorinformation)
+
+    csvwriter.writerow([urim, filename_digest])
+
+def _remove_boilerplate_worker(item):
+    """Runs remove_boilerplate on the (key, data) tuple `item` inside a
+    worker process of prepareMementoContentWithoutBoilerplate, returning
+    (key, content, errorinformation) so that a failure for one memento does
+    not stop the pool.
+    """
+
+    key, data = item
+
+    try:
+        return key, remove_boilerplate(data), None
+    except CollectionModelBoilerPlateRemovalFailureException as e:
+        return key, None, str(e)
+
 class CollectionModel:
     """
         This class exists because the dict for keeping track of
@@ -87,20 +276,43 @@ class CollectionModel:
 
         This class can also be subclassed to store memento data in
         another way, such as a database or WARC.
+
+        If `read_only` is True, nothing is written to `working_directory`,
+        which must already hold a collection. Its metadata files are not
+        opened for writing and no background writer is started, so that
+        worker processes can read a collection while the process that
+        opened it for writing keeps it open. Adding data to such an object
+        raises CollectionModelException, and boilerplate removed from its
+        mementos is not stored.
     """
 
     # TODO: add functions for storing metadata, like for saving a collection id, name, etc.
 
-    def __init__(self, working_directory):
+    def __init__(self, working_directory, compression=None,
+        timemap_cache_size=timemap_cache_size_default,
+        write_queue_size=max_queue_size_default, read_only=False):
 
         self.working_directory = working_directory
+        self.read_only = read_only
         self.timemap_directory = "{}/timemaps".format(working_directory)
         self.timemap_errors_directory = "{}/timemap_errors".format(working_directory)
 
         self.memento_directory = "{}/mementos".format(working_directory)
         self.memento_errors_directory = "{}/memento_errors".format(working_directory)
+        self.blob_directory = "{}/blobs".format(working_directory)
 
-        self.collection_timemaps = {}
+        # the most recently used TimeMaps, oldest first, holding no more
+        # than timemap_cache_size entries
+        self.collection_timemaps = OrderedDict()
+        self.timemap_cache_size = timemap_cache_size
+
+        # URI-M -> digest of its content in the blob store, mementos stored
+        # by earlier versions of this class have no entry and are read from
+        # their .orig files instead
+        self.memento_blobs = {}
+
+        # URI-M -> length of its content, as recorded in metadata.csv
+        self.memento_lengths = {}
 
         self.urimap = {
             "timemaps": {},
@@ -108,14 +320,47 @@ class CollectionModel:
             "memento-errors": {}
         }
 
+        # FrozenLists returned by getMementoURIList and getTimeMapURIList
+        self.urilists = {}
+
+        if read_only and not os.path.exists(working_directory):
+            raise CollectionModelException("Cannot open {} read-only, it does "
+                "not hold a collection".format(working_directory))
+
         if not os.path.exists(working_directory):
             os.makedirs(self.working_directory)
             os.makedirs(self.timemap_directory)
             os.makedirs(self.memento_directory)
             os.makedirs(self.memento_errors_directory)
+            write_layout(working_directory)
         else:
+
+            if not os.path.exists("{}/{}".format(working_directory, layout_filename)):
+
+                if read_only:
+                    raise CollectionModelException("Cannot open {} read-only, "
+                        "it must first be migrated to the sharded layout".format(
+                            working_directory))
+
+                migrate_to_sharded_layout(working_directory)
+
             self.load_data_from_directory()
 
+        self.blobstore = BlobStore(self.blob_directory, compression=compression)
+
+        # mementos and memento errors are written by a background thread
+        # unless write_queue_size is 0, see otmt.writebehind for the
+        # durability this provides
+        self.writer = None
+
+        if read_only:
+            self.timemap_metadatafile = None
+            return
+
+        for directory in [ self.timemap_directory, self.memento_directory,
+            self.memento_errors_directory ]:
+            truncate_partial_row("{}/metadata.csv".format(directory))
+
         self.timemap_metadatafile = open("{}/metadata.csv".format(
             self.timemap_directory
         ), 'a')
@@ -134,11 +379,75 @@ class CollectionModel:
 
         self.memento_errors_csvwriter = csv.writer(self.memento_errors_metadatafile)
 
+        if write_queue_size > 0:
+            self.writer = WriteBehindWriter(
+                [ self.memento_metadatafile, self.memento_errors_metadatafile ],
+                max_queue_size=write_queue_size
+            )
+
     def __del__(self):
 
-        self.timemap_metadatafile.close()
-        self.memento_metadatafile.close()
-        self.memento_errors_metadatafile.close()
+        try:
+            self.close()
+        except WriteBehindWriterException as e:
+            # nobody is left to handle the exception at this point
+            logger.error("failed to write all data to {}: {}".format(
+                self.working_directory, repr(e)))
+
+    def flush(self):
+        """Blocks until everything added to this object so far is
+        completely written to the working directory.
+        """
+
+        if self.writer is not None:
+            self.writer.flush()
+
+        if self.read_only:
+            return
+
+        self.timemap_metadatafile.flush()
+        self.memento_metadatafile.flush()
+        self.memento_errors_metadatafile.flush()
+
+    def close(self):
+        """Completes any queued writes and closes the files held open by this
+        object.
+        """
+
+        if getattr(self, "writer", None) is not None:
+            writer = self.writer
+            self.writer = None
+            writer.close()
+
+        if getattr(self, "timemap_metadatafile", None) is not None:
+            self.timemap_metadatafile.close()
+            self.memento_metadatafile.close()
+            self.memento_errors_metadatafile.close()
+
+    def _check_writable(self):
+        """Raises CollectionModelException if this object was opened
+        read-only.
+        """
+
+        if self.read_only:
+            raise CollectionModelException("The collection at {} was opened "
+                "read-only".format(self.working_directory))
+
+    def _write(self, uri, function, *args):
+        """Calls `function` with `args` to write data for `uri`, on the
+        background writer if there is one.
+        """
+
+        if self.writer is None:
+            function(*args)
+        else:
+            self.writer.submit(uri, function, *args)
+
+    def _wait_for_write(self, uri):
+        """Blocks until any queued writes for `uri` are complete."""
+
+        if self.writer is not None and self.writer.is_pending(uri):
+            self.writer.flush()
 
     def load_data_from_directory(self):
         """
@@ -169,54 +478,40 @@ class CollectionModel:
 
             logger.debug("reading TimeMap data row {}".format(row))
 
+            if len(row) < 2 or not is_digest(row[1]):
+                logger.warning("skipping invalid TimeMap data row {}".format(row))
+                continue
+
             urit = row[0]
             filename_digest = row[1]
 
+            # the TimeMap itself is only read when getTimeMap requests it
             self.urimap["timemaps"][urit] = filename_digest
 
-            with open("{}/timemaps/{}.json".format(
-                self.working_directory, filename_digest)) as jsonin:
-
-                tmdata = json.load(jsonin)
-
-                try:
-                    mdt = tmdata['mementos']['first']['datetime']
-                except KeyError:
-                    logger.exception("failed to read TimeMap for URI-T {}, skipping...".format(urit))
-                    continue
-                
-                tmdata['mementos']['first']['datetime'] = datetime.strptime(
-                    mdt, "%Y-%m-%dT%H:%M:%S"
-                )
-
-                mdt = tmdata['mementos']['last']['datetime']
-
-                tmdata['mementos']['last']['datetime'] = datetime.strptime(
-                    mdt, "%Y-%m-%dT%H:%M:%S"
-                )
-
-                mementolist = copy.deepcopy(tmdata['mementos']['list'])
-
-                tmdata['mementos']['list'] = []
-
-                for entry in mementolist:
-
-                    tmdata['mementos']['list'].append(
-                        {
-                        "uri": entry['uri'],
-                        "datetime": datetime.strptime( entry['datetime'], "%Y-%m-%dT%H:%M:%S" )
-                        }
-                    )
+        for row in memento_reader:
 
-                self.collection_timemaps[urit] = tmdata
+            if len(row) < 2 or not all(is_digest(digest) for digest in row[1:3]) \
+                or not all(length.isdigit() for length in row[3:4]):
+                logger.warning("skipping invalid memento data row {}".format(row))
+                continue
 
-        for row in memento_reader:
             urim = row[0]
             filename_digest = row[1]
 
             self.urimap["mementos"][urim] = filename_digest
 
+            if len(row) > 2:
+                self.memento_blobs[urim] = row[2]
+
+            if len(row) > 3:
+                self.memento_lengths[urim] = int(row[3])
+
         for row in memento_error_reader:
+
+            if len(row) < 2 or not is_digest(row[1]):
+                logger.warning("skipping invalid memento error data row {}".format(row))
+                continue
+
             urim = row[0]
             filename_digest = row[1]
 
@@ -233,55 +528,33 @@ class CollectionModel:
         If JSON is given as `content`, then it is just converted to a dict.
         """
 
+        self._check_writable()
+
         filename_digest = hashlib.sha3_256(bytes(urit, "utf8")).hexdigest()
 
         if type(content) == str:
 
             try:
-                json_timemap = json.loads(content)
-                fdt = datetime.strptime(
-                    json_timemap["mementos"]["first"]["datetime"],
-                    "%Y-%m-%dT%H:%M:%S"
-                )
-                ldt = datetime.strptime(
-                    json_timemap["mementos"]["last"]["datetime"],
-                    "%Y-%m-%dT%H:%M:%S"
-                )
-
-                json_timemap["mementos"]["first"]["datetime"] = fdt
-                json_timemap["mementos"]["last"]["datetime"] = ldt
-
-                updated_memlist = []
-
-                for mem in json_timemap["mementos"]["list"]:
-                    mdt = datetime.strptime(
-                        mem["datetime"],
-                        "%Y-%m-%dT%H:%M:%S"
-                    )
-
-                    uri = mem["uri"]
-                    updated_memlist.append({
-                        "datetime": mdt,
-                        "uri": uri
-                    })
-
-                json_timemap["mementos"]["list"] = updated_memlist
+                json_timemap = convert_timemap_datetimes(json.loads(content))
 
             except json.JSONDecodeError:
                 json_timemap = convert_LinkTimeMap_to_dict(content, skipErrors=True)
 
-            self.collection_timemaps[urit] = json_timemap
+            self._cache_timemap(urit, json_timemap)
 
-            with open("{}/{}_headers.json".format(
-                self.timemap_directory, filename_digest), 'w') as out:
+            with open(sharded_filename(self.timemap_directory,
+                "{}_headers.json".format(filename_digest),
+                create_directories=True), 'w') as out:
                 json.dump(headers, out, default=json_serial, indent=4)
                 
-            with open("{}/{}.json".format(
-                self.timemap_directory, filename_digest), 'w') as out:
+            with open(sharded_filename(self.timemap_directory,
+                "{}.json".format(filename_digest),
+                create_directories=True), 'w') as out:
                 json.dump(json_timemap, out, default=json_serial, indent=4)
 
-            with open("{}/{}.orig".format(
-                self.timemap_directory, filename_digest), 'w') as out:
+            with open(sharded_filename(self.timemap_directory,
+                "{}.orig".format(filename_digest),
+                create_directories=True), 'w') as out:
                 out.write(content)
 
             self.urimap["timemaps"][urit] = filename_digest
@@ -293,33 +566,83 @@ class CollectionModel:
                 "Unsupported TimeMap Type, must be str in link format"
                 )
 
+    def _cache_timemap(self, urit, timemap):
+
+        self.collection_timemaps[urit] = freeze(timemap)
+        self.collection_timemaps.move_to_end(urit)
+
+        while len(self.collection_timemaps) > self.timemap_cache_size:
+            self.collection_timemaps.popitem(last=False)
+
+    def _load_timemap(self, urit):
+        """Reads the TimeMap at `urit` from its JSON file."""
+
+        try:
+            filename_digest = self.urimap["timemaps"][urit]
+        except KeyError:
+            raise CollectionModelNoSuchTimeMapException(
+                "The URI-T [{}] is not saved in this collection model".format(urit))
+
+        logger.debug("loading TimeMap for URI-T {} from disk".format(urit))
+
+        with open(sharded_filename(self.timemap_directory,
+            "{}.json".format(filename_digest))) as jsonin:
+            tmdata = json.load(jsonin)
+
+        try:
+            tmdata = convert_timemap_datetimes(tmdata)
+        except KeyError:
+            # e.g., TimeMaps without mementos, these are returned as stored
+            logger.warning("TimeMap for URI-T {} is missing mementos".format(urit))
+
+        return tmdata
+
     def getTimeMap(self, urit):
         """
             Returns the dict form of TimeMap at `urit` provided that it
             was previously stored via `addTimeMap`.
+
+            TimeMaps are read from disk on first use and kept in a cache of
+            the `timemap_cache_size` most recently used TimeMaps.
+
+            The TimeMap is returned without copying, as a FrozenDict whose
+            lists are FrozenLists, so that callers cannot alter the TimeMap
+            held by this object.
+
+            If no TimeMap was stored for `urit`, then
+            CollectionModelNoSuchTimeMapException is thrown.
         """
 
-        # TODO: there may be too much data for low memory systems
-        return copy.deepcopy( self.collection_timemaps[urit] )
+        if urit in self.collection_timemaps:
+            self.collection_timemaps.move_to_end(urit)
+        else:
+            self._cache_timemap(urit, self._load_timemap(urit))
+
+        return self.collection_timemaps[urit]
 
     def addMemento(self, urim, content, headers):
         """Adds Memento `content` specified by `urim` to the object, along 
         with its headers.
-        """
 
-        filename_digest = hashlib.sha3_256(bytes(urim, "utf8")).hexdigest()
+        The content is stored in the blob store under the hash of the
+        content, so URI-Ms that share the same content only store it once.
+
+        The files are written by the background writer, if there is one,
+        but the memento is available from this object right away.
+        """
 
-        with open("{}/{}_headers.json".format(
-            self.memento_directory, filename_digest), 'w') as out:
-            json.dump(headers, out, default=json_serial)
+        self._check_writable()
 
-        with open("{}/{}.orig".format(
-            self.memento_directory, filename_digest), 'wb') as out:
-            out.write(content)
+        filename_digest = hashlib.sha3_256(bytes(urim, "utf8")).hexdigest()
+        blob_digest = hashlib.sha3_256(content).hexdigest()
 
         self.urimap["mementos"][urim] = filename_digest
+        self.memento_blobs[urim] = blob_digest
+        self.memento_lengths[urim] = len(content)
 
-        self.memento_csvwriter.writerow([urim, filename_digest])
+        self._write(urim, _write_memento, self.memento_directory,
+            filename_digest, headers, self.blobstore, content, blob_digest,
+            self.memento_csvwriter, urim)
 
     def addMementoError(self, urim, content, headers, errorinformation):
         """Associates `errorinformation` with memento specified by `urim` to
@@ -328,23 +651,15 @@ class CollectionModel:
         and headers={}.
         """
 
-        filename_digest = hashlib.sha3_256(bytes(urim, "utf8")).hexdigest()
-
-        with open("{}/{}_headers.json".format(
-            self.memento_errors_directory, filename_digest), 'w') as out:
-            json.dump(headers, out, default=json_serial, indent=4)
-
-        with open("{}/{}.orig".format(
-            self.memento_errors_directory, filename_digest), 'wb') as out:
-            out.write(content)
+        self._check_writable()
 
-        with open("{}/{}_error_info.txt".format(
-            self.memento_errors_directory, filename_digest), 'wb') as out:
-            out.write(errorinformation)
+        filename_digest = hashlib.sha3_256(bytes(urim, "utf8")).hexdigest()
 
         self.urimap["memento-errors"][urim] = filename_digest
 
-        self.memento_errors_csvwriter.writerow([urim, filename_digest])
+        self._write(urim, _write_memento_error, self.memento_errors_directory,
+            filename_digest, headers, content, errorinformation,
+            self.memento_errors_csvwriter, urim)
 
     def getMementoContent(self, urim):
         """Returns the HTTP entity of memento at `urim` provided that it
@@ -357,16 +672,64 @@ class CollectionModel:
         `CollectionModelMementoErrorException` is thrown.
         """
 
-        if urim in self.urimap["memento-errors"]:
+        if self._is_memento_error(urim):
             raise CollectionModelMementoErrorException
 
+        self._wait_for_write(urim)
+
         try:
+            data = self._read_memento_content(urim)
+
+        except KeyError:
+            err_msg = "The URI-M [{}] is not saved in this " \
+                "collection model".format(urim)
 
-            filename_digest = self.urimap["mementos"][urim]
+            logger.error(err_msg)
 
-            with open("{}/{}.orig".format(
-                self.memento_directory, filename_digest), 'rb') as fileinput:
-                data = fileinput.read()
+            raise CollectionModelNoSuchMementoException(err_msg)
+
+        return data
+
+    def _read_memento_content(self, urim):
+        """Reads the content of `urim` from the blob store, or from its .orig
+        file if it was stored before the blob store existed.
+
+        Raises KeyError if `urim` is not stored in this object.
+        """
+
+        if urim in self.memento_blobs:
+            return self.blobstore.get(self.memento_blobs[urim])
+
+        filename_digest = self.urimap["mementos"][urim]
+
+        with open(sharded_filename(self.memento_directory,
+            "{}.orig".format(filename_digest)), 'rb') as fileinput:
+            data = fileinput.read()
+
+        return data
+
+    def getMementoContentView(self, urim):
+        """Returns a read-only memoryview of the HTTP entity of memento at
+        `urim` provided that it was previously stored via `addMemento`.
+
+        Content stored without compression is memory-mapped rather than read
+        into a new bytes object. Compressed content must be decompressed,
+        so for it this is no cheaper than `getMementoContent`.
+
+        If no data was stored via `addMemento` for `urim`, then
+        `CollectionModelNoSuchMementoException` is thrown.
+
+        If data was stored via `addMementoError` for `urim`, then
+        `CollectionModelMementoErrorException` is thrown.
+        """
+
+        if self._is_memento_error(urim):
+            raise CollectionModelMementoErrorException
+
+        self._wait_for_write(urim)
+
+        try:
+            data = self._read_memento_content_view(urim)
 
         except KeyError:
             err_msg = "The URI-M [{}] is not saved in this " \
@@ -378,6 +741,54 @@ class CollectionModel:
 
         return data
 
+    def _read_memento_content_view(self, urim):
+        """Returns a memoryview of the content of `urim`, see
+        `_read_memento_content`.
+
+        Raises KeyError if `urim` is not stored in this object.
+        """
+
+        if urim in self.memento_blobs:
+            return self.blobstore.get_view(self.memento_blobs[urim])
+
+        return map_file(sharded_filename(self.memento_directory,
+            "{}.orig".format(self.urimap["mementos"][urim])))
+
+    def getMementoContentLength(self, urim):
+        """Returns the length in bytes of the HTTP entity of memento at
+        `urim`, taken from the index so that the content is not read.
+
+        If no data was stored via `addMemento` for `urim`, then
+        `CollectionModelNoSuchMementoException` is thrown.
+
+        If data was stored via `addMementoError` for `urim`, then
+        `CollectionModelMementoErrorException` is thrown.
+        """
+
+        if self._is_memento_error(urim):
+            raise CollectionModelMementoErrorException
+
+        if urim in self.memento_lengths:
+            return self.memento_lengths[urim]
+
+        # mementos stored before lengths were recorded
+        return len(self.getMementoContentView(urim))
+
+    def _get_boilerplate_filename(self, urim):
+        """Returns the name of the file caching the content of `urim`
+        without boilerplate. Mementos in the blob store share this file with
+        all other mementos that have the same content.
+
+        Raises KeyError if `urim` is not stored in this object.
+        """
+
+        if urim in self.memento_blobs:
+            return sharded_filename(self.blob_directory,
+                "{}.noboilerplate".format(self.memento_blobs[urim]))
+
+        return sharded_filename(self.memento_directory,
+            "{}.orig.noboilerplate".format(self.urimap["mementos"][urim]))
+
     def getMementoErrorInformation(self, urim):
         """Returns the error information associated with `urim`, provided that
         it was previously stored via `addMementoError`.
@@ -388,10 +799,12 @@ class CollectionModel:
 
         if urim in self.urimap["memento-errors"]:
 
+            self._wait_for_write(urim)
+
             filename_digest = self.urimap["memento-errors"][urim]
 
-            with open("{}/{}_error_info.txt".format(
-                self.memento_errors_directory, filename_digest), 'rb') as fileinput:
+            with open(sharded_filename(self.memento_errors_directory,
+                "{}_error_info.txt".format(filename_digest)), 'rb') as fileinput:
                 data = fileinput.read()
 
         else:
@@ -408,10 +821,65 @@ class CollectionModel:
 
         return data
 
+    def _is_memento_error(self, urim):
+
+        return urim in self.urimap["memento-errors"]
+
+    def _get_boilerplate_key(self, urim):
+        """Returns the key under which the content of `urim` without
+        boilerplate is stored, mementos with the same content share a key.
+
+        Raises KeyError if `urim` is not stored in this object.
+        """
+
+        return self._get_boilerplate_filename(urim)
+
+    def _get_boilerplate_result(self, key):
+        """Returns a (content, errorinformation) tuple for the boilerplate
+        removal stored under `key`, or (None, None) if boilerplate has not
+        yet been removed for `key`.
+        """
+
+        if os.path.exists(key):
+
+            with open(key, 'rb') as bpfile:
+                return bpfile.read(), None
+
+        errorfilename = "{}.error".format(key)
+
+        if os.path.exists(errorfilename):
+
+            with open(errorfilename) as errorfile:
+                return None, errorfile.read()
+
+        return None, None
+
+    def _save_boilerplate_result(self, key, content, errorinformation):
+        """Stores the result of boilerplate removal under `key`, either the
+        `content` without boilerplate or the `errorinformation` explaining
+        why boilerplate removal failed.
+        """
+
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+
+        if errorinformation is None:
+
+            with open(key, 'wb') as bpfile:
+                bpfile.write(content)
+
+        else:
+
+            with open("{}.error".format(key), 'w') as errorfile:
+                errorfile.write(errorinformation)
+
     def getMementoContentWithoutBoilerplate(self, urim):
         """Returns the HTTP entity of memento at `urim` with all boilerplate
         removed, provided that it was previously stored via `addMemento`.
 
+        Boilerplate is removed on first request, unless
+        `prepareMementoContentWithoutBoilerplate` already did so, and the
+        result is stored for later requests.
+
         If no data was stored via `addMemento` for `urim`, then
         `CollectionModelNoSuchMementoException` is thrown.
 
@@ -422,57 +890,128 @@ class CollectionModel:
         then CollectionModelBoilerPlateRemovalFailureException is thrown.
         """
 
-        if urim in self.urimap["memento-errors"]:
+        if self._is_memento_error(urim):
             raise CollectionModelMementoErrorException(
                 "Errors were recorded for URI-M {}".format(urim))
 
-        content_without_boilerplate = None
-
         logger.debug("Acquiring memento content without boilerplate for {}".format(urim))
 
         try:
+            key = self._get_boilerplate_key(urim)
 
-            filename_digest = self.urimap["mementos"][urim]
+        except KeyError:
 
-            boilerplate_filename = "{}/{}.orig.noboilerplate".format(
-                self.memento_directory, filename_digest)
+            logger.error("The URI-M [{}] is not saved in this collection model".format(
+                    urim))
 
-            if not os.path.exists(boilerplate_filename):
+            raise CollectionModelNoSuchMementoException(
+                "The URI-M [{}] is not saved in this collection model".format(
+                    urim))
 
-                logger.debug("Boilerplate content has not yet been "
-                    "generated, generating...")
+        content_without_boilerplate, errorinformation = \
+            self._get_boilerplate_result(key)
 
-                with open("{}/{}.orig".format(
-                    self.memento_directory, filename_digest), 'rb') as fileinput:
-                    data = fileinput.read()
+        if content_without_boilerplate is None and errorinformation is None:
 
-                try:
-                    paragraphs = justext(data, get_stoplist('English'))
+            logger.debug("Boilerplate content has not yet been "
+                "generated, generating...")
 
+            key, content_without_boilerplate, errorinformation = \
+                _remove_boilerplate_worker( (key, self.getMementoContent(urim)) )
 
-                    with open(boilerplate_filename, 'wb') as bpfile:
-                        
-                        for paragraph in paragraphs:
-                            bpfile.write(bytes("{}\n".format(paragraph.text), "utf8"))
+            if not self.read_only:
+                self._save_boilerplate_result(
+                    key, content_without_boilerplate, errorinformation)
 
-                except (lxml.etree.ParserError, lxml.etree.XMLSyntaxError) as e:
-                    raise CollectionModelBoilerPlateRemovalFailureException(repr(e))
+        if errorinformation is not None:
+            raise CollectionModelBoilerPlateRemovalFailureException(errorinformation)
 
-            with open(boilerplate_filename, 'rb') as bpfile:
-                content_without_boilerplate = bpfile.read()
-                    
-        except KeyError:
+        return content_without_boilerplate
 
-            # logger.debug("urimap['mementos']: {}".format(self.urimap["mementos"]))
+    def prepareMementoContentWithoutBoilerplate(self, processes=None,
+        batch_size=None):
+        """Removes the boilerplate from every memento stored in this object
+        using a pool of `processes` worker processes, one per CPU by default,
+        and stores the results, including failures, so that
+        `getMementoContentWithoutBoilerplate` only needs to read them.
 
-            logger.error("The URI-M [{}] is not saved in this collection model".format(
-                    urim))
+        Mementos with the same content are only processed once and mementos
+        processed by an earlier call are skipped. Memento content is read
+        `batch_size` mementos at a time, 16 per process by default.
 
-            raise CollectionModelNoSuchMementoException(
-                "The URI-M [{}] is not saved in this collection model".format(
-                    urim))
+        Returns a dict mapping each URI-M whose boilerplate could not be
+        removed by this call to the error information for that failure.
+        """
 
-        return content_without_boilerplate
+        self._check_writable()
+
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+
+        if batch_size is None:
+            batch_size = processes * 16
+
+        # boilerplate key -> a URI-M with that content, in URI-M order
+        pending = OrderedDict()
+        keys_by_urim = {}
+
+        for urim in self.getMementoURIList():
+
+            if self._is_memento_error(urim):
+                continue
+
+            key = self._get_boilerplate_key(urim)
+            keys_by_urim[urim] = key
+
+            if key in pending:
+                continue
+
+            if self._get_boilerplate_result(key) == (None, None):
+                pending[key] = urim
+
+        logger.info("removing boilerplate from {} distinct memento contents "
+            "using {} processes".format(len(pending), processes))
+
+        pending_keys = list(pending.keys())
+        failures = {}
+
+        pool = None
+
+        if processes > 1 and len(pending_keys) > 1:
+            pool = multiprocessing.Pool(processes)
+
+        try:
+
+            for start in range(0, len(pending_keys), batch_size):
+
+                batch = [ (key, self.getMementoContent(pending[key]))
+                    for key in pending_keys[start:start + batch_size] ]
+
+                if pool is None:
+                    results = map(_remove_boilerplate_worker, batch)
+                else:
+                    results = pool.imap_unordered(_remove_boilerplate_worker, batch)
+
+                for key, content, errorinformation in results:
+
+                    self._save_boilerplate_result(key, content, errorinformation)
+
+                    if errorinformation is not None:
+                        failures[key] = errorinformation
+
+                logger.info("removed boilerplate from {} of {} distinct "
+                    "memento contents".format(
+                        min(start + batch_size, len(pending_keys)),
+                        len(pending_keys)))
+
+        finally:
+
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        return { urim: failures[key] for urim, key in keys_by_urim.items()
+            if key in failures }
 
     def getHeaders(self, objecttype, uri):
         """Returns the headers associated with URI `uri`.
@@ -484,13 +1023,14 @@ class CollectionModel:
             directory = self.timemap_directory
         else:
             directory = self.memento_directory
+            self._wait_for_write(uri)
 
         try:
 
             filename_digest = self.urimap[objecttype][uri]
 
-            with open("{}/{}_headers.json".format(
-                directory, filename_digest)) as fileinput:
+            with open(sharded_filename(directory,
+                "{}_headers.json".format(filename_digest))) as fileinput:
                 data = json.load(fileinput)
 
         except KeyError:
@@ -505,7 +1045,7 @@ class CollectionModel:
         """Returns the headers associated with memento at `urim`.
         """
 
-        if urim in self.urimap["memento-errors"]:
+        if self._is_memento_error(urim):
             raise CollectionModelMementoErrorException
 
         return self.getHeaders("mementos", urim)
@@ -516,16 +1056,52 @@ class CollectionModel:
 
         return self.getHeaders("timemaps", urit)
 
+    def _get_urilist(self, objecttype):
+        """Returns a FrozenList of the keys of urimap[`objecttype`], reusing
+        the previous FrozenList if no URIs have been added since. The keys of
+        urimap are never removed, so a change in length means a change in
+        content.
+        """
+
+        urilist = self.urilists.get(objecttype)
+
+        if urilist is None or len(urilist) != len(self.urimap[objecttype]):
+            urilist = FrozenList(self.urimap[objecttype].keys())
+            self.urilists[objecttype] = urilist
+
+        return urilist
+
+    def getTokenCache(self):
+        """Returns the TokenCache holding the tokenized content of the
+        mementos in this object, kept in the tokens directory of the
+        working directory.
+        """
+
+        if getattr(self, "tokencache", None) is None:
+            self.tokencache = TokenCache("{}/tokens".format(self.working_directory),
+                read_only=self.read_only)
+
+        return self.tokencache
+
+    def getSimhashCache(self):
+        """Returns the SimhashCache holding the Simhash fingerprints of the
+        mementos in this object, kept in the simhashes directory of the
+        working directory.
+        """
+
+        if getattr(self, "simhashcache", None) is None:
+            self.simhashcache = SimhashCache(
+                "{}/simhashes".format(self.working_directory),
+                read_only=self.read_only)
+
+        return self.simhashcache
+
     def getMementoURIList(self):
-        """Returns a list of all URI-Ms stored in this object."""
+        """Returns a read-only list of all URI-Ms stored in this object."""
 
-        return copy.deepcopy(
-            list(self.urimap["mementos"].keys())
-        )
+        return self._get_urilist("mementos")
 
     def getTimeMapURIList(self):
-        """Returns a list of all URI-Ts stored in this object."""
+        """Returns a read-only list of all URI-Ts stored in this object."""
 
-        return copy.deepcopy(
-            list(self.urimap["timemaps"].keys())
-        )
+        return self._get_urilist("timemaps")
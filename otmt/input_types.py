@@ -29,6 +29,8 @@ from warcio.archiveiterator import ArchiveIterator
 from aiu import ArchiveItCollection
 
 from .collectionmodel import CollectionModel
+from .sqlitecollectionmodel import SQLiteCollectionModel
+from .warccollectionmodel import WARCCollectionModel
 # from .archiveit_collection import ArchiveItCollection
 from .archive_information import generate_raw_urim
 
@@ -38,6 +40,14 @@ cpu_count = multiprocessing.cpu_count()
 
 working_directory_default = "/tmp/otmt-working"
 
+supported_storage_types = {
+    'directory': CollectionModel,
+    'sqlite': SQLiteCollectionModel,
+    'warc': WARCCollectionModel
+}
+
+storage_type_default = 'directory'
+
 def json_serial(obj):
     """JSON serializer for objects not serializable by default json code"""
 
@@ -136,14 +146,15 @@ def generate_timemap_from_timemap_data(urir, timemap_data):
 
     return timemap_dict
 
-def get_collection_model_from_warc(warcfiles, working_directory):
+def get_collection_model_from_warc(warcfiles, working_directory,
+    collection_model_class=CollectionModel):
     """This function takes the files specified in `warcfiles` and 
     fills a colleciton model with their headers and HTTP entities.
     """
 
     logger.warning("Only HTML entities are extracted from warcfiles")
 
-    cm = CollectionModel(working_directory)
+    cm = collection_model_class(working_directory)
 
     timemaps_data = {}
 
@@ -245,7 +256,8 @@ def list_generator(input_list):
             logger.debug("yielding {}".format(item))
             yield item
 
-def get_collection_model_from_archiveit(archiveit_cid, working_directory):
+def get_collection_model_from_archiveit(archiveit_cid, working_directory,
+    collection_model_class=CollectionModel):
     """This function takes an Archive-It Collection ID as `archiveit_cid` and
     fills a collection model with the contents of that collection.
     """
@@ -260,7 +272,7 @@ def get_collection_model_from_archiveit(archiveit_cid, working_directory):
 
     logger.debug("creating collection model")
 
-    cm = CollectionModel(working_directory)
+    cm = collection_model_class(working_directory)
 
     logger.debug("generating list of seed URIs")
 
@@ -538,14 +550,18 @@ def fetch_and_save_memento_content(urimlist, collectionmodel):
             urim, b"", {}, bytes(errormsg, "utf8")
         )
 
+    # everything downloaded is on disk before measures are computed
+    collectionmodel.flush()
+
     return collectionmodel
 
-def get_collection_model_from_timemap(urits, working_directory):
+def get_collection_model_from_timemap(urits, working_directory,
+    collection_model_class=CollectionModel):
     """This function fills a collection model using one or more TimeMaps
     stored in `urits`.
     """
 
-    cm = CollectionModel(working_directory=working_directory)
+    cm = collection_model_class(working_directory=working_directory)
 
     for urit in urits:
 
@@ -577,7 +593,8 @@ def get_collection_model_from_timemap(urits, working_directory):
 
     return cm
 
-def get_collection_model_from_datafile(datafile, working_directory):
+def get_collection_model_from_datafile(datafile, working_directory,
+    collection_model_class=CollectionModel):
     """This function generates a collection, including TimeMaps from a gold
     standard testing data file. It is used mainly for testing.
     """
@@ -586,7 +603,7 @@ def get_collection_model_from_datafile(datafile, working_directory):
 
     logger.info("building collection data from datafile {}".format(datafile))
 
-    cm = CollectionModel(working_directory=working_directory)
+    cm = collection_model_class(working_directory=working_directory)
 
     with open(datafile) as tsvfile:
 
@@ -635,12 +652,13 @@ def get_collection_model_from_datafile(datafile, working_directory):
 
     return cm
 
-def get_collection_model_from_directory(working_directory):
+def get_collection_model_from_directory(working_directory,
+    collection_model_class=CollectionModel):
     """This function just loads a colleciton model from an existing
     directory. It is used mainly for testing.
     """
     
-    cm = CollectionModel(working_directory)
+    cm = collection_model_class(working_directory)
 
     return cm
     
@@ -652,13 +670,19 @@ supported_input_types = {
     'dir': get_collection_model_from_directory
 }
 
-def get_collection_model(input_type, arguments, working_directory):
+def get_collection_model(input_type, arguments, working_directory,
+    storage_type=storage_type_default):
     """This factory method takes `input_type` along with `arguments` and uses
     `supported_input_types` to run the correct function for producing
     the collection model filled via the different input methods,
     such as Archive-It collection ID or TimeMap.
+
+    The `storage_type` selects the CollectionModel class from
+    `supported_storage_types` that will hold the data.
     """
 
+    collection_model_class = supported_storage_types[storage_type]
+
     logger.info("Using input type {}".format(input_type))
     logger.debug("input type arguments: {}".format(arguments))
     logger.debug("using supported input type {}".format(
@@ -671,8 +695,10 @@ def get_collection_model(input_type, arguments, working_directory):
         logger.info("Input directory {} has been chosen, using it instead of the "
             "working directory value of {}".format(input_dir, working_directory))
 
-        return supported_input_types[input_type](input_dir)
+        return supported_input_types[input_type](input_dir,
+            collection_model_class=collection_model_class)
     else:
         logger.info("Working directory {} will be used".format(working_directory))
 
-        return supported_input_types[input_type](arguments, working_directory)
+        return supported_input_types[input_type](arguments, working_directory,
+            collection_model_class=collection_model_class)
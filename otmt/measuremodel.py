@@ -17,6 +17,7 @@ provided that such a subclass has the same methods and parameters.
 
 import json
 import csv
+import copy
 
 class MeasureModelException(Exception):
     """An exception class to be used by the functions in this file so that the
@@ -48,6 +49,18 @@ class MeasureModelNoSuchMeasureType(MeasureModelException):
     """
     pass
 
+def _merge_dicts(target, source):
+    """Recursively copies the keys and values of dict `source` into dict
+    `target`, merging dicts stored under the same key.
+    """
+
+    for key, value in source.items():
+
+        if type(value) == dict and type(target.get(key)) == dict:
+            _merge_dicts(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+
 class MeasureModel:
     """
         This class exists because the data structure for keeping track
@@ -67,6 +80,23 @@ class MeasureModel:
         self.mementos_to_timemaps = {}
         self.measures = []
 
+    def update(self, other):
+        """Adds the scores, errors, and measures stored in the MeasureModel
+        `other` to this object. Values stored in `other` replace those
+        stored in this object for the same keys, as if the calls that
+        stored them in `other` had been made on this object instead.
+        """
+
+        _merge_dicts(self.scoremodel, other.scoremodel)
+        _merge_dicts(self.timemap_access_errormodel, other.timemap_access_errormodel)
+        _merge_dicts(self.memento_access_errormodel, other.memento_access_errormodel)
+        _merge_dicts(self.memento_measure_errormodel, other.memento_measure_errormodel)
+        _merge_dicts(self.mementos_to_timemaps, other.mementos_to_timemaps)
+
+        for measure in other.measures:
+            if measure not in self.measures:
+                self.measures.append(measure)
+
     def initialize_scoremodel_for_urit_urim(self, urit, urim):
         """Sets up the data structure for scores of URI-Ts and URI-Ms."""
 
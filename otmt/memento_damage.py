@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.memento_damage
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module requests the damage of mementos from a Memento Damage service,
+such as the mementodamage container of docker-compose.yml, with several
+requests in flight at once, and stores the results so that the damage of
+each memento is only requested once.
+"""
+
+import os
+import csv
+import logging
+
+from concurrent.futures import as_completed
+
+import requests
+
+from requests_futures.sessions import FuturesSession
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# the number of requests sent to the Memento Damage service at once
+memento_damage_workers_default = 8
+
+# the number of seconds to wait for the damage of a memento, which the
+# service computes by loading the memento in a browser
+memento_damage_timeout_default = 300
+
+class MementoDamageException(Exception):
+    """An exception class to be used by the functions in this file so that the
+    source of error can be detected.
+    """
+    pass
+
+class MementoDamageCache:
+    """
+        Stores the total damage of each memento in the CSV file `filename`,
+        keyed by URI-M.
+    """
+
+    def __init__(self, filename):
+
+        self.filename = filename
+        self.damages = {}
+
+        directory = os.path.dirname(filename)
+
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        if os.path.exists(filename):
+
+            with open(filename) as f:
+
+                for row in csv.reader(f):
+                    self.damages[row[0]] = float(row[1])
+
+        self.file = open(filename, 'a')
+        self.writer = csv.writer(self.file)
+
+    def __del__(self):
+
+        self.close()
+
+    def close(self):
+        """Closes the file held open by this object."""
+
+        if getattr(self, "file", None) is not None:
+            self.file.close()
+            self.file = None
+
+    def get(self, urim):
+        """Returns the damage stored for `urim`, or None if none was
+        stored.
+        """
+
+        return self.damages.get(urim)
+
+    def put(self, urim, damage):
+        """Stores `damage` for `urim`."""
+
+        self.damages[urim] = damage
+
+        self.writer.writerow([urim, damage])
+        self.file.flush()
+
+class MementoDamageClient:
+    """
+        Requests the total damage of mementos from the Memento Damage
+        service at `damage_uri` (e.g., http://localhost:8888), sending up to
+        `max_workers` requests at once.
+
+        If `cache` is given, a MementoDamageCache, damages stored in it are
+        not requested again, and damages received are stored in it.
+        Requests that fail are not cached, so that they are tried again
+        later.
+    """
+
+    def __init__(self, damage_uri, cache=None,
+        max_workers=memento_damage_workers_default,
+        timeout=memento_damage_timeout_default, session=None):
+
+        if max_workers < 1:
+            raise MementoDamageException(
+                "At least one worker is needed to request damages, "
+                "not {}".format(max_workers))
+
+        self.damage_uri = damage_uri.rstrip('/')
+        self.cache = cache
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        if session is None:
+
+            session = requests.Session()
+            retry = Retry(
+                total=3,
+                connect=3,
+                read=3,
+                backoff_factor=0.3,
+                status_forcelist=(500, 502, 504)
+            )
+            adapter = HTTPAdapter(max_retries=retry,
+                pool_maxsize=max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+        self.session = session
+
+    def get_endpoint(self, urim):
+        """Returns the URI of the damage of `urim` at the service."""
+
+        return "{}/api/damage/{}".format(self.damage_uri, urim)
+
+    def _extract_damage(self, urim, response):
+
+        if response.status_code != 200:
+            logger.warning("Failed to download Memento Damage data for URI-M {} "
+                "using endpoint {}, status {}".format(
+                    urim, response.url, response.status_code))
+            return None
+
+        try:
+            damagedata = response.json()
+        except ValueError:
+            logger.warning("Failed to extract Memento Damage data for URI-M {} "
+                "using endpoint {}".format(urim, response.url))
+            return None
+
+        if type(damagedata) != dict or 'total_damage' not in damagedata:
+            logger.warning("No total damage in Memento Damage data for "
+                "URI-M {}".format(urim))
+            return None
+
+        return float(damagedata['total_damage'])
+
+    def get_damages(self, urims):
+        """Returns a dictionary of the total damage of each URI-M in the
+        list of `urims`, requesting all URI-Ms not in the cache at once, up
+        to `max_workers` at a time. URI-Ms whose damage could not be
+        requested are missing from the dictionary.
+        """
+
+        damages = {}
+        missing = []
+
+        # each URI-M is requested once, no matter how often it is listed
+        for urim in dict.fromkeys(urims):
+
+            damage = self.cache.get(urim) if self.cache is not None else None
+
+            if damage is None:
+                missing.append(urim)
+            else:
+                damages[urim] = damage
+
+        if not missing:
+            return damages
+
+        logger.info("requesting the damage of {} mementos, {} at a time, "
+            "from {}".format(len(missing), self.max_workers, self.damage_uri))
+
+        with FuturesSession(max_workers=self.max_workers,
+            session=self.session) as session:
+
+            futures = {
+                session.get(self.get_endpoint(urim), timeout=self.timeout): urim
+                for urim in missing
+            }
+
+            for future in as_completed(futures):
+
+                urim = futures[future]
+
+                try:
+                    damage = self._extract_damage(urim, future.result())
+
+                except requests.exceptions.RequestException as e:
+                    logger.warning("Failed to download Memento Damage data "
+                        "for URI-M {} using endpoint {}: {}".format(
+                            urim, self.get_endpoint(urim), e))
+                    damage = None
+
+                if damage is not None:
+
+                    damages[urim] = damage
+
+                    if self.cache is not None:
+                        self.cache.put(urim, damage)
+
+        return damages
+
+    def get_damage(self, urim):
+        """Returns the total damage of `urim`, or None if it could not be
+        requested.
+        """
+
+        return self.get_damages([urim]).get(urim)
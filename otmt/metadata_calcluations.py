@@ -10,10 +10,10 @@ timemap_measures model.
 
 import logging
 
-from simhash import Simhash
 from langdetect import detect
 
 from . import CollectionModelNoSuchMementoException
+from .timemap_measures import get_memento_simhash
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +21,9 @@ def compute_Simhashes(collectionmodel, measuremodel):
     """Iterates through all TimeMaps and mementos in `collectionmodel` and 
     computes the Simhash on their raw content, storing the results in
     `measuremodel`.
+
+    Fingerprints already computed for the raw_simhash measure are read
+    from the Simhash cache of `collectionmodel`, see get_memento_simhash.
     """
     
     urits = collectionmodel.getTimeMapURIList()
@@ -53,9 +56,7 @@ def compute_Simhashes(collectionmodel, measuremodel):
                         shash = "No Simhash due to error"
 
                     else:
-                        shash = Simhash( 
-                            str(collectionmodel.getMementoContent(urim))
-                            ).value
+                        shash = get_memento_simhash(urim, collectionmodel)
 
                 except CollectionModelNoSuchMementoException:
                     shash = "No Simhash due to access error"
@@ -103,7 +104,7 @@ def compute_raw_content_lengths(collectionmodel, measuremodel):
                         length = "No length due to error"
 
                     else:
-                        length = len(collectionmodel.getMementoContent(urim))
+                        length = collectionmodel.getMementoContentLength(urim)
 
                 except CollectionModelNoSuchMementoException:
                     length = "No length due to access error"
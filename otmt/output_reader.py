@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.output_reader
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module reads the JSON output of detect_off_topic one memento at a
+time, so that the tools processing it do not need to hold the whole file
+in memory, and reads the files listing the URI-Ms they should consider.
+"""
+
+import json
+import logging
+
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# the number of characters read from the output file at once
+output_reader_chunk_size = 1048576
+
+memento_datetime_format = "%Y/%m/%d %H:%M:%S GMT"
+
+class OutputReaderException(Exception):
+    """An exception class to be used by the functions in this file so that the
+    source of error can be detected.
+    """
+    pass
+
+class MementoRecord:
+    """
+        The output of detect_off_topic for the memento `urim` of the TimeMap
+        `urit`, with the values recorded for it in the dictionary `data`.
+    """
+
+    def __init__(self, urit, urim, data):
+
+        self.urit = urit
+        self.urim = urim
+        self.data = data
+
+    @property
+    def simhash(self):
+        """The raw Simhash of the memento, a message if it could not be
+        computed, or None if it was not recorded.
+        """
+        return self.data.get("raw memento simhash value")
+
+    @property
+    def content_length(self):
+        return self.data.get("content length")
+
+    @property
+    def language(self):
+        return self.data.get("language")
+
+    @property
+    def memento_datetime(self):
+        """The memento-datetime of the memento as a datetime, or None if it
+        was not recorded.
+        """
+
+        value = self.data.get("memento-datetime")
+
+        if value is None:
+            return None
+
+        return datetime.strptime(value, memento_datetime_format)
+
+    @property
+    def topic_status(self):
+        return self.data.get("overall topic status")
+
+    @property
+    def access_error(self):
+        return self.data.get("access error")
+
+class _JSONStream:
+    """Decodes the JSON text of the file object `f` piece by piece."""
+
+    def __init__(self, f, chunk_size):
+
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Reads the next chunk of the file, returning False at its end."""
+
+        if self.eof:
+            return False
+
+        chunk = self.f.read(self.chunk_size)
+
+        if not chunk:
+            self.eof = True
+            return False
+
+        # only the unread part of the buffer is kept
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+        return True
+
+    def peek(self):
+        """Returns the next character other than whitespace, or "" at the
+        end of the file.
+        """
+
+        while True:
+
+            while self.position < len(self.buffer) and \
+                self.buffer[self.position] in " \t\n\r":
+                self.position += 1
+
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+
+            if not self._fill():
+                return ""
+
+    def expect(self, characters):
+        """Consumes the next character other than whitespace, which must
+        be one of `characters`, and returns it.
+        """
+
+        character = self.peek()
+
+        if character == "" or character not in characters:
+            raise OutputReaderException(
+                "Expected one of {} but found {} in JSON output".format(
+                    list(characters), repr(character) if character else "the end"))
+
+        self.position += 1
+
+        return character
+
+    def decode(self):
+        """Decodes and consumes the next complete JSON value."""
+
+        self.peek()
+
+        while True:
+
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+
+                # a number may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+
+            except json.JSONDecodeError as e:
+
+                if self.eof:
+                    raise OutputReaderException(
+                        "Could not decode JSON output: {}".format(e))
+
+            self._fill()
+
+    def members(self):
+        """Iterates over the keys of the object starting at the current
+        position, leaving the position at the value of each key when it is
+        yielded, which the caller must consume.
+        """
+
+        self.expect("{")
+
+        if self.peek() == "}":
+            self.position += 1
+            return
+
+        while True:
+
+            key = self.decode()
+
+            if type(key) != str:
+                raise OutputReaderException(
+                    "Expected a key in JSON output but found {}".format(repr(key)))
+
+            self.expect(":")
+
+            yield key
+
+            if self.expect(",}") == "}":
+                return
+
+def read_output_records(filename, chunk_size=output_reader_chunk_size):
+    """Iterates over the mementos in the JSON output of detect_off_topic
+    stored in `filename`, yielding a MementoRecord for each, in the order
+    they appear in the file. Only one memento is decoded at a time.
+
+    TimeMaps that could not be accessed have no mementos and are skipped.
+    """
+
+    with open(filename) as f:
+
+        stream = _JSONStream(f, chunk_size)
+
+        for urit in stream.members():
+
+            if stream.peek() != "{":
+                logger.warning("skipping TimeMap {} without mementos".format(urit))
+                stream.decode()
+                continue
+
+            for urim in stream.members():
+
+                data = stream.decode()
+
+                if type(data) != dict:
+                    logger.warning("skipping {} of {} for TimeMap {}".format(
+                        urim, repr(data), urit))
+                    continue
+
+                yield MementoRecord(urit, urim, data)
+
+        if stream.peek() != "":
+            raise OutputReaderException(
+                "Unexpected content after the JSON output in {}".format(filename))
+
+def read_consideration_file(filename):
+    """Returns the set of URI-Ms listed in `filename`, one per line."""
+
+    consideration_urims = set()
+
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+
+            if line:
+                consideration_urims.add(line)
+
+    return consideration_urims
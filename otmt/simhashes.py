@@ -0,0 +1,618 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.simhashes
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module computes 64-bit Simhash fingerprints of memento content with
+NumPy, either from its bytes or from the IDs of its tokens, and stores them
+so that the fingerprint of each memento is only computed once, no matter
+how many measures and metadata calculations use it, and indexes
+fingerprints so that near-duplicates can be found without comparing every
+pair of mementos, or clusters them by the number of bits in which their
+fingerprints differ.
+
+Fingerprints of bytes are built from the overlapping 4-byte shingles of
+the lowercased letters, digits, and non-ASCII bytes of the content,
+fingerprints of tokens from hashes of the token strings, so that they do
+not depend on the IDs a token cache gave the tokens. Each distinct
+feature is hashed to 64 bits, and bit i of the fingerprint is set if it is
+set in the hashes of more than half of the features, weighted by how often
+each occurs.
+"""
+
+import os
+import csv
+import itertools
+import logging
+
+import numpy as np
+import scipy.sparse
+
+from sklearn.cluster import DBSCAN
+
+logger = logging.getLogger(__name__)
+
+simhash_bits = 64
+shingle_width = 4
+
+# the number of feature hashes whose bits are unpacked at once, which
+# bounds the memory used for long content
+simhash_batch_size = 65536
+
+# the number of pairs of fingerprints compared at once when building the
+# graph of near-duplicates, which bounds the memory used for large slices
+simhash_graph_block_size = 4194304
+
+def _mix64(values):
+    """Returns the 64-bit hash of each of the unsigned 64-bit integer
+    `values`, using the finalizer of SplitMix64.
+    """
+
+    with np.errstate(over='ignore'):
+        values = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+
+    return values ^ (values >> np.uint64(31))
+
+def _fingerprint(features):
+    """Returns the Simhash fingerprint of the array of unsigned integer
+    `features`, in which features may occur several times.
+    """
+
+    if len(features) == 0:
+        return 0
+
+    features, weights = np.unique(features, return_counts=True)
+    hashes = _mix64(features)
+
+    sums = np.zeros(simhash_bits, dtype=np.int64)
+
+    for start in range(0, len(hashes), simhash_batch_size):
+
+        batch = hashes[start:start + simhash_batch_size].astype('<u8')
+
+        # bit i of each hash is in column i
+        bits = np.unpackbits(batch.view(np.uint8).reshape(-1, 8), axis=1,
+            bitorder='little')
+
+        sums += weights[start:start + simhash_batch_size] @ bits
+
+    set_bits = 2 * sums > weights.sum()
+
+    return int.from_bytes(np.packbits(set_bits, bitorder='little').tobytes(),
+        'little')
+
+def simhash_bytes(content):
+    """Returns the Simhash fingerprint of `content`, given as bytes or a
+    memoryview, computed from the overlapping 4-byte shingles of its
+    letters and digits.
+
+    ASCII letters are lowercased and ASCII punctuation, whitespace, and
+    control characters are left out. Other bytes, like those of UTF-8
+    encoded letters, are kept, so the content does not need to be decoded.
+    """
+
+    content = np.frombuffer(content, dtype=np.uint8)
+
+    uppercase = (content >= ord('A')) & (content <= ord('Z'))
+    content = np.where(uppercase, content + 32, content).astype(np.uint8)
+
+    word = ( (content >= ord('a')) & (content <= ord('z')) ) | \
+        ( (content >= ord('0')) & (content <= ord('9')) ) | \
+        (content == ord('_')) | (content >= 0x80)
+
+    content = content[word].astype(np.uint64)
+
+    if len(content) == 0:
+        return 0
+
+    if len(content) < shingle_width:
+        shingles = np.zeros(1, dtype=np.uint64)
+
+        for byte in content:
+            shingles = (shingles << np.uint64(8)) | byte
+
+    else:
+        count = len(content) - shingle_width + 1
+        shingles = np.zeros(count, dtype=np.uint64)
+
+        for offset in range(shingle_width):
+            shingles = (shingles << np.uint64(8)) | content[offset:offset + count]
+
+    return _fingerprint(shingles)
+
+def simhash_token_ids(token_ids, tokencache):
+    """Returns the Simhash fingerprint of the tokens with the IDs
+    `token_ids` in `tokencache`, weighting each token by its frequency.
+
+    The fingerprint is computed from the hashes of the tokens rather than
+    their IDs, which depend on the order in which mementos were tokenized,
+    so the same tokens have the same fingerprint in every token cache.
+    """
+
+    return _fingerprint(tokencache.get_token_hashes(token_ids))
+
+def simhash_distance(first_fingerprint, second_fingerprint):
+    """Returns the number of bits that differ between two fingerprints."""
+
+    return bin( (first_fingerprint ^ second_fingerprint)
+        & ((1 << simhash_bits) - 1) ).count("1")
+
+class SimhashCache:
+    """
+        Stores the Simhash fingerprint of each memento in `directory`, keyed
+        by URI-M and by the name of the variant of content it was computed
+        from, e.g., "raw" for raw content, in one CSV file per variant.
+
+        If `read_only` is True, nothing is written to `directory` and
+        fingerprints stored with `put` are only kept in memory, like in
+        TokenCache.
+    """
+
+    def __init__(self, directory, read_only=False):
+
+        self.directory = directory
+        self.read_only = read_only
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # variant name -> dict of URI-M -> fingerprint, and open files
+        self.fingerprints = {}
+        self.files = {}
+
+    def __del__(self):
+
+        self.close()
+
+    def close(self):
+        """Closes all files held open by this object."""
+
+        for f, writer in getattr(self, "files", {}).values():
+            f.close()
+
+        self.files = {}
+
+    def _get_variant(self, variant):
+
+        if variant in self.fingerprints:
+            return self.fingerprints[variant]
+
+        filename = "{}/{}.csv".format(self.directory, variant)
+        fingerprints = {}
+
+        if os.path.exists(filename):
+
+            with open(filename) as f:
+
+                for row in csv.reader(f):
+                    fingerprints[row[0]] = int(row[1])
+
+        if not self.read_only:
+            f = open(filename, 'a')
+            self.files[variant] = (f, csv.writer(f))
+
+        self.fingerprints[variant] = fingerprints
+
+        return fingerprints
+
+    def get(self, urim, variant):
+        """Returns the fingerprint stored for `urim` for `variant`, or None
+        if none was stored.
+        """
+
+        return self._get_variant(variant).get(urim)
+
+    def put(self, urim, variant, fingerprint):
+        """Stores `fingerprint` for `urim` for `variant`."""
+
+        self._get_variant(variant)[urim] = fingerprint
+
+        if not self.read_only:
+            f, writer = self.files[variant]
+            writer.writerow([urim, fingerprint])
+            f.flush()
+
+class SimhashIndexException(Exception):
+    """An exception class to be used by SimhashIndex so that the source of
+    error can be detected.
+    """
+    pass
+
+# the number of fingerprints inserted one at a time that are compared
+# directly with each query before they are merged into the tables
+simhash_index_buffer_size = 4096
+
+_popcount_table = np.array([ bin(i).count("1") for i in range(256) ],
+    dtype=np.uint8)
+
+def _popcount(values):
+    """Returns the number of set bits of each of the unsigned 64-bit integer
+    `values`.
+    """
+
+    values = np.asarray(values, dtype=np.uint64)
+
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values).astype(np.int64)
+
+    return _popcount_table[
+        values.astype('<u8').view(np.uint8).reshape(values.shape + (8,))
+    ].sum(axis=-1, dtype=np.int64)
+
+# (block width, radius) -> array of all block values with at most radius bits set
+_neighbour_masks = {}
+
+def _get_neighbour_masks(width, radius):
+
+    try:
+        return _neighbour_masks[(width, radius)]
+
+    except KeyError:
+
+        masks = [ sum(1 << bit for bit in bits)
+            for distance in range(min(radius, width) + 1)
+            for bits in itertools.combinations(range(width), distance) ]
+
+        masks = np.array(masks, dtype=np.uint64)
+        _neighbour_masks[(width, radius)] = masks
+
+        return masks
+
+def _expand_ranges(starts, ends):
+    """Returns the concatenation of the ranges from each of `starts` to the
+    corresponding one of `ends`.
+    """
+
+    lengths = ends - starts
+    nonempty = lengths > 0
+    starts = starts[nonempty]
+    lengths = lengths[nonempty]
+
+    # the offset of each range within the result
+    offsets = np.cumsum(lengths) - lengths
+
+    return np.arange(lengths.sum()) + np.repeat(starts - offsets, lengths)
+
+class SimhashIndex:
+    """
+        Finds the URI-Ms whose Simhash fingerprints are within a number of
+        bits of a given fingerprint without comparing it with every
+        fingerprint in the index.
+
+        The 64 bits of the fingerprints are divided into `blocks` blocks,
+        and the index keeps one table per block, holding all fingerprints
+        sorted by the bits of that block, like a table of permuted
+        fingerprints with these bits first. If two fingerprints differ in
+        at most k bits, at least one of their blocks differs in at most
+        k // `blocks` bits, so a query only looks up the block values that
+        close to those of the fingerprint it is given in each table, and
+        only these candidates are compared bit by bit.
+
+        `max_distance` is the largest number of bits queries are answered
+        for, as the number of blocks is chosen for it. If `blocks` is not
+        given, it is `max_distance` + 1, so that blocks are only looked up
+        for an exact match, but no more than 4, so that each block can
+        still tell fingerprints apart.
+    """
+
+    def __init__(self, max_distance=3, blocks=None):
+
+        if blocks is None:
+            blocks = min(max_distance + 1, 4)
+
+        if not 1 <= blocks <= simhash_bits:
+            raise SimhashIndexException(
+                "The number of blocks must be between 1 and {}, not {}".format(
+                    simhash_bits, blocks))
+
+        if not 0 <= max_distance <= simhash_bits:
+            raise SimhashIndexException(
+                "The maximum distance must be between 0 and {}, not {}".format(
+                    simhash_bits, max_distance))
+
+        self.max_distance = max_distance
+
+        # (shift, width) of each block
+        self.blocks = []
+        shift = 0
+
+        for block in range(blocks):
+            width = simhash_bits // blocks + \
+                (1 if block < simhash_bits % blocks else 0)
+            self.blocks.append((shift, width))
+            shift += width
+
+        self.urims = []
+        self.positions = {}
+        self.fingerprints = np.zeros(0, dtype=np.uint64)
+
+        # the sorted block values and positions of the fingerprints merged
+        # into each table, which are the first `self.indexed`
+        self.tables = [ (np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64))
+            for block in self.blocks ]
+        self.indexed = 0
+
+    def __len__(self):
+
+        return len(self.urims)
+
+    def __contains__(self, urim):
+
+        return urim in self.positions
+
+    def _block_values(self, fingerprints, block):
+
+        shift, width = self.blocks[block]
+
+        return (fingerprints >> np.uint64(shift)) & \
+            np.uint64((1 << width) - 1)
+
+    def _append(self, urims, fingerprints):
+
+        if len(self.urims) + len(urims) > len(self.fingerprints):
+            capacity = max(1024, 2 * len(self.fingerprints),
+                len(self.urims) + len(urims))
+            grown = np.zeros(capacity, dtype=np.uint64)
+            grown[:len(self.urims)] = self.fingerprints[:len(self.urims)]
+            self.fingerprints = grown
+
+        start = len(self.urims)
+
+        for urim, fingerprint in zip(urims, fingerprints):
+
+            if urim in self.positions:
+                continue
+
+            self.fingerprints[len(self.urims)] = fingerprint
+            self.positions[urim] = len(self.urims)
+            self.urims.append(urim)
+
+        return len(self.urims) - start
+
+    def _merge(self):
+        """Merges the fingerprints inserted since the last merge into the
+        tables.
+        """
+
+        if self.indexed == len(self.urims):
+            return
+
+        fingerprints = self.fingerprints[:len(self.urims)]
+
+        for block, (keys, positions) in enumerate(self.tables):
+
+            new_positions = np.arange(self.indexed, len(self.urims))
+
+            positions = np.concatenate([positions, new_positions])
+            keys = np.concatenate([keys,
+                self._block_values(fingerprints[new_positions], block)])
+
+            order = np.argsort(keys, kind='stable')
+            self.tables[block] = (keys[order], positions[order])
+
+        self.indexed = len(self.urims)
+
+    def insert(self, urim, fingerprint):
+        """Adds `urim` with `fingerprint` to the index, unless `urim` is
+        already part of it, returning the number of URI-Ms added.
+        """
+
+        added = self._append([urim], [fingerprint])
+
+        if len(self.urims) - self.indexed >= simhash_index_buffer_size:
+            self._merge()
+
+        return added
+
+    def insert_many(self, items):
+        """Adds each (URI-M, fingerprint) pair of `items` to the index, as
+        with insert, returning the number of URI-Ms added.
+        """
+
+        items = list(items)
+
+        added = self._append([ urim for urim, fingerprint in items ],
+            [ fingerprint for urim, fingerprint in items ])
+
+        self._merge()
+
+        return added
+
+    def insert_measuremodel(self, measuremodel):
+        """Adds the raw Simhash fingerprint of each memento in
+        `measuremodel`, as set by compute_Simhashes, to the index, skipping
+        mementos that have no fingerprint because of an error. Returns the
+        number of URI-Ms added.
+        """
+
+        items = []
+
+        for urit in measuremodel.get_TimeMap_URIs():
+
+            for urim in measuremodel.get_Memento_URIs_in_TimeMap(urit):
+
+                fingerprint = measuremodel.get_simhash(urit, urim)
+
+                if type(fingerprint) == int:
+                    items.append( (urim, fingerprint) )
+
+        return self.insert_many(items)
+
+    def get(self, urim):
+        """Returns the fingerprint of `urim`, or None if it is not part of
+        the index.
+        """
+
+        try:
+            return int(self.fingerprints[self.positions[urim]])
+        except KeyError:
+            return None
+
+    def query(self, fingerprint, max_distance=None):
+        """Returns a list of (URI-M, distance) pairs for all URI-Ms in the
+        index whose fingerprints differ from `fingerprint` in at most
+        `max_distance` bits, or in at most the number of bits given when
+        creating the index, ordered by distance and then by insertion.
+
+        Raises SimhashIndexException if `max_distance` is larger than the
+        number of bits given when creating the index, for which its blocks
+        were not chosen.
+        """
+
+        if max_distance is None:
+            max_distance = self.max_distance
+
+        if max_distance > self.max_distance:
+            raise SimhashIndexException(
+                "This index answers queries for up to {} bits, not {}".format(
+                    self.max_distance, max_distance))
+
+        fingerprint = np.uint64(fingerprint)
+        fingerprints = self.fingerprints[:len(self.urims)]
+
+        if max_distance >= simhash_bits:
+            candidates = np.arange(len(self.urims))
+
+        else:
+            radius = max_distance // len(self.blocks)
+
+            candidates = [ np.arange(self.indexed, len(self.urims)) ]
+
+            for block, (keys, positions) in enumerate(self.tables):
+
+                shift, width = self.blocks[block]
+
+                probes = self._block_values(fingerprint, block) ^ \
+                    _get_neighbour_masks(width, radius)
+
+                candidates.append(positions[_expand_ranges(
+                    np.searchsorted(keys, probes, side='left'),
+                    np.searchsorted(keys, probes, side='right')
+                )])
+
+            candidates = np.unique(np.concatenate(candidates))
+
+        distances = _popcount(fingerprints[candidates] ^ fingerprint)
+
+        within = distances <= max_distance
+        candidates = candidates[within]
+        distances = distances[within]
+
+        order = np.lexsort((candidates, distances))
+
+        return [ (self.urims[position], distance) for position, distance in
+            zip(candidates[order].tolist(), distances[order].tolist()) ]
+
+    def save(self, filename):
+        """Writes the index to `filename`, from which it can be read with
+        SimhashIndex.load.
+        """
+
+        self._merge()
+
+        arrays = {
+            "max_distance": np.array(self.max_distance),
+            "blocks": np.array(len(self.blocks)),
+            "urims": np.array(self.urims, dtype=str),
+            "fingerprints": self.fingerprints[:len(self.urims)]
+        }
+
+        for block, (keys, positions) in enumerate(self.tables):
+            arrays["positions{}".format(block)] = positions
+
+        with open(filename, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, filename):
+        """Reads an index written with save from `filename`."""
+
+        try:
+            with np.load(filename, allow_pickle=False) as arrays:
+
+                index = cls(max_distance=int(arrays["max_distance"]),
+                    blocks=int(arrays["blocks"]))
+
+                index._append(arrays["urims"].tolist(),
+                    arrays["fingerprints"])
+
+                # the tables were sorted when saved
+                for block in range(len(index.blocks)):
+                    positions = arrays["positions{}".format(block)].astype(np.int64)
+                    index.tables[block] = (
+                        index._block_values(index.fingerprints[positions], block),
+                        positions
+                    )
+
+        except (OSError, KeyError, ValueError) as e:
+            raise SimhashIndexException(
+                "Could not read a Simhash index from {}: {}".format(filename, e))
+
+        index.indexed = len(index.urims)
+
+        return index
+
+def simhash_distance_graph(fingerprints, max_distance,
+    block_size=simhash_graph_block_size):
+    """Returns a sparse matrix holding, for each pair of the list of
+    `fingerprints`, the number of bits in which they differ, if it is at
+    most `max_distance`. Pairs that differ in more bits are left out, while
+    pairs that do not differ at all are stored as explicit zeros.
+
+    Fingerprints are compared with XOR and a population count over blocks
+    of rows, comparing no more than `block_size` pairs at once.
+    """
+
+    fingerprints = np.array(fingerprints, dtype=np.uint64)
+    count = len(fingerprints)
+
+    rows = []
+    columns = []
+    distances = []
+
+    block_rows = max(1, block_size // max(count, 1))
+
+    for start in range(0, count, block_rows):
+
+        block = _popcount(
+            fingerprints[start:start + block_rows, np.newaxis] ^ fingerprints)
+
+        block_row, column = np.nonzero(block <= max_distance)
+
+        rows.append(block_row + start)
+        columns.append(column)
+        distances.append(block[block_row, column])
+
+    if count == 0:
+        return scipy.sparse.csr_matrix((0, 0), dtype=np.float64)
+
+    # built directly rather than from COO, which would drop the explicit zeros
+    rows = np.concatenate(rows)
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=count), out=indptr[1:])
+
+    return scipy.sparse.csr_matrix(
+        (np.concatenate(distances).astype(np.float64), np.concatenate(columns),
+            indptr),
+        shape=(count, count))
+
+def cluster_simhashes(fingerprints, max_distance, min_samples=2,
+    block_size=simhash_graph_block_size):
+    """Clusters the list of `fingerprints` with DBSCAN, treating two
+    fingerprints as neighbors if they differ in at most `max_distance` bits
+    and requiring `min_samples` neighbors for a core point. Returns the
+    cluster label of each fingerprint, with -1 for noise.
+    """
+
+    if len(fingerprints) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    graph = simhash_distance_graph(fingerprints, max_distance,
+        block_size=block_size)
+
+    # distances are whole numbers of bits, and DBSCAN requires a positive eps
+    return DBSCAN(eps=max_distance + 0.5, min_samples=min_samples,
+        metric='precomputed').fit(graph).labels_
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.slicing
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module divides mementos into slices by their memento-datetimes, held
+as arrays of numpy datetime64 values, so that collections of millions of
+mementos can be sliced without a Python loop over them.
+"""
+
+import math
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SlicingException(Exception):
+    """An exception class to be used by the functions in this file so that the
+    source of error can be detected.
+    """
+    pass
+
+def parse_memento_datetimes(memento_datetimes):
+    """Converts the list of `memento_datetimes`, written like
+    "2016/01/21 15:45:06 GMT" as in the output of detect_off_topic, into a
+    datetime64[s] array.
+    """
+
+    if len(memento_datetimes) == 0:
+        return np.zeros(0, dtype='datetime64[s]')
+
+    # keeps "2016/01/21 15:45:06" and makes it ISO 8601
+    memento_datetimes = np.array(memento_datetimes, dtype='U19')
+
+    try:
+        return np.char.replace(memento_datetimes, '/', '-').astype('datetime64[s]')
+    except ValueError as e:
+        raise SlicingException(
+            "Could not parse memento-datetimes: {}".format(e))
+
+def default_slice_count(memento_count):
+    """Returns the number of slices for `memento_count` mementos, which is
+    one per memento for up to 28 mementos and 28 plus the logarithm of
+    their number above that.
+    """
+
+    if memento_count > 28:
+        return math.floor( 28 + math.log10(memento_count) )
+    else:
+        return memento_count
+
+def slice_by_count(memento_datetimes, slice_count):
+    """Divides the mementos with the datetime64 array `memento_datetimes`
+    into `slice_count` slices holding the same number of mementos, give or
+    take one, in order of memento-datetime. Returns a list with an array of
+    the indices of the mementos in each slice.
+    """
+
+    order = np.argsort(memento_datetimes, kind='stable')
+
+    return np.array_split(order, slice_count)
+
+def slice_by_time(memento_datetimes, slice_count):
+    """Divides the mementos with the datetime64 array `memento_datetimes`
+    into `slice_count` slices covering equal spans of time, from the first
+    memento-datetime to the last, so that slices may hold any number of
+    mementos, including none. Returns a list with an array of the indices
+    of the mementos in each slice, in order of memento-datetime.
+    """
+
+    order = np.argsort(memento_datetimes, kind='stable')
+
+    if len(order) == 0:
+        return [ order for i in range(slice_count) ]
+
+    seconds = memento_datetimes[order].astype('datetime64[s]').astype(np.int64)
+
+    boundaries = np.linspace(seconds[0], seconds[-1], slice_count + 1)[1:-1]
+
+    # mementos at a boundary start the next slice
+    return np.split(order, np.searchsorted(seconds, boundaries, side='left'))
+
+supported_slicing_methods = {
+    "count": slice_by_count,
+    "time": slice_by_time
+}
+
+def slice_mementos(memento_datetimes, slice_count=None, method="count"):
+    """Divides the mementos with the datetime64 array `memento_datetimes`
+    into `slice_count` slices with the given `method`, one of
+    supported_slicing_methods. If `slice_count` is None, it is computed with
+    default_slice_count. Returns a list with an array of the indices of the
+    mementos in each slice.
+    """
+
+    memento_datetimes = np.asarray(memento_datetimes, dtype='datetime64[s]')
+
+    if slice_count is None:
+        slice_count = default_slice_count(len(memento_datetimes))
+
+    if slice_count == 0:
+        return []
+
+    try:
+        slicing_function = supported_slicing_methods[method]
+    except KeyError:
+        raise SlicingException(
+            "Slicing method {} is not supported".format(method))
+
+    logger.info("dividing {} mementos into {} slices by {}".format(
+        len(memento_datetimes), slice_count, method))
+
+    return slicing_function(memento_datetimes, slice_count)
@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.sqlitecollectionmodel
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains a CollectionModel that keeps its TimeMaps, headers,
+error information, and memento content in a single SQLite database
+instead of the metadata.csv files and the many small files used by
+CollectionModel.
+
+Nothing is read into memory when an existing database is opened, so
+opening a working directory takes the same time regardless of the size
+of the collection. All lookups go through the primary key indexes of the
+database.
+"""
+
+import os
+import json
+import hashlib
+import sqlite3
+import logging
+
+from .collectionmodel import CollectionModel, CollectionModelException, \
+    CollectionModelMementoErrorException, CollectionModelNoSuchMementoException, \
+    CollectionModelNoSuchTimeMapException, json_serial, \
+    convert_timemap_datetimes
+from .blobstore import supported_compression_types, default_compression
+from .timemap import convert_LinkTimeMap_to_dict, freeze, FrozenList
+
+logger = logging.getLogger(__name__)
+
+schema = [
+    """CREATE TABLE IF NOT EXISTS settings (
+        name TEXT PRIMARY KEY,
+        value TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS timemaps (
+        urit TEXT PRIMARY KEY,
+        headers TEXT,
+        timemap TEXT,
+        content TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS mementos (
+        urim TEXT PRIMARY KEY,
+        headers TEXT,
+        blob_digest TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS memento_errors (
+        urim TEXT PRIMARY KEY,
+        headers TEXT,
+        content BLOB,
+        errorinformation BLOB
+    )""",
+    """CREATE TABLE IF NOT EXISTS blobs (
+        digest TEXT PRIMARY KEY,
+        content BLOB,
+        noboilerplate BLOB,
+        length INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS boilerplate_failures (
+        digest TEXT PRIMARY KEY,
+        errorinformation TEXT
+    )"""
+]
+
+class SQLiteCollectionModel(CollectionModel):
+    """
+        A CollectionModel that stores all of its data in the SQLite database
+        `collection.sqlite` within `working_directory`.
+
+        Writes are grouped into transactions of `batch_size` statements. Data
+        that has not been committed is still visible to this object, and is
+        committed when `flush` is called or the object is destroyed.
+
+        If `read_only` is True, the database is opened read-only, see
+        CollectionModel.
+    """
+
+    def __init__(self, working_directory, compression=None, batch_size=1000,
+        read_only=False):
+
+        self.working_directory = working_directory
+        self.database_filename = "{}/collection.sqlite".format(working_directory)
+        self.batch_size = batch_size
+        self.uncommitted_writes = 0
+        self.read_only = read_only
+
+        if read_only:
+
+            if not os.path.exists(self.database_filename):
+                raise CollectionModelException("Cannot open {} read-only, it "
+                    "does not hold a collection".format(working_directory))
+
+            self.connection = sqlite3.connect("file:{}?mode=ro".format(
+                self.database_filename), uri=True)
+
+        else:
+
+            if not os.path.exists(working_directory):
+                os.makedirs(working_directory)
+
+            self.connection = sqlite3.connect(self.database_filename)
+
+            for statement in schema:
+                self.connection.execute(statement)
+
+            blob_columns = [ row[1] for row in
+                self.connection.execute("PRAGMA table_info(blobs)") ]
+
+            # databases created before content lengths were stored
+            if "length" not in blob_columns:
+                self.connection.execute("ALTER TABLE blobs ADD COLUMN length INTEGER")
+
+        row = self.connection.execute(
+            "SELECT value FROM settings WHERE name = 'compression'").fetchone()
+
+        if row is None:
+
+            if compression is None:
+                compression = default_compression()
+
+            if compression not in supported_compression_types:
+                raise CollectionModelException(
+                    "Unsupported compression type {}".format(compression))
+
+            self.connection.execute(
+                "INSERT INTO settings (name, value) VALUES ('compression', ?)",
+                (compression,))
+
+        else:
+            compression = row[0]
+
+        self.connection.commit()
+
+        self.compression = compression
+        self._compress = supported_compression_types[compression]["compress"]
+        self._decompress = supported_compression_types[compression]["decompress"]
+
+    def __del__(self):
+
+        self.close()
+
+    def close(self):
+        """Commits any outstanding writes and closes the database."""
+
+        if getattr(self, "connection", None) is not None:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
+
+    def flush(self):
+        """Commits any outstanding writes."""
+
+        self.connection.commit()
+        self.uncommitted_writes = 0
+
+    def _write(self, statement, parameters):
+
+        self._check_writable()
+
+        self.connection.execute(statement, parameters)
+        self.uncommitted_writes += 1
+
+        if self.uncommitted_writes >= self.batch_size:
+            self.flush()
+
+    def load_data_from_directory(self):
+        """Does nothing, all data is read from the database when requested."""
+
+        pass
+
+    def addTimeMap(self, urit, content, headers):
+        """Adds a TimeMap to the object, parsing it if it is in link-format
+        and then stores the TimeMap as JSON in the database.
+
+        If JSON is given as `content`, then it is just converted to a dict.
+        """
+
+        if type(content) == str:
+
+            try:
+                json_timemap = convert_timemap_datetimes(json.loads(content))
+            except json.JSONDecodeError:
+                json_timemap = convert_LinkTimeMap_to_dict(content, skipErrors=True)
+
+            self._write(
+                "INSERT INTO timemaps (urit, headers, timemap, content) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(urit) DO UPDATE SET "
+                "headers = excluded.headers, timemap = excluded.timemap, "
+                "content = excluded.content",
+                (urit, json.dumps(headers, default=json_serial),
+                    json.dumps(json_timemap, default=json_serial), content)
+            )
+
+        else:
+            raise CollectionModelException(
+                "Unsupported TimeMap Type, must be str in link format"
+                )
+
+    def getTimeMap(self, urit):
+        """
+            Returns the dict form of TimeMap at `urit` provided that it
+            was previously stored via `addTimeMap`, as a read-only
+            FrozenDict.
+        """
+
+        row = self.connection.execute(
+            "SELECT timemap FROM timemaps WHERE urit = ?", (urit,)).fetchone()
+
+        if row is None:
+            raise CollectionModelNoSuchTimeMapException(
+                "The URI-T [{}] is not saved in this collection model".format(urit))
+
+        return freeze(convert_timemap_datetimes(json.loads(row[0])))
+
+    def addMemento(self, urim, content, headers):
+        """Adds Memento `content` specified by `urim` to the object, along
+        with its headers.
+
+        Content shared by several URI-Ms is only stored once.
+        """
+
+        blob_digest = hashlib.sha3_256(content).hexdigest()
+
+        self._write(
+            "INSERT OR IGNORE INTO blobs (digest, content, length) VALUES (?, ?, ?)",
+            (blob_digest, self._compress(content), len(content))
+        )
+
+        self._write(
+            "INSERT INTO mementos (urim, headers, blob_digest) "
+            "VALUES (?, ?, ?) ON CONFLICT(urim) DO UPDATE SET "
+            "headers = excluded.headers, blob_digest = excluded.blob_digest",
+            (urim, json.dumps(headers, default=json_serial), blob_digest)
+        )
+
+    def addMementoError(self, urim, content, headers, errorinformation):
+        """Associates `errorinformation` with memento specified by `urim` to
+        the object, `content` and `headers` can also be stored from the given
+        input transaction. If there are no headers or content, use content=""
+        and headers={}.
+        """
+
+        self._write(
+            "INSERT INTO memento_errors "
+            "(urim, headers, content, errorinformation) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(urim) DO UPDATE SET headers = excluded.headers, "
+            "content = excluded.content, "
+            "errorinformation = excluded.errorinformation",
+            (urim, json.dumps(headers, default=json_serial), content,
+                errorinformation)
+        )
+
+    def _is_memento_error(self, urim):
+
+        return self.connection.execute(
+            "SELECT 1 FROM memento_errors WHERE urim = ?", (urim,)
+        ).fetchone() is not None
+
+    def _get_blob_digest(self, urim):
+
+        row = self.connection.execute(
+            "SELECT blob_digest FROM mementos WHERE urim = ?", (urim,)
+        ).fetchone()
+
+        if row is None:
+            err_msg = "The URI-M [{}] is not saved in this " \
+                "collection model".format(urim)
+
+            logger.error(err_msg)
+
+            raise CollectionModelNoSuchMementoException(err_msg)
+
+        return row[0]
+
+    def getMementoContent(self, urim):
+        """Returns the HTTP entity of memento at `urim` provided that it
+        was previously stored via `addMemento`.
+
+        If no data was stored via `addMemento` for `urim`, then
+        `CollectionModelNoSuchMementoException` is thrown.
+
+        If data was stored via `addMementoError` for `urim`, then
+        `CollectionModelMementoErrorException` is thrown.
+        """
+
+        if self._is_memento_error(urim):
+            raise CollectionModelMementoErrorException
+
+        blob_digest = self._get_blob_digest(urim)
+
+        row = self.connection.execute(
+            "SELECT content FROM blobs WHERE digest = ?", (blob_digest,)
+        ).fetchone()
+
+        return self._decompress(row[0])
+
+    def getMementoContentView(self, urim):
+        """Returns a read-only memoryview of the HTTP entity of memento at
+        `urim`. Content in the database is always read into memory.
+        """
+
+        return memoryview(self.getMementoContent(urim))
+
+    def getMementoContentLength(self, urim):
+        """Returns the length in bytes of the HTTP entity of memento at
+        `urim`, as stored in the database.
+        """
+
+        if self._is_memento_error(urim):
+            raise CollectionModelMementoErrorException
+
+        row = self.connection.execute(
+            "SELECT length FROM blobs WHERE digest = ?",
+            (self._get_blob_digest(urim),)
+        ).fetchone()
+
+        if row[0] is None:
+            return len(self.getMementoContent(urim))
+
+        return row[0]
+
+    def getMementoErrorInformation(self, urim):
+        """Returns the error information associated with `urim`, provided that
+        it was previously stored via `addMementoError`.
+
+        If no data was stored via `addMemento` for `urim`, then
+        `CollectionModelNoSuchMementoException` is thrown.
+        """
+
+        row = self.connection.execute(
+            "SELECT errorinformation FROM memento_errors WHERE urim = ?", (urim,)
+        ).fetchone()
+
+        if row is not None:
+            return row[0]
+
+        # raises CollectionModelNoSuchMementoException if not stored
+        self._get_blob_digest(urim)
+
+        return None
+
+    def _get_boilerplate_key(self, urim):
+
+        return self._get_blob_digest(urim)
+
+    def _get_boilerplate_result(self, key):
+
+        row = self.connection.execute(
+            "SELECT noboilerplate FROM blobs WHERE digest = ?", (key,)
+        ).fetchone()
+
+        if row is not None and row[0] is not None:
+            return bytes(row[0]), None
+
+        row = self.connection.execute(
+            "SELECT errorinformation FROM boilerplate_failures WHERE digest = ?",
+            (key,)
+        ).fetchone()
+
+        if row is not None:
+            return None, row[0]
+
+        return None, None
+
+    def _save_boilerplate_result(self, key, content, errorinformation):
+
+        if errorinformation is None:
+            self._write(
+                "UPDATE blobs SET noboilerplate = ? WHERE digest = ?",
+                (content, key)
+            )
+
+        else:
+            self._write(
+                "INSERT OR REPLACE INTO boilerplate_failures "
+                "(digest, errorinformation) VALUES (?, ?)",
+                (key, errorinformation)
+            )
+
+    def prepareMementoContentWithoutBoilerplate(self, processes=None,
+        batch_size=None):
+        """Removes the boilerplate from every memento stored in this object
+        as CollectionModel does, committing the results once done.
+        """
+
+        failures = super().prepareMementoContentWithoutBoilerplate(
+            processes=processes, batch_size=batch_size)
+
+        self.flush()
+
+        return failures
+
+    def getHeaders(self, objecttype, uri):
+        """Returns the headers associated with URI `uri`.
+        `objecttype` must be set to timemaps if headers
+        for a TimeMap are desired.
+        """
+
+        if objecttype == "timemaps":
+            statement = "SELECT headers FROM timemaps WHERE urit = ?"
+        else:
+            statement = "SELECT headers FROM mementos WHERE urim = ?"
+
+        row = self.connection.execute(statement, (uri,)).fetchone()
+
+        if row is None:
+            raise CollectionModelException(
+                "The URI [{}] headers are not saved "
+                "in this collection model".format(
+                    uri))
+
+        return json.loads(row[0])
+
+    def getMementoHeaders(self, urim):
+        """Returns the headers associated with memento at `urim`.
+        """
+
+        if self._is_memento_error(urim):
+            raise CollectionModelMementoErrorException
+
+        return self.getHeaders("mementos", urim)
+
+    def getMementoURIList(self):
+        """Returns a read-only list of all URI-Ms stored in this object."""
+
+        return FrozenList( row[0] for row in self.connection.execute(
+            "SELECT urim FROM mementos ORDER BY rowid") )
+
+    def getTimeMapURIList(self):
+        """Returns a read-only list of all URI-Ts stored in this object."""
+
+        return FrozenList( row[0] for row in self.connection.execute(
+            "SELECT urit FROM timemaps ORDER BY rowid") )
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.textpipeline
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module turns memento text into the stemmed, stopword-free tokens used
+by the measures. A TextPipeline is built once per run and shared by all
+measures, so that the stopword set is only built once and each distinct
+word is only stemmed once.
+"""
+
+import re
+import string
+import logging
+
+from nltk import word_tokenize
+from nltk.corpus import stopwords
+from nltk.stem.porter import PorterStemmer
+
+logger = logging.getLogger(__name__)
+
+regex_token_pattern = re.compile(r"\w+|[^\w\s]")
+
+def regex_tokenize(text):
+    """Splits `text` into runs of word characters and single punctuation
+    characters. This is several times faster than the NLTK tokenizer, but
+    does not split contractions or recognize abbreviations like it does.
+    """
+
+    return regex_token_pattern.findall(text)
+
+supported_tokenizers = {
+    "nltk": word_tokenize,
+    "regex": regex_tokenize
+}
+
+tokenizer_default = "nltk"
+
+class TextPipeline:
+    """
+        Tokenizes text with the tokenizer named `tokenizer` from
+        supported_tokenizers, stems the tokens with the Porter Stemmer, and
+        removes stopwords and punctuation.
+
+        The stem of each distinct token is cached, the cache is cleared once
+        it holds `stem_cache_size` tokens.
+
+        It currently only supports English stopwords.
+    """
+
+    def __init__(self, tokenizer=tokenizer_default, stem_cache_size=1000000):
+
+        if tokenizer not in supported_tokenizers:
+            raise ValueError("Unsupported tokenizer {}, supported tokenizers "
+                "are {}".format(tokenizer, list(supported_tokenizers.keys())))
+
+        self.tokenizer = tokenizer
+        self._tokenize = supported_tokenizers[tokenizer]
+
+        self.stopset = frozenset(
+            stopwords.words("english") + list(string.punctuation))
+
+        self.stemmer = PorterStemmer()
+        self.stem_cache = {}
+        self.stem_cache_size = stem_cache_size
+
+    def tokenize(self, text):
+        """Splits `text`, which may be bytes in UTF-8, into tokens."""
+
+        if type(text) == bytes:
+            text = text.decode("utf8")
+
+        return self._tokenize(text)
+
+    def stem(self, token):
+        """Returns the stem of `token`."""
+
+        try:
+            return self.stem_cache[token]
+
+        except KeyError:
+
+            if len(self.stem_cache) >= self.stem_cache_size:
+                self.stem_cache.clear()
+
+            stem = self.stemmer.stem(token)
+            self.stem_cache[token] = stem
+
+            return stem
+
+    def process(self, text, stemming=True):
+        """Returns the tokens of `text`, stemmed unless `stemming` is False,
+        with stopwords and punctuation removed.
+        """
+
+        tokens = self.tokenize(text)
+        stopset = self.stopset
+
+        if stemming:
+
+            stem_cache = self.stem_cache
+            stems = []
+
+            for token in tokens:
+                try:
+                    stems.append(stem_cache[token])
+                except KeyError:
+                    stems.append(self.stem(token))
+
+            tokens = stems
+
+        return [ token for token in tokens if token not in stopset ]
+
+    def process_many(self, texts, stemming=True):
+        """Returns a list with the result of `process` for each of the
+        `texts`.
+        """
+
+        return [ self.process(text, stemming=stemming) for text in texts ]
+
+text_pipeline = None
+
+def get_text_pipeline():
+    """Returns the TextPipeline shared by all measures, creating it with
+    the default tokenizer on first use.
+    """
+
+    global text_pipeline
+
+    if text_pipeline is None:
+        text_pipeline = TextPipeline()
+
+    return text_pipeline
+
+def set_text_pipeline(pipeline):
+    """Replaces the TextPipeline shared by all measures with `pipeline`."""
+
+    global text_pipeline
+
+    logger.info("measures will tokenize with the {} tokenizer".format(
+        pipeline.tokenizer))
+
+    text_pipeline = pipeline
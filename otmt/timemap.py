@@ -12,6 +12,66 @@ from copy import deepcopy
 
 from datetime import datetime
 
+def _readonly(self, *args, **kwargs):
+    raise TypeError("{} objects are read-only".format(type(self).__name__))
+
+class FrozenDict(dict):
+    """
+        A dict that cannot be changed after it is created. It compares equal
+        to a dict with the same items, so it can be handed to code expecting
+        a dict without copying it first.
+    """
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+class FrozenList(list):
+    """
+        A list that cannot be changed after it is created. It compares equal
+        to a list with the same items, so it can be handed to code expecting
+        a list without copying it first.
+    """
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = remove = pop = clear = sort = reverse = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+def freeze(data):
+    """
+        Returns a read-only version of `data`, converting every dict and list
+        within it to a FrozenDict or FrozenList. Other objects, such as the
+        strings and datetimes within TimeMaps, are already immutable and
+        are returned as is.
+    """
+
+    if isinstance(data, (FrozenDict, FrozenList)):
+        return data
+
+    if isinstance(data, dict):
+        return FrozenDict( (key, freeze(value)) for key, value in data.items() )
+
+    if isinstance(data, list):
+        return FrozenList( freeze(item) for item in data )
+
+    return data
+
 class MalformedLinkFormatTimeMap(Exception):
     """
         This class exists to indicate errors while processing TimeMaps in
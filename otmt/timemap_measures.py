@@ -7,78 +7,179 @@ otmt.timemap_measures
 This module executes the different timemap measures available.
 """
 
+import os
+import math
 import distance
-import string
 import logging
+import itertools
+import multiprocessing
 
-from nltk import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem.porter import PorterStemmer
+from multiprocessing import shared_memory, resource_tracker
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+import scipy.sparse
 
-from simhash import Simhash
-
-from gensim import corpora, models, similarities
+from gensim import matutils, models, utils
 
 from .collectionmodel import CollectionModelMementoErrorException, \
     CollectionModelBoilerPlateRemovalFailureException, \
     CollectionModelNoSuchMementoException
+from .measuremodel import MeasureModel
+from .textpipeline import TextPipeline, get_text_pipeline, set_text_pipeline
+from .tokencache import token_id_dtype, variant_name
+from .simhashes import simhash_bytes, simhash_token_ids, \
+    simhash_distance
 
 logger = logging.getLogger(__name__)
 
-stemmer = PorterStemmer()
-
 def stem_tokens(tokens):
     """Takes a list of `tokens` and feeds it through the Porter Stemmer, 
     producing a new list of stemmed tokens.
     """
 
-    stemmed = []
+    pipeline = get_text_pipeline()
 
-    for item in tokens:
-        stemmed.append( stemmer.stem(item) )
-
-    return stemmed
+    return [ pipeline.stem(item) for item in tokens ]
 
 def full_tokenize(text, stemming=True):
     """Takes in `text` and produces a list of stemmed tokens with stopwords 
     removed. Stemming can be stopped by setting stemming to False.
 
+    The work is done by the TextPipeline shared by all measures, see
+    otmt.textpipeline.
+
     It currently only supports English stopwords.
     """
 
-    stopset = stopwords.words("english") + list(string.punctuation)
+    return get_text_pipeline().process(text, stemming=stemming)
 
-    if type(text) == bytes:
-        tokens = word_tokenize(text.decode("utf8"))
-    else:
-        tokens = word_tokenize(text)
+def get_memento_token_ids(urim, collection_model, stemming=True,
+    remove_boilerplate=True):
+    """Returns the tokens of the memento identified by `urim` as an array of
+    IDs into the vocabulary of the token cache of `collection_model`.
+
+    The memento is only tokenized the first time its tokens are requested
+    with the given `stemming` and `remove_boilerplate` settings, after
+    which its tokens are read from the token cache.
+    """
+
+    tokencache = collection_model.getTokenCache()
+    pipeline = get_text_pipeline()
+
+    token_ids = tokencache.get(urim, stemming=stemming,
+        remove_boilerplate=remove_boilerplate, tokenizer=pipeline.tokenizer)
+
+    if token_ids is None:
+
+        if remove_boilerplate:
+            data = collection_model.getMementoContentWithoutBoilerplate(urim)
+        else:
+            data = collection_model.getMementoContent(urim)
+
+        token_ids = tokencache.put(urim, pipeline.process(data, stemming=stemming),
+            stemming=stemming, remove_boilerplate=remove_boilerplate,
+            tokenizer=pipeline.tokenizer)
+
+    return token_ids
+
+def _simhash_variant(tokenize, stemming, remove_boilerplate):
+    """Returns the name under which fingerprints computed with the given
+    settings are stored in the Simhash cache.
+    """
+
+    # fingerprints stored under the plain variant name were computed from
+    # token IDs, which depend on the order mementos were tokenized in
+    if tokenize:
+        return "{}_tokenhashes".format(variant_name(stemming,
+            remove_boilerplate, get_text_pipeline().tokenizer))
+
+    if remove_boilerplate:
+        return "noboilerplate"
+
+    return "raw"
+
+def get_memento_simhash(urim, collection_model, tokenize=False, stemming=False,
+    remove_boilerplate=False):
+    """Returns the Simhash fingerprint of the memento identified by `urim`,
+    computed from its token IDs if `tokenize` is True and from its bytes
+    otherwise, with the given `stemming` and `remove_boilerplate` settings.
+
+    The fingerprint is only computed the first time it is requested, after
+    which it is read from the Simhash cache of `collection_model`.
+    """
+
+    variant = _simhash_variant(tokenize, stemming, remove_boilerplate)
+
+    simhashcache = collection_model.getSimhashCache()
+
+    fingerprint = simhashcache.get(urim, variant)
+
+    if fingerprint is None:
+
+        if tokenize:
+            fingerprint = simhash_token_ids(get_memento_token_ids(urim,
+                collection_model, stemming=stemming,
+                remove_boilerplate=remove_boilerplate),
+                collection_model.getTokenCache())
+
+        elif remove_boilerplate:
+            fingerprint = simhash_bytes(
+                collection_model.getMementoContentWithoutBoilerplate(urim))
+
+        else:
+            fingerprint = simhash_bytes(
+                collection_model.getMementoContentView(urim))
 
-    if stemming:
-        stems = stem_tokens(tokens)
+        simhashcache.put(urim, variant, fingerprint)
 
-    return [ i for i in stems if i not in stopset ]
+    return fingerprint
 
 def get_memento_data_for_measure(urim, collection_model,
-    tokenize=True, stemming=True, remove_boilerplate=True):
+    tokenize=True, stemming=True, remove_boilerplate=True, token_ids=False,
+    simhash=False, content_length=False):
     """For a give memento identified by a `urim`, this function extracts the 
     content of that URI-M from the given `collection_model` object. It then
     applies tokenizing, stemming, or removing of boilerplate depending 
     on the settings of the `tokenize`, `stemming`, or
     `remove_boilerplate` variables.
+
+    Tokens come from the token cache of `collection_model`, see
+    get_memento_token_ids. If `token_ids` is True, they are returned as the
+    array of their IDs in the token cache instead.
+
+    If `simhash` is True, the Simhash fingerprint of the content is
+    returned instead, see get_memento_simhash.
+
+    If `content_length` is True, the length of the raw content recorded by
+    `collection_model` is returned instead, so that the content is not
+    read, let alone decompressed.
     """
 
     data = None
 
+    if content_length:
+        return collection_model.getMementoContentLength(urim)
+
+    if simhash:
+        return get_memento_simhash(urim, collection_model, tokenize=tokenize,
+            stemming=stemming, remove_boilerplate=remove_boilerplate)
+
+    if tokenize and token_ids:
+        return get_memento_token_ids(urim, collection_model, stemming=stemming,
+            remove_boilerplate=remove_boilerplate)
+
+    if tokenize:
+        return collection_model.getTokenCache().get_tokens(
+            get_memento_token_ids(urim, collection_model, stemming=stemming,
+                remove_boilerplate=remove_boilerplate)
+        )
+
     if remove_boilerplate:
         data = collection_model.getMementoContentWithoutBoilerplate(urim)
     else:
-        data = collection_model.getMementoContent(urim)
-
-    if tokenize:
-        data = full_tokenize(data, stemming=stemming)
+        # raw content is never changed, so it is only copied out of the
+        # collection model if it has to be decompressed
+        data = collection_model.getMementoContentView(urim)
 
     return data
 
@@ -229,18 +330,11 @@ def compute_score_across_TimeMap(collectionmodel, measuremodel,
 
 
 def simhash_scoredistance(first_data, memento_data):
-    """Calculate the distance between Simhashes given the content in
-    `first_data` and `memento_data`.
+    """Calculate the distance between the Simhash fingerprints
+    `first_data` and `memento_data`, see get_memento_simhash.
     """
 
-    if type(first_data) == type(memento_data):
-        if type(first_data) == bytes:
-            first_data = str(first_data)
-            memento_data = str(memento_data)
-
-    score = Simhash(first_data).distance(Simhash(memento_data))
-
-    return score
+    return simhash_distance(first_data, memento_data)
 
 def compute_rawsimhash_across_TimeMap(collectionmodel, measuremodel, 
     tokenize=False, stemming=False):
@@ -248,28 +342,21 @@ def compute_rawsimhash_across_TimeMap(collectionmodel, measuremodel,
     the raw memento text content of all mementos in a TimeMap.
     """
 
-    measuremodel = compute_score_across_TimeMap(collectionmodel, measuremodel, "raw_simhash", 
-        simhash_scoredistance, tokenize=False, stemming=False,
-        remove_boilerplate=False
-    )
-
-    return measuremodel
+    return compute_timemap_measures(collectionmodel, measuremodel,
+        ["raw_simhash"])
 
 def compute_tfsimhash_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True):
     """Contains the appropriate arguments to run the Simhash algorithm against
     the term frequencies of the tokenized content of all mementos in a TimeMap.
     """
 
-    measuremodel = compute_score_across_TimeMap(collectionmodel, measuremodel, "tf_simhash", 
-        simhash_scoredistance, tokenize=True, stemming=True,
-        remove_boilerplate=True
-    )
-
-    return measuremodel
+    return compute_timemap_measures(collectionmodel, measuremodel,
+        ["tf_simhash"])
 
 def bytecount_scoredistance(first_data, memento_data):
     """Calculate the distance between byte counts given the content in
-    `first_data` and `memento_data`.
+    `first_data` and `memento_data`, or given their lengths, as with the
+    "content length" representation.
     """
 
     score = None
@@ -281,8 +368,12 @@ def bytecount_scoredistance(first_data, memento_data):
             first_data = ''.join(first_data)
             memento_data = ''.join(memento_data)
 
-    first_bytecount = len(first_data)
-    memento_bytecount = len(memento_data)
+    if type(first_data) == int:
+        first_bytecount = first_data
+        memento_bytecount = memento_data
+    else:
+        first_bytecount = len(first_data)
+        memento_bytecount = len(memento_data)
 
     if memento_bytecount == 0:
 
@@ -306,12 +397,8 @@ def compute_bytecount_across_TimeMap(collectionmodel, measuremodel, tokenize=Fal
     so that a factory pattern can be used.
     """
 
-    measuremodel = compute_score_across_TimeMap(collectionmodel, measuremodel, "bytecount", 
-        bytecount_scoredistance, tokenize=False, stemming=False,
-        remove_boilerplate=False
-    )
-
-    return measuremodel
+    return compute_timemap_measures(collectionmodel, measuremodel,
+        ["bytecount"])
 
 def wordcount_scoredistance(first_data, memento_data):
     """Calculates the distance between word counts given the content in
@@ -383,6 +470,71 @@ def jaccard_scoredistance(first_data, memento_data):
 
     return score
 
+def _token_count_matrix(documents):
+    """Returns a sparse CSR matrix with a row per document in `documents`,
+    given as arrays of token IDs, holding the number of times each token
+    occurs in it. The columns are the distinct token IDs of `documents` in
+    ascending order, so the matrix is only as wide as the vocabulary of
+    these documents rather than that of the whole token cache.
+
+    Raises ValueError if the documents contain no tokens.
+    """
+
+    lengths = np.fromiter( map(len, documents), dtype=np.int64,
+        count=len(documents) )
+
+    rows = np.repeat(np.arange(len(documents)), lengths)
+    token_ids, columns = np.unique(np.concatenate(documents),
+        return_inverse=True)
+
+    if len(token_ids) == 0:
+        raise ValueError("the documents contain no tokens")
+
+    # converting to CSR adds up repeated tokens
+    return scipy.sparse.coo_matrix(
+        (np.ones(len(columns), dtype=np.int32), (rows, columns.ravel())),
+        shape=(len(documents), len(token_ids)) ).tocsr()
+
+def _first_document_overlaps(documents):
+    """Returns two arrays holding, for each of `documents`, given as arrays
+    of token IDs, the number of distinct tokens it shares with the first
+    document and the number of distinct tokens in it.
+
+    Both are computed for all documents at once from a sparse binary
+    term-incidence matrix with a row per document, rather than by building
+    sets of the tokens of the first document for each comparison.
+    """
+
+    # repeated tokens are counted once
+    incidence = _token_count_matrix(documents)
+    incidence.data[:] = 1
+
+    first_row = incidence[0].toarray().ravel()
+
+    intersections = incidence @ first_row
+    sizes = np.diff(incidence.indptr)
+
+    return intersections, sizes
+
+def _set_distances(numerators, denominators):
+
+    # two empty documents are the same, see compute_scores_on_distance_measure
+    ratios = np.ones(len(numerators))
+    np.divide(numerators, denominators, out=ratios, where=denominators > 0)
+
+    return (1 - ratios).tolist()
+
+def jaccard_documents_scoredistance(documents):
+    """Calculates the Jaccard Distance of every document in `documents`,
+    given as arrays of token IDs, to the first document, returning one score
+    per document. The scores are identical to those of
+    jaccard_scoredistance for the same tokens.
+    """
+
+    intersections, sizes = _first_document_overlaps(documents)
+
+    return _set_distances(intersections, sizes + sizes[0] - intersections)
+
 def compute_jaccard_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True):
     """Contains the appropriate arguments to run the Jaccard Distance 
     algorithm against the raw memento text content of all mementos in a 
@@ -408,6 +560,17 @@ def sorensen_scoredistance(first_data, memento_data):
 
     return scoredata
 
+def sorensen_documents_scoredistance(documents):
+    """Calculates the Sørensen-Dice Distance of every document in
+    `documents`, given as arrays of token IDs, to the first document,
+    returning one score per document. The scores are identical to those of
+    sorensen_scoredistance for the same tokens.
+    """
+
+    intersections, sizes = _first_document_overlaps(documents)
+
+    return _set_distances(2 * intersections, sizes + sizes[0])
+
 def compute_sorensen_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True):
     """Contains the appropriate arguments to run the Sørensen-Dice Distance
     algorithm against the raw memento text content of all mementos in a 
@@ -421,15 +584,139 @@ def compute_sorensen_across_TimeMap(collectionmodel, measuremodel, tokenize=True
 
     return scores
 
+def _levenshtein_match_masks(tokens):
+    """Returns a dict mapping each token in `tokens` to an integer whose
+    bit i is set if token i of `tokens` is that token.
+    """
+
+    masks = {}
+
+    for position, token in enumerate(tokens):
+        masks[token] = masks.get(token, 0) | (1 << position)
+
+    return masks
+
+def levenshtein_token_distance(first_data, memento_data, max_distance=None):
+    """Returns the Levenshtein Distance between the sequences of tokens
+    `first_data` and `memento_data`, which may be lists of tokens or arrays
+    of token IDs.
+
+    The distance is computed with the bit-parallel algorithm of Myers, as
+    formulated by Hyyrö, using Python integers as bit vectors as long as
+    the shorter sequence, so that each token of the longer sequence is
+    processed with a few integer operations instead of a loop over the
+    whole shorter sequence.
+
+    If `max_distance` is set, the computation stops as soon as the distance
+    is known to be greater than `max_distance`, and a lower bound of the
+    distance that is greater than `max_distance` is returned instead.
+    """
+
+    if isinstance(first_data, np.ndarray):
+        first_data = first_data.tolist()
+
+    if isinstance(memento_data, np.ndarray):
+        memento_data = memento_data.tolist()
+
+    if len(first_data) > len(memento_data):
+        pattern, text = memento_data, first_data
+    else:
+        pattern, text = first_data, memento_data
+
+    m = len(pattern)
+    n = len(text)
+
+    if max_distance is not None and n - m > max_distance:
+        return n - m
+
+    if m == 0:
+        return n
+
+    masks = _levenshtein_match_masks(pattern)
+
+    all_bits = (1 << m) - 1
+    last_bit = 1 << (m - 1)
+
+    # vertical deltas of the current column, all +1 in the first column
+    positive_vertical = all_bits
+    negative_vertical = 0
+
+    distance = m
+
+    for column, token in enumerate(text, start=1):
+
+        equal = masks.get(token, 0)
+
+        x_vertical = equal | negative_vertical
+        x_horizontal = (((equal & positive_vertical) + positive_vertical)
+            ^ positive_vertical) | equal
+
+        positive_horizontal = negative_vertical | \
+            (~(x_horizontal | positive_vertical) & all_bits)
+        negative_horizontal = positive_vertical & x_horizontal
+
+        if positive_horizontal & last_bit:
+            distance += 1
+        elif negative_horizontal & last_bit:
+            distance -= 1
+
+        # the distance decreases by at most one per remaining column
+        if max_distance is not None and distance - (n - column) > max_distance:
+            return distance - (n - column)
+
+        positive_horizontal = (positive_horizontal << 1) | 1
+        negative_horizontal = negative_horizontal << 1
+
+        positive_vertical = (negative_horizontal |
+            ~(x_vertical | positive_horizontal)) & all_bits
+        negative_vertical = positive_horizontal & x_vertical
+
+    return distance
+
+def levenshtein_scoredistances(first_data, memento_data, thresholds=None):
+    """Calculates both the Levenshtein Distance and the Normalized
+    Levenshtein Distance given the content in `first_data` and
+    `memento_data` from a single computation of the edit distance,
+    returning a dict mapping the name of each measure to its score.
+
+    If `thresholds` maps the name of either measure to its threshold, the
+    computation stops once the memento is known to be off-topic by the
+    measures in `thresholds`, the scores are then lower bounds that still
+    exceed the thresholds.
+    """
+
+    length = max(len(first_data), len(memento_data))
+
+    max_distance = None
+
+    if thresholds:
+
+        cutoffs = []
+
+        if "levenshtein" in thresholds:
+            cutoffs.append(math.floor(thresholds["levenshtein"]))
+
+        if "nlevenshtein" in thresholds:
+            cutoffs.append(math.floor(thresholds["nlevenshtein"] * length))
+
+        if cutoffs:
+            max_distance = max(cutoffs)
+
+    score = levenshtein_token_distance(first_data, memento_data,
+        max_distance=max_distance)
+
+    return {
+        "levenshtein": score,
+        # same normalization as distance.nlevenshtein
+        "nlevenshtein": score / float(length) if length > 0 else 0
+    }
+
 def levenshtein_scoredistance(first_data, memento_data):
     """Calculates the Levenshtein Distance given the content in
     `first_data` and `memento_data`.
     """
 
-    score = compute_scores_on_distance_measure(
-        first_data, memento_data, distance.levenshtein)
-
-    return score
+    return levenshtein_token_distance(first_data, memento_data)
 
 def compute_levenshtein_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True):
     """Contains the appropriate arguments to run the Levenshtein Distance
@@ -449,10 +736,8 @@ def nlevenshtein_scoredistance(first_data, memento_data):
     `first_data` and `memento_data`.
     """
 
-    score = compute_scores_on_distance_measure(
-        first_data, memento_data, distance.nlevenshtein)
-
-    return score
+    return levenshtein_scoredistances(
+        first_data, memento_data)["nlevenshtein"]
 
 def compute_nlevenshtein_across_TimeMap(collectionmodel, measuremodel, tokenize=True, stemming=True):
     """Contains the appropriate arguments to run the Normalized Levenshtein 
@@ -540,351 +825,1307 @@ def compute_tfintersection_across_TimeMap(collectionmodel, measuremodel, tokeniz
 
     return scores
 
-def compute_cosine_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=None):
-    """Contains the appropriate arguments to run the cosine similarity 
-    algorithm against the raw memento text content of all mementos 
-    in a TimeMap.
-
-    Note: The `tokenize` and `stemming` arguments have no affect and are purely
-    included to support the same signature as the other "compute_" functions
-    so that a factory pattern can be used.
+cosine_batch_size_default = 1000000
 
-    Note: This function is very close to compute_score_across_TimeMap and that
-    function may be altered to support this measure in the future.
+def _document_batches(documents, batch_size):
+    """Yields the (start, end) ranges of consecutive `documents` holding
+    about `batch_size` tokens, or a single document if it holds more.
     """
 
-    measurename = "cosine"
+    start = 0
+    tokens = 0
 
-    tokenize = True
-    remove_boilerplate = True
-    stemming = True
+    for end, document in enumerate(documents, start=1):
 
-    logger.info("Computing cosine score across TimeMap, beginning TimeMap iteration...")
+        tokens += len(document)
 
-    urits = collectionmodel.getTimeMapURIList()
-    urittotal = len(urits)
-    uritcounter = 1
+        if tokens >= batch_size:
+            yield start, end
+            start = end
+            tokens = 0
 
-    for urit in urits:
+    if start < len(documents):
+        yield start, len(documents)
 
-        logger.info("Processing TimeMap {} of {}".format(uritcounter, urittotal))
-        logger.debug("Processing mementos from TimeMap at {}".format(urit))
+def _batch_count_matrix(documents, width):
+    """Returns a sparse CSR matrix of `width` columns with a row per
+    document in `documents`, given as arrays of token IDs, holding the
+    number of times each token ID occurs in it.
+    """
 
-        timemap = collectionmodel.getTimeMap(urit)
+    lengths = np.fromiter( map(len, documents), dtype=np.int64,
+        count=len(documents) )
+
+    rows = np.repeat(np.arange(len(documents)), lengths)
+    columns = np.concatenate(documents).astype(np.int64)
+
+    # converting to CSR adds up repeated tokens
+    return scipy.sparse.coo_matrix(
+        (np.ones(len(columns), dtype=np.float64), (rows, columns)),
+        shape=(len(documents), width) ).tocsr()
+
+def cosine_documents_scoredistance(documents, batch_size=cosine_batch_size_default):
+    """Calculates the cosine similarity of the TF-IDF vectors of every
+    document in `documents` to the first document, returning one score per
+    document.
+
+    The documents are given as arrays of token IDs from the token cache,
+    which are already stemmed and free of stop words. Their term counts
+    are turned into sparse matrices directly, instead of building a new
+    vocabulary for every TimeMap, and weighted with the same TF-IDF
+    settings as TfidfVectorizer, using the document frequencies of this
+    TimeMap. Raises ValueError if the documents contain no terms.
+
+    The documents are processed in batches of about `batch_size` tokens,
+    once to count document frequencies and once to score them against the
+    first document, so that the memory used does not grow with the number
+    of documents. Only the document frequencies, one per token ID, are
+    kept for the whole TimeMap. `documents` may be any sequence, such as a
+    _MementoDocuments reading each document from the token cache when it
+    is indexed, so that only the documents of the batch being processed
+    are held at once.
+    """
 
-        try:
-            memento_list = timemap["mementos"]["list"]
-        except KeyError as e:
-            logger.exception("Failed to process TimeMap at {}".format(urit))
-            continue
+    batches = list(_document_batches(documents, batch_size))
 
-        # some TimeMaps have no mementos
-        # e.g., http://wayback.archive-it.org/3936/timemap/link/http://www.peacecorps.gov/shutdown/?from=hpb
-        if len(memento_list) > 0:
+    document_frequencies = np.zeros(0, dtype=np.int64)
+    matrix = None
 
-            first_urim = timemap["mementos"]["first"]["uri"]
+    for start, end in batches:
 
-            logger.debug("Accessing content of first URI-M {} for calculations".format(first_urim))
+        batch = documents[start:end]
 
-            try:
-                first_data = collectionmodel.getMementoContentWithoutBoilerplate(first_urim)
+        width = max( (int(document.max()) + 1 for document in batch
+            if len(document) > 0), default=0 )
 
-            except (CollectionModelBoilerPlateRemovalFailureException, CollectionModelMementoErrorException, CollectionModelNoSuchMementoException) as e:
-                errormsg = "Boilerplate removal error with first memento in TimeMap, " \
-                    "cannot effectively compare memento content"
+        matrix = _batch_count_matrix(batch, width)
 
-                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
-                    measuremodel, measurename, errormsg)
-                continue
+        # each token counts once per document, as CSR rows hold each
+        # column once
+        batch_frequencies = np.bincount(matrix.indices, minlength=width)
 
-            if len(first_data) == 0:
+        if width > len(document_frequencies):
+            document_frequencies = np.pad(document_frequencies,
+                (0, width - len(document_frequencies)))
 
-                errormsg = "After processing content, the first memento in TimeMap is now empty, cannot effectively compare memento content"
-                logger.warning(errormsg)
+        document_frequencies[:width] += batch_frequencies
 
-                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
-                    measuremodel, measurename, errormsg)
+    if not document_frequencies.any():
+        raise ValueError("the documents contain no terms")
 
-                # move on to the next URI-T
-                uritcounter += 1
-                continue
+    width = len(document_frequencies)
 
-            mementototal = len(memento_list)
-            logger.info("There are {} mementos in this TimeMap".format(mementototal))
+    # the smoothed IDF of TfidfTransformer
+    idf = np.log((1 + len(documents)) / (1 + document_frequencies)) + 1
 
-            mementocounter = 1
+    first_vector = np.bincount(documents[0].astype(np.int64),
+        minlength=width) * idf
+    first_norm = np.linalg.norm(first_vector)
 
-            processed_urims = []
-            error_urims = []
-            documents = []
+    scores = []
 
-            # in case the mementos are not sorted in order of memento datetime
-            # we save the first one for comparison
-            processed_urims.append(first_urim)
-            documents.append(first_data)
+    for start, end in batches:
 
-            for memento in memento_list:
+        # a single batch is still held from counting document frequencies
+        if len(batches) > 1:
+            matrix = _batch_count_matrix(documents[start:end], width)
 
-                logger.debug("Processing Memento {} of {}".format(mementocounter, mementototal))
+        matrix.data *= idf[matrix.indices]
 
-                urim = memento["uri"]
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        dot_products = matrix @ first_vector
 
-                logger.debug("Accessing content of URI-M {} for calculations".format(urim))
+        # documents without terms are not similar to any document, as with
+        # sklearn's cosine_similarity
+        batch_scores = np.zeros(end - start)
+        np.divide(dot_products, norms * first_norm, out=batch_scores,
+            where=norms * first_norm > 0)
 
-                try:
+        scores.append(batch_scores)
 
-                    # in case the mementos are not sorted in order of memento datetime
-                    # we ignore the first one for comparison because we already saved it
-                    if urim != first_urim:
-                        try:
-                            memento_data = collectionmodel.getMementoContentWithoutBoilerplate(urim)
-                                
-                            processed_urims.append(urim)
-                            documents.append(memento_data)
-
-                        except (CollectionModelBoilerPlateRemovalFailureException, 
-                            CollectionModelMementoErrorException, UnicodeDecodeError) as e:
-                            errormsg = "Boilerplate could not be removed from " \
-                                "memento at URI-M {}; details: {}".format(urim, repr(e))
-                            logger.warning(errormsg)
-
-                            measuremodel.set_Memento_measurement_error(
-                                urit, urim, "timemap measures", measurename, repr(e)
-                            )
-
-                except (CollectionModelMementoErrorException,  CollectionModelNoSuchMementoException):
-                    errormsg = "Errors were recorded while attempting to " \
-                        "access URI-M {}, skipping {} calcualtions for this " \
-                        "URI-M".format(urim, measurename)
-                    logger.warning(errormsg)
+    return np.concatenate(scores)
 
-                    try:
-                        errorinfo = collectionmodel.getMementoErrorInformation(urim)
+def compute_cosine_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=None):
+    """Contains the appropriate arguments to run the cosine similarity 
+    algorithm against the raw memento text content of all mementos 
+    in a TimeMap.
+
+    Note: The `tokenize` and `stemming` arguments have no affect and are purely
+    included to support the same signature as the other "compute_" functions
+    so that a factory pattern can be used.
+    """
 
-                    except CollectionModelNoSuchMementoException as e:
-                        errorinfo = str(e)
+    return compute_timemap_measures(collectionmodel, measuremodel,
+        ["cosine"])
 
-                    measuremodel.set_Memento_access_error(
-                        urit, urim, errorinfo
-                    )
-                    error_urims.append(urim)
-                
-                mementocounter += 1
+def _token_id_corpus(documents, num_terms=None):
+    """Returns the bag-of-words of each of `documents`, given as arrays of
+    token IDs, as a list of (token ID, count) tuples. Token IDs of at least
+    `num_terms` are left out, like words missing from a gensim Dictionary.
+    """
 
-            try:
-                # our full_tokenize function handles stop words
-                tfidf_vectorizer = TfidfVectorizer(tokenizer=full_tokenize, stop_words=None)
-                tfidf_matrix = tfidf_vectorizer.fit_transform(documents)
-            except ValueError as e:
-                errormsg = "Errors were recorded while attempting to generate " \
-                    "TF-IDF information for the TimeMap {}".format(urit)
-                logger.exception(errormsg)
+    corpus = []
 
-                for memento in memento_list:
-                    urim = memento["uri"]
+    for document in documents:
 
-                    measuremodel.set_Memento_measurement_error(
-                        urit, urim, "timemap measures", measurename, repr(e)
-                    )
+        term_ids, counts = np.unique(document, return_counts=True)
 
-            else:
+        if num_terms is not None:
+            known = term_ids < num_terms
+            term_ids, counts = term_ids[known], counts[known]
 
-                cscores = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix)
+        corpus.append(list(zip(term_ids.tolist(), counts.tolist())))
 
-                for i in range(0, len(cscores[0])):
-                    urim = processed_urims[i]
-                    logger.debug("saving cosine scores for URI-M {}".format(urim))
+    return corpus
 
-                    measuremodel.set_score(urit, urim, "timemap measures", measurename, cscores[0][i])
-                    measuremodel.set_tokenized(urit, urim, "timemap measures", measurename, tokenize)
-                    measuremodel.set_stemmed(urit, urim, "timemap measures", measurename, stemming)
-                    measuremodel.set_removed_boilerplate(
-                        urit, urim, "timemap measures", measurename, remove_boilerplate
-                    )
-            finally:                        
-                uritcounter += 1
+def _first_document_similarities(topic_model, corpus):
+    """Returns the cosine similarity of the vector of every document in
+    `corpus` in `topic_model` to that of the first document.
+    """
 
-    return measuremodel
+    vectors = matutils.corpus2dense(topic_model[corpus],
+        num_terms=topic_model.num_topics)
 
-def compute_gensim_across_TimeMap(collectionmodel, measuremodel, measurename, 
-    gensim_model, num_topics=2):
-    """Contains the appropriate arguments to score mementos using latent
-    semantic indexing (LSI) via gensim against the raw memento text content 
-    of all mementos in a TimeMap.
+    norms = np.linalg.norm(vectors, axis=0)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
 
-    Note: The `tokenize` and `stemming` arguments have no affect and are purely
-    included to support the same signature as the other "compute_" functions
-    so that a factory pattern can be used.
+    # gensim outputs to float32, which is not serializable with
+    # the Python json library
+    return ( vectors[:, 0] @ vectors ).tolist()
+
+def gensim_documents_scoredistance(documents, gensim_model=models.LsiModel,
+    num_topics=2, topic_model=None):
+    """Builds a topic model of type `gensim_model` with `num_topics` topics
+    from `documents`, given as arrays of token IDs, and calculates the
+    similarity of every document to the first document in that model,
+    returning one score per document.
 
-    Note: This function is very close to compute_score_across_TimeMap and that
-    function may be altered to support this measure in the future.
+    Only the first document is compared to the others, rather than building
+    a similarity index of every document and querying it with each of them.
+
+    If `topic_model` is given, e.g., one trained on the whole collection by
+    prepare_collection_topic_model, it is used instead of building one.
+
+    Raises ValueError if the documents contain no terms.
     """
 
-    tokenize = True
-    remove_boilerplate = True
-    stemming = True
+    if topic_model is not None:
+        return _first_document_similarities(topic_model,
+            _token_id_corpus(documents, num_terms=topic_model.num_terms))
 
-    logger.info("Computing gensim {} with {} topics score across TimeMap, "
-        "beginning TimeMap iteration...".format(measurename, num_topics))
+    lengths = np.fromiter( map(len, documents), dtype=np.int64,
+        count=len(documents) )
 
-    urits = collectionmodel.getTimeMapURIList()
-    urittotal = len(urits)
-    uritcounter = 1
+    # the token IDs of the token cache are renumbered so that the model
+    # only holds the terms of this TimeMap
+    term_ids, terms = np.unique(np.concatenate(documents), return_inverse=True)
 
-    for urit in urits:
+    if len(term_ids) == 0:
+        raise ValueError("the documents contain no terms")
 
-        logger.info("Processing TimeMap {} of {}".format(uritcounter, urittotal))
-        logger.debug("Processing mementos from TimeMap at {}".format(urit))
+    corpus = _token_id_corpus(np.split(terms.ravel(), np.cumsum(lengths)[:-1]))
 
-        timemap = collectionmodel.getTimeMap(urit)
+    topic_model = gensim_model(corpus, id2word=utils.FakeDict(len(term_ids)),
+        num_topics=num_topics)
 
-        memento_list = timemap["mementos"]["list"]
+    return _first_document_similarities(topic_model, corpus)
 
-        # some TimeMaps have no mementos
-        # e.g., http://wayback.archive-it.org/3936/timemap/link/http://www.peacecorps.gov/shutdown/?from=hpb
-        if len(memento_list) > 0:
+def gensim_lsi_documents_scoredistance(documents, num_topics=10,
+    topic_model=None):
+    """Calculates gensim_documents_scoredistance with an LSI model."""
 
-            first_urim = timemap["mementos"]["first"]["uri"]
+    return gensim_documents_scoredistance(documents,
+        gensim_model=models.LsiModel, num_topics=num_topics,
+        topic_model=topic_model)
 
-            logger.debug("Accessing content of first URI-M {} for calculations".format(first_urim))
+def gensim_lda_documents_scoredistance(documents, num_topics=2,
+    topic_model=None):
+    """Calculates gensim_documents_scoredistance with an LDA model."""
 
-            try:
-                first_data = get_memento_data_for_measure(
-                    first_urim, collectionmodel, tokenize=tokenize, stemming=stemming, 
-                    remove_boilerplate=remove_boilerplate)
+    return gensim_documents_scoredistance(documents,
+        gensim_model=models.LdaModel, num_topics=num_topics,
+        topic_model=topic_model)
 
-            except CollectionModelBoilerPlateRemovalFailureException as e:
-                errormsg = "Boilerplate removal error with first memento in TimeMap, " \
-                    "cannot effectively compare memento content"
+class _TokenIdCorpus:
+    """
+        A gensim corpus of the bags-of-words of the mementos at `urims` in
+        `collectionmodel`, read from its token cache each time the corpus
+        is iterated. Token IDs of at least `num_terms` are left out.
+    """
 
-                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
-                    measuremodel, measurename, errormsg)
-                continue
+    def __init__(self, collectionmodel, urims, stemming, remove_boilerplate,
+        num_terms):
 
-            if len(first_data) == 0:
+        self.collectionmodel = collectionmodel
+        self.urims = urims
+        self.stemming = stemming
+        self.remove_boilerplate = remove_boilerplate
+        self.num_terms = num_terms
 
-                errormsg = "After processing content, the first memento in TimeMap is now empty, cannot effectively compare memento content"
-                logger.warning(errormsg)
+    def __len__(self):
 
-                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
-                    measuremodel, measurename, errormsg)
+        return len(self.urims)
 
-                # move on to the next URI-T
-                uritcounter += 1
-                continue
+    def __iter__(self):
 
-            mementototal = len(memento_list)
-            logger.info("There are {} mementos in this TimeMap".format(mementototal))
+        for urim in self.urims:
 
-            mementocounter = 1
+            token_ids = get_memento_token_ids(urim, self.collectionmodel,
+                stemming=self.stemming,
+                remove_boilerplate=self.remove_boilerplate)
 
-            processed_urims = []
-            error_urims = []
-            documents = []
+            yield _token_id_corpus([token_ids], num_terms=self.num_terms)[0]
 
-            # in case the mementos are not sorted in order of memento datetime
-            # we save the first one for comparison
-            processed_urims.append(first_urim)
-            documents.append(first_data)
+# filename -> (modification time, topic model loaded from it)
+_topic_models = {}
 
-            for memento in memento_list:
+def _load_topic_model(filename, model_class):
+    """Returns the topic model of `model_class` stored in `filename`, which
+    is only read again once the file changed.
+    """
 
-                logger.debug("Processing Memento {} of {}".format(mementocounter, mementototal))
+    modified = os.stat(filename).st_mtime_ns
 
-                urim = memento["uri"]
+    if filename not in _topic_models or _topic_models[filename][0] != modified:
+        _topic_models[filename] = (modified, model_class.load(filename))
 
-                logger.debug("Accessing content of URI-M {} for calculations".format(urim))
+    return _topic_models[filename][1]
 
-                try:
+def prepare_collection_topic_model(collectionmodel, measurename,
+    num_topics=None, processes=None):
+    """Trains the topic model of the gensim measure `measurename` with
+    `num_topics` topics, or its default number of topics, on every memento
+    of `collectionmodel` and stores it in the topicmodels directory of its
+    working directory, returning the name of the file holding it, or None
+    if no memento could be tokenized.
 
-                    # in case the mementos are not sorted in order of memento datetime
-                    # we ignore the first one for comparison because we already saved it
-                    if urim != first_urim:
-                        try:
-                            memento_data = get_memento_data_for_measure(
-                                urim, collectionmodel, tokenize=tokenize, 
-                                stemming=stemming, 
-                                remove_boilerplate=remove_boilerplate)
-                                
-                            processed_urims.append(urim)
-                            documents.append(memento_data)
-
-                        except CollectionModelBoilerPlateRemovalFailureException as e:
-                            errormsg = "Boilerplate could not be removed from " \
-                                "memento at URI-M {}; details: {}".format(urim, repr(e))
-                            logger.warning(errormsg)
-
-                            measuremodel.set_Memento_measurement_error(
-                                urit, urim, "timemap measures", measurename, repr(e)
-                            )
+    The terms of the model are the token IDs of the token cache, so that
+    the model can score the mementos of every TimeMap without being built
+    again. LDA models are trained by `processes` processes with
+    LdaMulticore.
 
-                except CollectionModelMementoErrorException:
+    If a model was stored by an earlier run, it is loaded and only trained
+    on the mementos added since then, with add_documents for LSI and
+    update for LDA. The terms of a model are fixed once it is created, so
+    terms first seen in the added mementos are left out, like words
+    missing from a gensim Dictionary.
+    """
+
+    measure = supported_timemap_measures[measurename]
+
+    if not num_topics:
+        num_topics = measure["default number of topics"]
+
+    settings = timemap_representations[measure["representation"]]
+    stemming = settings["stemming"]
+    remove_boilerplate = settings["remove_boilerplate"]
+
+    directory = "{}/topicmodels".format(collectionmodel.working_directory)
+
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    filename = "{}/{}_{}_{}.model".format(directory, measurename, num_topics,
+        variant_name(stemming, remove_boilerplate, get_text_pipeline().tokenizer))
+    urims_filename = "{}.urims".format(filename)
+
+    stored = os.path.exists(filename) and os.path.exists(urims_filename)
+
+    # the URI-Ms the stored model was trained on
+    trained_urims = set()
+
+    if stored:
+
+        with open(urims_filename) as f:
+            trained_urims = set( line.rstrip("\n") for line in f )
+
+    pending = []
+    skipped = []
+
+    for urim in collectionmodel.getMementoURIList():
+
+        if urim in trained_urims:
+            continue
+
+        try:
+            get_memento_token_ids(urim, collectionmodel, stemming=stemming,
+                remove_boilerplate=remove_boilerplate)
+            pending.append(urim)
+
+        except (CollectionModelBoilerPlateRemovalFailureException,
+            CollectionModelMementoErrorException, UnicodeDecodeError):
+            skipped.append(urim)
+
+    if stored and not pending and not skipped:
+        return filename
+
+    if not stored and not pending:
+        logger.warning("no mementos to train the {} model on".format(measurename))
+        return None
+
+    if stored:
+
+        model = _load_topic_model(filename, measure["collection topic model"])
+
+        logger.info("updating the {} model in {} with {} mementos".format(
+            measurename, filename, len(pending)))
+
+        corpus = _TokenIdCorpus(collectionmodel, pending, stemming,
+            remove_boilerplate, model.num_terms)
+
+        if len(corpus) > 0:
+
+            if isinstance(model, models.LsiModel):
+                model.add_documents(corpus)
+            else:
+                model.update(corpus)
+
+    else:
+
+        logger.info("training the {} model in {} on {} mementos".format(
+            measurename, filename, len(pending)))
+
+        num_terms = len(collectionmodel.getTokenCache().vocabulary)
+
+        corpus = _TokenIdCorpus(collectionmodel, pending, stemming,
+            remove_boilerplate, num_terms)
+
+        kwargs = {}
+
+        if measure["collection topic model"] is models.LdaMulticore:
+            kwargs["workers"] = processes
+
+        model = measure["collection topic model"](corpus,
+            id2word=utils.FakeDict(num_terms), num_topics=num_topics, **kwargs)
+
+    model.save(filename)
+
+    # mementos that could not be tokenized are recorded as well, so that
+    # they are not tried again
+    with open(urims_filename, 'a') as f:
+
+        for urim in pending + skipped:
+            f.write("{}\n".format(urim))
+
+    return filename
+
+def compute_gensim_across_TimeMap(collectionmodel, measuremodel, measurename, 
+    num_topics=None, collection_topic_models=False):
+    """Contains the appropriate arguments to score mementos using the gensim
+    topic model measure `measurename` with `num_topics` topics against the
+    raw memento text content of all mementos in a TimeMap.
+
+    If `collection_topic_models` is True, the mementos are scored with a
+    topic model trained on the whole collection instead of one built for
+    each TimeMap, see compute_timemap_measures.
+    """
+
+    return compute_timemap_measures(collectionmodel, measuremodel,
+        [measurename], num_topics=num_topics,
+        collection_topic_models=collection_topic_models)
+
+def compute_gensim_lsi_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=None,
+    num_topics=10, collection_topic_models=False):
+
+    measuremodel = compute_gensim_across_TimeMap(collectionmodel, measuremodel,
+        "gensim_lsi", num_topics=num_topics,
+        collection_topic_models=collection_topic_models)
+
+    return measuremodel
+
+def compute_gensim_lda_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=None,
+    num_topics=2, collection_topic_models=False):
+
+    measuremodel = compute_gensim_across_TimeMap(collectionmodel, measuremodel,
+        "gensim_lda", num_topics=num_topics,
+        collection_topic_models=collection_topic_models)
+
+    return measuremodel
+
+timemap_chunk_size_default = 1000
+
+timemap_representations = {
+    "raw content": {
+        "tokenize": False,
+        "stemming": False,
+        "remove_boilerplate": False
+    },
+    "content length": {
+        "tokenize": False,
+        "stemming": False,
+        "remove_boilerplate": False,
+        "content_length": True
+    },
+    "stemmed tokens": {
+        "tokenize": True,
+        "stemming": True,
+        "remove_boilerplate": True
+    },
+    "stemmed token ids": {
+        "tokenize": True,
+        "stemming": True,
+        "remove_boilerplate": True,
+        "token_ids": True
+    },
+    "raw simhash": {
+        "tokenize": False,
+        "stemming": False,
+        "remove_boilerplate": False,
+        "simhash": True
+    },
+    "stemmed token simhash": {
+        "tokenize": True,
+        "stemming": True,
+        "remove_boilerplate": True,
+        "simhash": True
+    }
+}
+
+def _save_score(measuremodel, urit, urim, measurename, score, representation):
+
+    settings = timemap_representations[representation]
+
+    measuremodel.set_score(urit, urim, "timemap measures", measurename, score)
+    measuremodel.set_tokenized(urit, urim, "timemap measures", measurename,
+        settings["tokenize"])
+    measuremodel.set_stemmed(urit, urim, "timemap measures", measurename,
+        settings["stemming"])
+    measuremodel.set_removed_boilerplate(urit, urim, "timemap measures",
+        measurename, settings["remove_boilerplate"])
+
+def _get_memento_list(collectionmodel, urit):
+    """Returns the list of mementos and the URI-M of the first memento of
+    the TimeMap at `urit`, or None if there are no mementos to score.
+    """
+
+    timemap = collectionmodel.getTimeMap(urit)
+
+    try:
+        memento_list = timemap["mementos"]["list"]
+    except KeyError as e:
+        logger.exception("Failed to process TimeMap at {}".format(urit))
+        return None
+
+    # some TimeMaps have no mementos
+    # e.g., http://wayback.archive-it.org/3936/timemap/link/http://www.peacecorps.gov/shutdown/?from=hpb
+    if len(memento_list) == 0:
+        return None
+
+    return memento_list, timemap["mementos"]["first"]["uri"]
+
+def _get_first_memento_data(collectionmodel, measuremodel, urit, memento_list,
+    first_urim, measures_by_representation):
+    """Returns a dict mapping each representation in
+    `measures_by_representation` to the data of the first memento of the
+    TimeMap at `urit`. Representations that cannot be compared are left out
+    and errors are recorded in `measuremodel` for all of their measures.
+    """
+
+    logger.debug("Accessing content of first URI-M {} for calculations".format(first_urim))
+
+    first_data = {}
+
+    for representation, representation_measures in \
+        measures_by_representation.items():
+
+        settings = timemap_representations[representation]
+
+        try:
+            data = get_memento_data_for_measure(first_urim, collectionmodel,
+                **settings)
+
+            # fingerprints are checked by the length of the content they
+            # were computed from
+            if settings.get("content_length"):
+                length = data
+            elif settings.get("simhash") and settings["tokenize"]:
+                length = len(get_memento_token_ids(first_urim, collectionmodel,
+                    stemming=settings["stemming"],
+                    remove_boilerplate=settings["remove_boilerplate"]))
+            elif settings.get("simhash"):
+                length = collectionmodel.getMementoContentLength(first_urim)
+            else:
+                length = len(data)
+
+        except (CollectionModelBoilerPlateRemovalFailureException,
+            CollectionModelMementoErrorException,
+            CollectionModelNoSuchMementoException) as e:
+            errormsg = "Boilerplate removal error with first memento in TimeMap, " \
+                "cannot effectively compare memento content"
+            logger.warning(errormsg)
+
+            for measurename in representation_measures:
+                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
+                    measuremodel, measurename, errormsg)
+
+            continue
+
+        if length == 0:
+
+            errormsg = "After processing content, the first memento in TimeMap is now empty, cannot effectively compare memento content"
+            logger.warning(errormsg)
+
+            for measurename in representation_measures:
+                apply_measurement_error_msg_to_all_mementos(urit, memento_list,
+                    measuremodel, measurename, errormsg)
+
+            continue
+
+        first_data[representation] = data
+
+    return first_data
+
+class _MementoDocuments:
+    """
+        A sequence of the data of the mementos at `urims` in
+        `collectionmodel` in the given `representation`, one of
+        timemap_representations, which reads the data of each memento when
+        it is indexed rather than holding the data of all of them.
+
+        Token IDs are read from the token cache, so the mementos must have
+        been processed before, as done by _score_mementos.
+    """
+
+    def __init__(self, collectionmodel, urims, representation):
+
+        self.collectionmodel = collectionmodel
+        self.urims = urims
+        self.settings = timemap_representations[representation]
+
+    def __len__(self):
+
+        return len(self.urims)
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return [ self._get(urim) for urim in self.urims[index] ]
+
+        return self._get(self.urims[index])
+
+    def __iter__(self):
+
+        for urim in self.urims:
+            yield self._get(urim)
+
+    def _get(self, urim):
+
+        return get_memento_data_for_measure(urim, self.collectionmodel,
+            **self.settings)
+
+def _score_mementos(collectionmodel, measuremodel, urit, memento_list,
+    first_urim, first_data, measures_by_representation, documents,
+    thresholds=None):
+    """Scores each memento in `memento_list` against the data of the first
+    memento of the TimeMap at `urit` in `first_data` with the measures in
+    `measures_by_representation` that compare two mementos, storing the
+    results in `measuremodel`.
+
+    The URI-M of each memento is also appended to `documents` for each
+    representation stored in it, see _score_documents.
+
+    Measures sharing a "scoredistances function" are computed together by
+    a single call of that function, which is given `thresholds`.
+    """
+
+    mementototal = len(memento_list)
+    logger.info("There are {} mementos in this TimeMap".format(mementototal))
+
+    for mementocounter, memento in enumerate(memento_list, start=1):
+
+        logger.debug("Processing Memento {} of {}".format(mementocounter, mementototal))
+
+        urim = memento["uri"]
+
+        logger.debug("Accessing content of URI-M {} for calculations".format(urim))
+
+        for representation, representation_first_data in first_data.items():
+
+            representation_measures = measures_by_representation[representation]
+
+            if urim == first_urim:
+                memento_data = representation_first_data
+
+            else:
+
+                try:
+                    memento_data = get_memento_data_for_measure(
+                        urim, collectionmodel,
+                        **timemap_representations[representation])
+
+                except (CollectionModelBoilerPlateRemovalFailureException,
+                    CollectionModelMementoErrorException,
+                    UnicodeDecodeError) as e:
+                    errormsg = "Boilerplate could not be removed from " \
+                        "memento at URI-M {}; details: {}".format(urim, repr(e))
+                    logger.warning(errormsg)
+
+                    for measurename in representation_measures:
+                        measuremodel.set_Memento_measurement_error(
+                            urit, urim, "timemap measures", measurename, repr(e)
+                        )
+
+                    continue
+
+                except CollectionModelNoSuchMementoException as e:
                     errormsg = "Errors were recorded while attempting to " \
-                        "access URI-M {}, skipping {} calcualtions for this " \
-                        "URI-M".format(urim, measurename)
+                        "access URI-M {}, skipping calcualtions for this " \
+                        "URI-M".format(urim)
                     logger.warning(errormsg)
 
-                    errorinfo = collectionmodel.getMementoErrorInformation(urim)
+                    measuremodel.set_Memento_access_error(urit, urim, str(e))
 
-                    measuremodel.set_Memento_access_error(
-                        urit, urim, errorinfo
-                    )
-                    error_urims.append(urim)
-                
-                mementocounter += 1
+                    continue
+
+                if representation in documents:
+                    documents[representation].append(urim)
+
+            # scoredistances function -> scores it computed for this memento
+            shared_scores = {}
+
+            for measurename in representation_measures:
+
+                settings = supported_timemap_measures[measurename]
+                scoredistances_function = settings.get("scoredistances function")
+
+                if scoredistances_function is not None:
 
-            logger.info("There are {} mementos under consideration in this TimeMap".format(len(documents)))
+                    if scoredistances_function not in shared_scores:
+                        shared_scores[scoredistances_function] = \
+                            scoredistances_function(representation_first_data,
+                                memento_data, thresholds=thresholds)
 
-            dictionary = corpora.Dictionary(documents)
-            corpus = [ dictionary.doc2bow(text) for text in documents]
-            mod = gensim_model(corpus, id2word=dictionary, num_topics=num_topics)
+                    score = shared_scores[scoredistances_function][measurename]
+
+                elif "scoredistance function" in settings:
+                    score = settings["scoredistance function"](
+                        representation_first_data, memento_data)
+
+                else:
+                    continue
+
+                _save_score(measuremodel, urit, urim, measurename,
+                    score, representation)
+
+    return measuremodel
+
+def _score_documents(collectionmodel, measuremodel, urit, memento_list,
+    documents, measures_by_representation, num_topics=None, batch_size=None,
+    topic_models=None):
+    """Scores the mementos of the TimeMap at `urit` with the measures in
+    `measures_by_representation` that compare all of the mementos at once,
+    using `documents`, a dict mapping each representation to the URI-Ms of
+    the mementos, starting with the first memento. Their data is read from
+    `collectionmodel` by the measures as they need it, see
+    _MementoDocuments.
+
+    Measures named in `topic_models` use the topic model stored in the
+    file it maps them to instead of building one for the TimeMap.
+    """
+
+    for representation, processed_urims in documents.items():
+
+        representation_documents = _MementoDocuments(collectionmodel,
+            processed_urims, representation)
+
+        logger.info("There are {} mementos under consideration in this "
+            "TimeMap".format(len(representation_documents)))
+
+        for measurename in measures_by_representation[representation]:
+
+            measure = supported_timemap_measures[measurename]
+
+            if "documents scoredistance function" not in measure:
+                continue
+
+            kwargs = {}
+
+            if "default number of topics" in measure:
+                kwargs["num_topics"] = num_topics if num_topics \
+                    else measure["default number of topics"]
+
+            if "default batch size" in measure:
+                kwargs["batch_size"] = batch_size if batch_size \
+                    else measure["default batch size"]
+
+            if topic_models and topic_models.get(measurename):
+                kwargs["topic_model"] = _load_topic_model(
+                    topic_models[measurename], measure["collection topic model"])
 
             try:
-                index = similarities.MatrixSimilarity(mod[corpus])
-
-                for i in range(0, len(documents)):
-                    
-                    urim = processed_urims[i]
-                    doc = documents[i]
-                    vec_bow = dictionary.doc2bow(doc)
-                    vec_lsi = mod[vec_bow]
-
-                    sims = index[vec_lsi]
-                    
-                    # gensim outputs to float32, which is not serializable with 
-                    # the Python json library
-                    measuremodel.set_score(urit, urim, "timemap measures", measurename, 
-                        float(sims[0]) )
-                    measuremodel.set_tokenized(urit, urim, "timemap measures", measurename, tokenize)
-                    measuremodel.set_stemmed(urit, urim, "timemap measures", measurename, stemming)
-                    measuremodel.set_removed_boilerplate(
-                        urit, urim, "timemap measures", measurename, remove_boilerplate
-                    )
+                scores = measure["documents scoredistance function"](
+                    representation_documents, **kwargs)
 
-            except IndexError as e:
-                errormsg = "Gensim Error: {}".format(repr(e))
-                logger.warning(errormsg)
+            except (ValueError, IndexError) as e:
+                errormsg = "Errors were recorded while attempting to " \
+                    "compute {} for the TimeMap {}".format(measurename, urit)
+                logger.exception(errormsg)
 
                 apply_measurement_error_msg_to_all_mementos(urit, memento_list,
-                    measuremodel, measurename, errormsg)
+                    measuremodel, measurename, repr(e))
 
-            uritcounter += 1
+                continue
+
+            for urim, score in zip(processed_urims, scores):
+                _save_score(measuremodel, urit, urim, measurename,
+                    score, representation)
 
     return measuremodel
 
-def compute_gensim_lsi_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=None,
-    num_topics=10):
+def _compute_timemap_measures_for_TimeMap(collectionmodel, measuremodel, urit,
+    measures_by_representation, num_topics=None, thresholds=None,
+    batch_size=None, topic_models=None):
+    """Computes the measures in `measures_by_representation`, a dict mapping
+    each representation to the names of the measures scoring it, for the
+    mementos in the TimeMap at `urit`, storing the results in
+    `measuremodel`.
+    """
 
-    measuremodel = compute_gensim_across_TimeMap(collectionmodel, measuremodel,
-        "gensim_lsi", gensim_model=models.LsiModel, num_topics=num_topics)
+    logger.debug("Processing mementos from TimeMap at {}".format(urit))
+
+    mementos = _get_memento_list(collectionmodel, urit)
+
+    if mementos is None:
+        return measuremodel
+
+    memento_list, first_urim = mementos
+
+    first_data = _get_first_memento_data(collectionmodel, measuremodel, urit,
+        memento_list, first_urim, measures_by_representation)
+
+    # representation -> URI-Ms of every memento, for measures that score
+    # all of the mementos in a TimeMap at once
+    documents = {}
+
+    for representation in first_data:
+
+        if any( "documents scoredistance function" in
+            supported_timemap_measures[measurename]
+            for measurename in measures_by_representation[representation] ):
+
+            # in case the mementos are not sorted in order of memento
+            # datetime the first one is saved for comparison
+            documents[representation] = [first_urim]
+
+    _score_mementos(collectionmodel, measuremodel, urit, memento_list,
+        first_urim, first_data, measures_by_representation, documents,
+        thresholds)
+
+    _score_documents(collectionmodel, measuremodel, urit, memento_list,
+        documents, measures_by_representation, num_topics, batch_size, topic_models)
 
     return measuremodel
 
-def compute_gensim_lda_across_TimeMap(collectionmodel, measuremodel, tokenize=None, stemming=None,
-    num_topics=2):
+# the collection model opened by each worker process of
+# compute_timemap_measures, and the class and working directory to open it
+# from
+_worker_collectionmodel = None
+_worker_collectionmodel_arguments = None
+
+def _timemap_worker_initializer(collectionmodel_class, working_directory,
+    tokenizer):
+    """Prepares a worker process of compute_timemap_measures once, rather
+    than once per TimeMap, by loading the NLTK data, stemmer, and stopwords
+    of a TextPipeline using `tokenizer`.
+
+    The collection model of `collectionmodel_class` stored in
+    `working_directory` is opened by _get_worker_collectionmodel the first
+    time a task needs it, either computing fingerprints or scoring a
+    TimeMap, after the parent process finished storing boilerplate-free
+    content and tokens in it. Tokenizing does not open it.
+    """
 
-    measuremodel = compute_gensim_across_TimeMap(collectionmodel, measuremodel,
-        "gensim_lda", gensim_model=models.LdaModel, num_topics=num_topics)
+    global _worker_collectionmodel_arguments
+
+    pipeline = TextPipeline(tokenizer=tokenizer)
+    pipeline.process("warm up")
+    set_text_pipeline(pipeline)
+
+    _worker_collectionmodel_arguments = (collectionmodel_class, working_directory)
+
+def _get_worker_collectionmodel():
+
+    global _worker_collectionmodel
+
+    if _worker_collectionmodel is None:
+
+        collectionmodel_class, working_directory = _worker_collectionmodel_arguments
+
+        # the parent process owns the collection and its caches, workers
+        # only read from them
+        _worker_collectionmodel = collectionmodel_class(
+            working_directory=working_directory, read_only=True)
+
+    return _worker_collectionmodel
+
+def _share_first_memento_data(collectionmodel, first_urim, first_data):
+    """Copies the data of the first memento `first_urim` in each
+    representation of `first_data` into a block of shared memory, so that
+    it can be given to all worker processes scoring parts of its TimeMap
+    without processing or pickling it again for each of them.
+
+    Tokens are shared as their IDs in the token cache of `collectionmodel`.
+
+    Returns the list of blocks, which must be unlinked once the workers are
+    done, and a dict mapping each representation to the name of its block
+    and the length of its data, for _read_shared_first_memento_data. Simhash
+    fingerprints and content lengths are not put into blocks, they are
+    given with None as the name of their block and themselves as their
+    length.
+    """
+
+    blocks = []
+    shared_first_data = {}
+
+    for representation, data in first_data.items():
+
+        settings = timemap_representations[representation]
+
+        # fingerprints and lengths are small enough to be given to the
+        # workers directly
+        if settings.get("simhash") or settings.get("content_length"):
+            shared_first_data[representation] = (None, data)
+            continue
+
+        if settings["tokenize"]:
+            token_ids = get_memento_token_ids(first_urim, collectionmodel,
+                stemming=settings["stemming"],
+                remove_boilerplate=settings["remove_boilerplate"])
+            length = len(token_ids)
+            content = token_ids.view(np.uint8)
+
+        else:
+            length = len(data)
+            content = data
+
+        block = shared_memory.SharedMemory(create=True, size=len(content))
+        block.buf[:len(content)] = content
+
+        blocks.append(block)
+        shared_first_data[representation] = (block.name, length)
+
+    return blocks, shared_first_data
+
+def _read_shared_first_memento_data(collectionmodel, shared_first_data):
+    """Returns the data of the first memento shared by
+    _share_first_memento_data, in the same form as _get_first_memento_data.
+    """
+
+    first_data = {}
+
+    for representation, (name, length) in shared_first_data.items():
+
+        # a fingerprint or content length, given as the length
+        if name is None:
+            first_data[representation] = length
+            continue
+
+        block = shared_memory.SharedMemory(name=name)
+
+        try:
+
+            settings = timemap_representations[representation]
+
+            if settings.get("token_ids"):
+                first_data[representation] = np.ndarray(length,
+                    dtype=token_id_dtype, buffer=block.buf).copy()
+
+            elif settings["tokenize"]:
+                token_ids = np.ndarray(length, dtype=token_id_dtype,
+                    buffer=block.buf)
+                first_data[representation] = \
+                    collectionmodel.getTokenCache().get_tokens(token_ids)
+
+                # the block cannot be closed while an array uses it
+                del token_ids
+
+            else:
+                # compared as a memoryview, like the raw content of the
+                # other mementos
+                first_data[representation] = memoryview(bytes(block.buf[:length]))
+
+        finally:
+            block.close()
+
+    return first_data
+
+# the data of the first memento last read by this worker process, as
+# (shared_first_data, first_data)
+_worker_first_data = None
+
+def _timemap_worker(item):
+    """Carries out a task of compute_timemap_measures inside a worker
+    process, returning the results in a new MeasureModel.
+
+    Tasks either score a whole TimeMap, as
+    ("timemap", urit, measures_by_representation, num_topics, thresholds,
+    batch_size, topic_models),
+    or score the mementos `start` to `end` of a TimeMap with the measures
+    that compare two mementos, as ("chunk", urit, start, end,
+    shared_first_data, measures_by_representation, thresholds).
+    """
+
+    global _worker_first_data
+
+    collectionmodel = _get_worker_collectionmodel()
+
+    if item[0] == "timemap":
+
+        task, urit, measures_by_representation, num_topics, thresholds, \
+            batch_size, topic_models = item
+
+        return _compute_timemap_measures_for_TimeMap(collectionmodel,
+            MeasureModel(), urit, measures_by_representation, num_topics,
+            thresholds, batch_size, topic_models)
+
+    task, urit, start, end, shared_first_data, measures_by_representation, \
+        thresholds = item
+
+    memento_list, first_urim = _get_memento_list(collectionmodel, urit)
+
+    # the chunks of a TimeMap are likely given to the same worker one
+    # after the other
+    if _worker_first_data is None or _worker_first_data[0] != shared_first_data:
+        _worker_first_data = ( shared_first_data,
+            _read_shared_first_memento_data(collectionmodel, shared_first_data) )
+
+    return _score_mementos(collectionmodel, MeasureModel(), urit,
+        memento_list[start:end], first_urim, _worker_first_data[1],
+        measures_by_representation, {}, thresholds)
+
+def _tokenize_worker(item):
+    """Tokenizes the (URI-M, data, stemming) tuple `item` inside a worker
+    process of compute_timemap_measures.
+    """
+
+    urim, data, stemming = item
+
+    return urim, get_text_pipeline().process(data, stemming=stemming)
+
+def _prepare_token_cache(collectionmodel, pool, stemming, remove_boilerplate,
+    batch_size):
+    """Tokenizes every memento in `collectionmodel` whose tokens are not yet
+    in its token cache using `pool`, and stores the tokens in the token
+    cache, so that the workers scoring TimeMaps only read tokens.
+    """
+
+    tokencache = collectionmodel.getTokenCache()
+    tokenizer = get_text_pipeline().tokenizer
+
+    pending = [ urim for urim in collectionmodel.getMementoURIList()
+        if not tokencache.contains(urim, stemming=stemming,
+            remove_boilerplate=remove_boilerplate, tokenizer=tokenizer) ]
+
+    logger.info("tokenizing {} mementos".format(len(pending)))
+
+    for start in range(0, len(pending), batch_size):
+
+        batch = []
+
+        for urim in pending[start:start + batch_size]:
+
+            # failures are recorded when the TimeMaps are scored
+            try:
+                if remove_boilerplate:
+                    data = collectionmodel.getMementoContentWithoutBoilerplate(urim)
+                else:
+                    data = collectionmodel.getMementoContent(urim)
+
+            except (CollectionModelBoilerPlateRemovalFailureException,
+                CollectionModelMementoErrorException):
+                continue
+
+            batch.append( (urim, data, stemming) )
+
+        for urim, tokens in pool.imap(_tokenize_worker, batch):
+            tokencache.put(urim, tokens, stemming=stemming,
+                remove_boilerplate=remove_boilerplate, tokenizer=tokenizer)
+
+def _simhash_worker(item):
+    """Computes the fingerprint of the memento in the (URI-M, settings)
+    tuple `item` inside a worker process of compute_timemap_measures,
+    returning the URI-M and the fingerprint, or None if the content of the
+    memento cannot be processed.
+    """
+
+    urim, settings = item
+
+    try:
+        fingerprint = get_memento_data_for_measure(urim,
+            _get_worker_collectionmodel(), **settings)
+
+    except (CollectionModelBoilerPlateRemovalFailureException,
+        CollectionModelMementoErrorException,
+        CollectionModelNoSuchMementoException):
+        fingerprint = None
+
+    return urim, fingerprint
+
+def _prepare_simhashes(collectionmodel, pool, settings):
+    """Computes the fingerprint of every memento in `collectionmodel` that
+    is not yet in its Simhash cache with the `settings` of a Simhash
+    representation using `pool`, and stores them in the Simhash cache, so
+    that each fingerprint is stored once for later runs and for
+    compute_Simhashes.
+    """
+
+    simhashcache = collectionmodel.getSimhashCache()
+    variant = _simhash_variant(settings["tokenize"], settings["stemming"],
+        settings["remove_boilerplate"])
+
+    pending = [ (urim, settings) for urim in collectionmodel.getMementoURIList()
+        if simhashcache.get(urim, variant) is None ]
+
+    logger.info("computing {} fingerprints of {} mementos".format(
+        variant, len(pending)))
+
+    for urim, fingerprint in pool.imap(_simhash_worker, pending, chunksize=16):
+
+        # failures are recorded when the TimeMaps are scored
+        if fingerprint is not None:
+            simhashcache.put(urim, variant, fingerprint)
+
+def _plan_timemap_tasks(collectionmodel, urits, measures_by_representation,
+    num_topics, chunk_size, thresholds=None, batch_size=None,
+    topic_models=None):
+    """Divides the scoring of the TimeMaps at `urits` into tasks for
+    _timemap_worker. TimeMaps with more than `chunk_size` mementos are split
+    into chunks of `chunk_size` mementos, all compared to the first memento
+    of the TimeMap, which is processed once here and shared with the
+    workers.
+
+    Returns the list of tasks, a list with one entry per result to be
+    merged, in order, that is None for the result of the next task and a
+    MeasureModel for results computed here, and the list of shared memory
+    blocks that must be unlinked once all tasks are done.
+    """
+
+    tasks = []
+    results = []
+    blocks = []
+
+    for urit in urits:
+
+        mementos = _get_memento_list(collectionmodel, urit)
+
+        if mementos is None or len(mementos[0]) <= chunk_size:
+            tasks.append( ("timemap", urit, measures_by_representation,
+                num_topics, thresholds, batch_size, topic_models) )
+            results.append(None)
+            continue
+
+        memento_list, first_urim = mementos
+
+        logger.info("Splitting the {} mementos of TimeMap {} into chunks of "
+            "{}".format(len(memento_list), urit, chunk_size))
+
+        first_measuremodel = MeasureModel()
+
+        first_data = _get_first_memento_data(collectionmodel, first_measuremodel,
+            urit, memento_list, first_urim, measures_by_representation)
+
+        results.append(first_measuremodel)
+
+        # representation -> names of the measures comparing two mementos
+        # and of the measures scoring all of the mementos at once
+        pairwise_measures = {}
+        documents_measures = {}
+
+        for representation in first_data:
+            for measurename in measures_by_representation[representation]:
+
+                if "scoredistance function" in supported_timemap_measures[measurename]:
+                    pairwise_measures.setdefault(representation, []).append(measurename)
+                else:
+                    documents_measures.setdefault(representation, []).append(measurename)
+
+        if pairwise_measures:
+
+            timemap_blocks, shared_first_data = _share_first_memento_data(
+                collectionmodel, first_urim,
+                { representation: first_data[representation]
+                    for representation in pairwise_measures })
+
+            blocks.extend(timemap_blocks)
+
+            for start in range(0, len(memento_list), chunk_size):
+                tasks.append( ("chunk", urit, start, start + chunk_size,
+                    shared_first_data, pairwise_measures, thresholds) )
+                results.append(None)
+
+        # these need every memento of the TimeMap at once
+        if documents_measures:
+            tasks.append( ("timemap", urit, documents_measures, num_topics,
+                thresholds, batch_size, topic_models) )
+            results.append(None)
+
+    return tasks, results, blocks
+
+def _prepare_collection_topic_models(collectionmodel, measurenames,
+    num_topics, processes, collection_topic_models):
+    """Returns a dict mapping each measure in `measurenames` that supports
+    it to the file holding its collection topic model, see
+    prepare_collection_topic_model, or None if `collection_topic_models` is
+    False.
+    """
+
+    if not collection_topic_models:
+        return None
+
+    return { measurename: prepare_collection_topic_model(collectionmodel,
+            measurename, num_topics=num_topics, processes=processes)
+        for measurename in measurenames
+        if "collection topic model" in supported_timemap_measures[measurename] }
+
+def compute_timemap_measures(collectionmodel, measuremodel, measurenames,
+    num_topics=None, processes=1, chunk_size=timemap_chunk_size_default,
+    thresholds=None, batch_size=None, collection_topic_models=False):
+    """Computes every TimeMap measure named in `measurenames` in a single
+    pass over the TimeMaps stored in `collectionmodel`, storing the results
+    in `measuremodel`.
+
+    Each measure in supported_timemap_measures declares the representation
+    of memento content it scores, one of timemap_representations. Each
+    memento is loaded once per representation and that data is shared by
+    all of the measures using it, instead of every measure iterating
+    through the collection and loading every memento again.
+
+    The gensim measures use `num_topics` topics, or their default number
+    of topics if it is not set.
+
+    TimeMaps are scored by a pool of `processes` worker processes, or one
+    per CPU if `processes` is None. Boilerplate removal and tokenization
+    are finished for the whole collection first, so that the workers only
+    read from the working directory. The results of each TimeMap are
+    merged into `measuremodel` in the order of the TimeMaps, so that they
+    are those of a single process. Floating point scores may differ in
+    their last digits, as the token IDs given by the token cache depend on
+    the order in which mementos are tokenized.
+
+    The mementos of TimeMaps with more than `chunk_size` mementos are
+    divided among the workers in chunks of `chunk_size` mementos, so that
+    a single long TimeMap does not leave the other workers idle. Measures
+    that score all of the mementos of a TimeMap at once, like cosine, are
+    still computed by a single worker for each TimeMap.
+
+    If `thresholds` maps measure names to their thresholds, measures that
+    support it, like levenshtein and nlevenshtein, stop computing the
+    score of a memento once it is known to exceed the threshold. The score
+    stored for such a memento is then a lower bound of its score, which
+    still exceeds the threshold, so that the off-topic decision is the
+    same.
+
+    Measures that support it, like cosine, process the mementos of a
+    TimeMap in batches of `batch_size` tokens, or their default batch
+    size if it is not set, which bounds the memory they use no matter how
+    many mementos a TimeMap holds.
+
+    If `collection_topic_models` is True, the gensim measures use a single
+    topic model trained on the whole collection, which is kept in the
+    working directory and updated by later runs, see
+    prepare_collection_topic_model, instead of building a topic model for
+    each TimeMap.
+    """
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    # representation -> names of the measures scoring it
+    measures_by_representation = {}
+
+    for measurename in measurenames:
+        representation = supported_timemap_measures[measurename]["representation"]
+        measures_by_representation.setdefault(representation, []).append(measurename)
+
+    logger.info("Computing TimeMap measures {} for representations {}, "
+        "beginning TimeMap iteration...".format(
+            list(measurenames), list(measures_by_representation.keys())))
+
+    urits = collectionmodel.getTimeMapURIList()
+    urittotal = len(urits)
+
+    if processes < 2:
+
+        topic_models = _prepare_collection_topic_models(collectionmodel,
+            measurenames, num_topics, processes, collection_topic_models)
+
+        for uritcounter, urit in enumerate(urits, start=1):
+
+            logger.info("Processing TimeMap {} of {}".format(uritcounter, urittotal))
+
+            _compute_timemap_measures_for_TimeMap(collectionmodel, measuremodel,
+                urit, measures_by_representation, num_topics, thresholds,
+                batch_size, topic_models)
+
+        return measuremodel
+
+    logger.info("Processing {} TimeMaps using {} processes".format(
+        urittotal, processes))
+
+    settings = [ timemap_representations[representation]
+        for representation in measures_by_representation ]
+
+    if any( setting["remove_boilerplate"] for setting in settings ):
+        collectionmodel.prepareMementoContentWithoutBoilerplate(
+            processes=processes)
+
+    blocks = []
+
+    # the workers must share the resource tracker of this process, otherwise
+    # their own trackers unlink the shared memory blocks they attached to
+    # when they exit
+    resource_tracker.ensure_running()
+
+    pool = multiprocessing.Pool(processes,
+        initializer=_timemap_worker_initializer,
+        initargs=(type(collectionmodel), collectionmodel.working_directory,
+            get_text_pipeline().tokenizer))
+
+    try:
+
+        for setting in settings:
+
+            if setting["tokenize"]:
+                _prepare_token_cache(collectionmodel, pool, setting["stemming"],
+                    setting["remove_boilerplate"], batch_size=processes * 16)
+
+        topic_models = _prepare_collection_topic_models(collectionmodel,
+            measurenames, num_topics, processes, collection_topic_models)
+
+        # the workers open the collection model from the working directory
+        collectionmodel.flush()
+
+        for setting in settings:
+
+            if setting.get("simhash"):
+                _prepare_simhashes(collectionmodel, pool, setting)
+
+        tasks, results, blocks = _plan_timemap_tasks(collectionmodel, urits,
+            measures_by_representation, num_topics, chunk_size, thresholds,
+            batch_size, topic_models)
+
+        # the workers open the collection model from the working directory
+        collectionmodel.flush()
+
+        task_results = pool.imap(_timemap_worker, tasks)
+
+        for resultcounter, result in enumerate(results, start=1):
+
+            if result is None:
+                result = next(task_results)
+
+            logger.info("Merging result {} of {}".format(
+                resultcounter, len(results)))
+
+            measuremodel.update(result)
+
+    finally:
+        pool.close()
+        pool.join()
+
+        for block in blocks:
+            block.close()
+            block.unlink()
 
     return measuremodel
 
@@ -892,74 +2133,103 @@ supported_timemap_measures = {
     "cosine": {
         "name": "Cosine Similarity",
         "function": compute_cosine_across_TimeMap,
+        "representation": "stemmed token ids",
+        "documents scoredistance function": cosine_documents_scoredistance,
+        "default batch size": cosine_batch_size_default,
         "comparison direction": "<",
         "default threshold": 0.12
     },
     "bytecount": {
         "name": "Byte Count",
         "function": compute_bytecount_across_TimeMap,
+        "representation": "content length",
+        "scoredistance function": bytecount_scoredistance,
         "comparison direction": "<",
         "default threshold": -0.43
     },
     "wordcount": {
         "name": "Word Count",
         "function": compute_wordcount_across_TimeMap,
+        "representation": "stemmed tokens",
+        "scoredistance function": wordcount_scoredistance,
         "comparison direction": "<",
         "default threshold": -0.70
     },
     "tfintersection": {
         "name": "TF-Intersection",
         "function": compute_tfintersection_across_TimeMap,
+        "representation": "stemmed tokens",
+        "scoredistance function": tfintersection_scoredistance,
         "comparison direction": ">",
         "default threshold": 0.0
     },
     "jaccard": {
         "name": "Jaccard Distance",
         "function": compute_jaccard_across_TimeMap,
+        "representation": "stemmed token ids",
+        "documents scoredistance function": jaccard_documents_scoredistance,
         "comparison direction": ">",
         "default threshold": 0.96
     },
     "sorensen": {
         "name": "Sørensen-Dice Distance",
         "function": compute_sorensen_across_TimeMap,
+        "representation": "stemmed token ids",
+        "documents scoredistance function": sorensen_documents_scoredistance,
         "comparison direction": ">",
         "default threshold": 0.93
     },
     "raw_simhash": {
         "name": "Simhash on raw memento content",
         "function": compute_rawsimhash_across_TimeMap,
+        "representation": "raw simhash",
+        "scoredistance function": simhash_scoredistance,
         "comparison direction": ">",
         "default threshold": 38
     },
     "tf_simhash": {
         "name": "Simhash on term frequencies in memento",
         "function": compute_tfsimhash_across_TimeMap,
+        "representation": "stemmed token simhash",
+        "scoredistance function": simhash_scoredistance,
         "comparison direction": ">",
         "default threshold": 34
     },
     "gensim_lsi": {
         "name": "Latent Semantic Indexing with Gensim",
         "function": compute_gensim_lsi_across_TimeMap,
+        "representation": "stemmed token ids",
+        "documents scoredistance function": gensim_lsi_documents_scoredistance,
         "comparison direction": "<",
         "default threshold": 0.07,
-        "default number of topics": 10
+        "default number of topics": 10,
+        "collection topic model": models.LsiModel
     },
     "gensim_lda": {
         "name": "Latent Dirichlet Allocation with Gensim (EXPERIMENTAL)",
         "function": compute_gensim_lda_across_TimeMap,
+        "representation": "stemmed token ids",
+        "documents scoredistance function": gensim_lda_documents_scoredistance,
         "comparison direction": "<",
         "default threshold": 0.15,
-        "default number of topics": 2
+        "default number of topics": 2,
+        "collection topic model": models.LdaMulticore
     },
     "levenshtein": {
         "name": "Levenshtein Distance",
         "function": compute_levenshtein_across_TimeMap,
+        "representation": "stemmed token ids",
+        "scoredistance function": levenshtein_scoredistance,
+        "scoredistances function": levenshtein_scoredistances,
         "comparison direction": ">",
         "default threshold": 0.05
     },
     "nlevenshtein": {
         "name": "Normalized Levenshtein Distance",
         "function": compute_nlevenshtein_across_TimeMap,
+        "representation": "stemmed token ids",
+        "scoredistance function": nlevenshtein_scoredistance,
+        "scoredistances function": levenshtein_scoredistances,
         "comparison direction": ">",
         "default threshold": 0.05
     }
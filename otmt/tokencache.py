@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.tokencache
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module stores the tokenized content of mementos so that each memento
+is only tokenized once per collection, no matter how many measures use its
+tokens.
+
+Tokens are replaced by integer IDs from a vocabulary shared by all
+mementos. The IDs of each combination of stemming, boilerplate removal,
+and tokenizer are appended to one file of unsigned 32-bit integers, which is memory-mapped
+when read, and a CSV index records where the token stream of each URI-M
+begins and how many tokens it holds.
+
+IDs depend on the order in which mementos are first tokenized, so
+anything that must not, like Simhash fingerprints, uses the hash of each
+token given by get_token_hashes instead.
+"""
+
+import os
+import csv
+import json
+import logging
+import hashlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+token_id_dtype = np.dtype("<u4")
+
+def token_hash(token):
+    """Returns a 64-bit hash of the string `token` which, unlike its ID, is
+    the same in every token cache.
+    """
+
+    return int.from_bytes(
+        hashlib.blake2b(token.encode("utf8"), digest_size=8).digest(), 'little')
+
+class TokenCacheException(Exception):
+    """An exception class to be used by the functions in this file so that the
+    source of error can be detected.
+    """
+    pass
+
+def variant_name(stemming, remove_boilerplate, tokenizer="nltk"):
+    """Returns the name used for the files holding token streams produced
+    with the given `stemming`, `remove_boilerplate`, and `tokenizer`
+    settings.
+    """
+
+    name = "{}_{}".format(
+        "stemmed" if stemming else "unstemmed",
+        "noboilerplate" if remove_boilerplate else "raw"
+    )
+
+    if tokenizer != "nltk":
+        name = "{}_{}".format(name, tokenizer)
+
+    return name
+
+class TokenCache:
+    """
+        Stores token streams in `directory`, keyed by URI-M, stemming, and
+        boilerplate removal, as arrays of integer IDs into a shared
+        vocabulary.
+
+        Token streams are returned as read-only numpy arrays backed by a
+        memory map of the file they are stored in.
+
+        If `read_only` is True, nothing is written to `directory`. Token
+        streams stored with `put` and new tokens are then only kept in
+        memory, which allows several processes to share one token cache
+        while only one of them writes to it.
+    """
+
+    def __init__(self, directory, read_only=False):
+
+        self.directory = directory
+        self.read_only = read_only
+        self.vocabulary_filename = "{}/vocabulary.txt".format(directory)
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # ID -> token and token -> ID
+        self.vocabulary = []
+        self.token_ids = {}
+
+        # ID -> token_hash of the token, for the first `self.hashed` IDs,
+        # computed when first requested
+        self.token_hashes = np.zeros(0, dtype=np.uint64)
+        self.hashed = 0
+
+        if os.path.exists(self.vocabulary_filename):
+
+            with open(self.vocabulary_filename, encoding="utf8") as f:
+
+                for line in f:
+                    token = json.loads(line)
+                    self.token_ids[token] = len(self.vocabulary)
+                    self.vocabulary.append(token)
+
+        if read_only:
+            self.vocabulary_file = None
+        else:
+            self.vocabulary_file = open(self.vocabulary_filename, 'a', encoding="utf8")
+
+        # variant name -> dict of the index, files, and memory map for it
+        self.variants = {}
+
+    def __del__(self):
+
+        self.close()
+
+    def close(self):
+        """Closes all files held open by this object."""
+
+        if getattr(self, "vocabulary_file", None) is not None:
+            self.vocabulary_file.close()
+            self.vocabulary_file = None
+
+        for variant in getattr(self, "variants", {}).values():
+
+            if variant["datafile"] is not None:
+                variant["datafile"].close()
+                variant["indexfile"].close()
+
+        self.variants = {}
+
+    def _get_variant(self, stemming, remove_boilerplate, tokenizer):
+
+        name = variant_name(stemming, remove_boilerplate, tokenizer)
+
+        if name in self.variants:
+            return self.variants[name]
+
+        data_filename = "{}/{}.ids".format(self.directory, name)
+        index_filename = "{}/{}.csv".format(self.directory, name)
+
+        # URI-M -> (offset, length), both counted in tokens
+        index = {}
+        end = 0
+
+        if os.path.exists(index_filename):
+
+            with open(index_filename) as f:
+
+                for row in csv.reader(f):
+                    offset = int(row[1])
+                    length = int(row[2])
+                    index[row[0]] = (offset, length)
+                    end = max(end, offset + length)
+
+        variant = {
+            "data filename": data_filename,
+            "index": index,
+            "end": end,
+            "map": None,
+            "datafile": None,
+            "indexfile": None,
+            # token streams stored while read-only
+            "memory": {}
+        }
+
+        if not self.read_only:
+
+            # discard any IDs written without a corresponding index entry,
+            # e.g., because of a crash, so that new token streams stay aligned
+            with open(data_filename, 'ab') as datafile:
+                datafile.truncate(end * token_id_dtype.itemsize)
+
+            variant["datafile"] = open(data_filename, 'ab')
+            variant["indexfile"] = open(index_filename, 'a')
+            variant["indexwriter"] = csv.writer(variant["indexfile"])
+
+        self.variants[name] = variant
+
+        return variant
+
+    def contains(self, urim, stemming=True, remove_boilerplate=True,
+        tokenizer="nltk"):
+        """Returns True if a token stream for `urim` is stored in this object
+        for the given `stemming`, `remove_boilerplate`, and `tokenizer`
+        settings.
+        """
+
+        variant = self._get_variant(stemming, remove_boilerplate, tokenizer)
+
+        return urim in variant["index"] or urim in variant["memory"]
+
+    def get(self, urim, stemming=True, remove_boilerplate=True,
+        tokenizer="nltk"):
+        """Returns the token IDs stored for `urim` with the given `stemming`,
+        `remove_boilerplate`, and `tokenizer` settings, or None if none were
+        stored.
+        """
+
+        variant = self._get_variant(stemming, remove_boilerplate, tokenizer)
+
+        if urim in variant["memory"]:
+            return variant["memory"][urim]
+
+        try:
+            offset, length = variant["index"][urim]
+        except KeyError:
+            return None
+
+        if length == 0:
+            return np.zeros(0, dtype=token_id_dtype)
+
+        if variant["map"] is None or len(variant["map"]) < offset + length:
+            # the file has grown since it was last mapped
+            variant["map"] = np.memmap(variant["data filename"],
+                dtype=token_id_dtype, mode='r')
+
+        return variant["map"][offset:offset + length]
+
+    def put(self, urim, tokens, stemming=True, remove_boilerplate=True,
+        tokenizer="nltk"):
+        """Stores the list of `tokens` for `urim` with the given `stemming`,
+        `remove_boilerplate`, and `tokenizer` settings, returning their token
+        IDs.
+        """
+
+        variant = self._get_variant(stemming, remove_boilerplate, tokenizer)
+
+        token_ids = np.fromiter(
+            ( self.get_token_id(token) for token in tokens ),
+            dtype=token_id_dtype
+        )
+
+        if self.read_only:
+            variant["memory"][urim] = token_ids
+            return token_ids
+
+        # the vocabulary must be on disk before any token stream that uses it
+        self.vocabulary_file.flush()
+
+        offset = variant["end"]
+
+        variant["datafile"].write(token_ids.tobytes())
+        variant["datafile"].flush()
+
+        variant["index"][urim] = (offset, len(token_ids))
+        variant["end"] = offset + len(token_ids)
+
+        variant["indexwriter"].writerow([urim, offset, len(token_ids)])
+        variant["indexfile"].flush()
+
+        return token_ids
+
+    def get_token_id(self, token):
+        """Returns the ID of `token`, adding it to the vocabulary if it is not
+        yet part of it.
+        """
+
+        try:
+            return self.token_ids[token]
+
+        except KeyError:
+
+            if len(self.vocabulary) > np.iinfo(token_id_dtype).max:
+                raise TokenCacheException(
+                    "The vocabulary in {} is full".format(self.directory))
+
+            token_id = len(self.vocabulary)
+
+            self.token_ids[token] = token_id
+            self.vocabulary.append(token)
+
+            if self.vocabulary_file is not None:
+                self.vocabulary_file.write("{}\n".format(json.dumps(token)))
+
+            return token_id
+
+    def get_token_hashes(self, token_ids):
+        """Returns an array holding the token_hash of the token of each of
+        `token_ids`.
+        """
+
+        if self.hashed < len(self.vocabulary):
+
+            if len(self.vocabulary) > len(self.token_hashes):
+                grown = np.zeros(max(1024, 2 * len(self.token_hashes),
+                    len(self.vocabulary)), dtype=np.uint64)
+                grown[:self.hashed] = self.token_hashes[:self.hashed]
+                self.token_hashes = grown
+
+            self.token_hashes[self.hashed:len(self.vocabulary)] = [
+                token_hash(token) for token in self.vocabulary[self.hashed:] ]
+            self.hashed = len(self.vocabulary)
+
+        return self.token_hashes[np.asarray(token_ids, dtype=np.int64)]
+
+    def get_tokens(self, token_ids):
+        """Converts the sequence of `token_ids` back into a list of tokens."""
+
+        vocabulary = self.vocabulary
+
+        return [ vocabulary[token_id] for token_id in token_ids.tolist() ]
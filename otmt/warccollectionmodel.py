@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.warccollectionmodel
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains a CollectionModel that appends each memento to a
+series of size-rotated WARC files instead of writing an .orig and a
+_headers.json file for every URI-M. A small CSV index maps each URI-M to the
+WARC file, offset, and length of its record, so that content is read back
+by seeking directly to the record.
+
+TimeMaps and memento errors are still stored as CollectionModel stores them.
+
+The WARC files written here can be given to the warc input type.
+"""
+
+import os
+import csv
+import glob
+import logging
+import hashlib
+
+from io import BytesIO
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from http.client import responses
+
+from warcio.warcwriter import WARCWriter
+from warcio.statusandheaders import StatusAndHeaders
+from warcio.archiveiterator import ArchiveIterator
+
+from .collectionmodel import CollectionModel, CollectionModelException, \
+    timemap_cache_size_default, truncate_partial_row
+
+logger = logging.getLogger(__name__)
+
+# these headers describe the transfer of the original response, not the
+# decoded content we store, so they are renamed in order to keep the
+# records readable by other WARC tools
+renamed_header_prefix = "X-OTMT-Orig-"
+renamed_headers = [ "content-encoding", "transfer-encoding", "content-length" ]
+
+max_warc_size_default = 1024 * 1024 * 1024
+
+def generate_http_headers(headers):
+    """Converts the `headers` dict given to addMemento into the warcio
+    StatusAndHeaders object written as part of the WARC response record.
+    """
+
+    status = 200
+    header_list = []
+
+    for key, value in headers.items():
+
+        if key == "http-status":
+            status = int(value)
+            continue
+
+        if key.lower() in renamed_headers:
+            key = "{}{}".format(renamed_header_prefix, key)
+
+        header_list.append( (key, str(value)) )
+
+    statusline = "{} {}".format(status, responses.get(status, "Unknown"))
+
+    return StatusAndHeaders(statusline, header_list, protocol="HTTP/1.1")
+
+def extract_headers(http_headers):
+    """Converts the StatusAndHeaders object of a WARC response record back
+    into the `headers` dict that was given to addMemento.
+    """
+
+    headers = {}
+
+    for key, value in http_headers.headers:
+
+        if key.startswith(renamed_header_prefix):
+            key = key[len(renamed_header_prefix):]
+
+        headers[key] = value
+
+    headers["http-status"] = int(http_headers.get_statuscode())
+
+    return headers
+
+def generate_warc_date(headers):
+    """Returns the WARC-Date for a memento, using its Memento-Datetime header
+    if it has one.
+    """
+
+    for key, value in headers.items():
+
+        if key.lower() == "memento-datetime":
+
+            try:
+                return parsedate_to_datetime(value).strftime("%Y-%m-%dT%H:%M:%SZ")
+            except (TypeError, ValueError):
+                logger.warning("Could not parse Memento-Datetime {}, using "
+                    "the current time for WARC-Date".format(value))
+
+    return datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+class WARCCollectionModel(CollectionModel):
+    """
+        A CollectionModel that stores memento content and headers as
+        response records in WARC files within the warcs directory of
+        `working_directory`.
+
+        A new WARC file is started once the current one reaches
+        `max_warc_size` bytes. Records are always gzip compressed, as the
+        warc input type expects, so `compression` can only be None or
+        "gzip", any other value raises CollectionModelException.
+
+        If `read_only` is True, no WARC file or index is opened for
+        writing, see CollectionModel.
+    """
+
+    def __init__(self, working_directory, compression=None,
+        timemap_cache_size=timemap_cache_size_default,
+        max_warc_size=max_warc_size_default, read_only=False):
+
+        if compression not in (None, "gzip"):
+            raise CollectionModelException("WARC records are gzip compressed, "
+                "compression {} is not supported".format(compression))
+
+        self.warc_directory = "{}/warcs".format(working_directory)
+        self.warc_index_filename = "{}/index.csv".format(self.warc_directory)
+        self.max_warc_size = max_warc_size
+
+        # URI-M -> (WARC filename, offset, length)
+        self.warc_index = {}
+
+        if not read_only:
+            truncate_partial_row(self.warc_index_filename)
+
+        super().__init__(working_directory, compression=compression,
+            timemap_cache_size=timemap_cache_size, read_only=read_only)
+
+        self.current_warc = None
+        self.warc_index_file = None
+
+        if read_only:
+            return
+
+        if not os.path.exists(self.warc_directory):
+            os.makedirs(self.warc_directory)
+
+        warcfiles = sorted(glob.glob("{}/mementos-*.warc.gz".format(
+            self.warc_directory)))
+
+        self.current_warc_number = len(warcfiles)
+
+        if self.current_warc_number == 0:
+            self.current_warc_number = 1
+
+        self.open_current_warc()
+
+        self.warc_index_file = open(self.warc_index_filename, 'a')
+        self.warc_index_csvwriter = csv.writer(self.warc_index_file)
+
+    def __del__(self):
+
+        super().__del__()
+
+        if getattr(self, "current_warc", None) is not None:
+            self.current_warc.close()
+
+        if getattr(self, "warc_index_file", None) is not None:
+            self.warc_index_file.close()
+
+    def warc_filename(self, number):
+        """Returns the name of WARC file number `number`."""
+
+        return "mementos-{:05d}.warc.gz".format(number)
+
+    def open_current_warc(self):
+
+        if self.current_warc is not None:
+            self.current_warc.close()
+
+        self.current_warc_filename = self.warc_filename(self.current_warc_number)
+
+        self.current_warc = open("{}/{}".format(
+            self.warc_directory, self.current_warc_filename), 'ab')
+
+        self.warc_writer = WARCWriter(self.current_warc, gzip=True)
+
+    def load_data_from_directory(self):
+        """
+            Loads data from a previous run of this class.
+        """
+
+        super().load_data_from_directory()
+
+        if not os.path.exists(self.warc_index_filename):
+            return
+
+        with open(self.warc_index_filename) as f:
+
+            # a final line without a line ending is a row still being
+            # written, or left behind by a crash
+            for row in csv.reader( line for line in f if line.endswith("\n") ):
+
+                if len(row) < 4 or not all(value.isdigit() for value in row[2:5]):
+                    logger.warning("skipping invalid WARC index row {}".format(row))
+                    continue
+
+                urim = row[0]
+
+                self.warc_index[urim] = (row[1], int(row[2]), int(row[3]))
+
+                if len(row) > 4:
+                    self.memento_lengths[urim] = int(row[4])
+
+                self.urimap["mementos"][urim] = \
+                    hashlib.sha3_256(bytes(urim, "utf8")).hexdigest()
+
+    def addMemento(self, urim, content, headers):
+        """Adds Memento `content` specified by `urim` to the object, along
+        with its headers, as a WARC response record.
+        """
+
+        self._check_writable()
+
+        if self.current_warc.tell() >= self.max_warc_size:
+            self.current_warc_number += 1
+            self.open_current_warc()
+
+        record = self.warc_writer.create_warc_record(
+            urim, "response", payload=BytesIO(content),
+            http_headers=generate_http_headers(headers),
+            warc_headers_dict={ "WARC-Date": generate_warc_date(headers) }
+        )
+
+        offset = self.current_warc.tell()
+        self.warc_writer.write_record(record)
+        self.current_warc.flush()
+        length = self.current_warc.tell() - offset
+
+        self.warc_index[urim] = (self.current_warc_filename, offset, length)
+        self.memento_lengths[urim] = len(content)
+        self.urimap["mementos"][urim] = \
+            hashlib.sha3_256(bytes(urim, "utf8")).hexdigest()
+
+        self.warc_index_csvwriter.writerow(
+            [urim, self.current_warc_filename, offset, length, len(content)])
+        self.warc_index_file.flush()
+
+    def _read_warc_record(self, urim):
+        """Returns the content and headers of the WARC record for `urim`.
+
+        Raises KeyError if `urim` is not stored in this object.
+        """
+
+        warcfilename, offset, length = self.warc_index[urim]
+
+        with open("{}/{}".format(self.warc_directory, warcfilename), 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+
+        for record in ArchiveIterator(BytesIO(data)):
+            return record.raw_stream.read(), extract_headers(record.http_headers)
+
+        raise CollectionModelException(
+            "No WARC record found for URI-M {} in {} at offset {}".format(
+                urim, warcfilename, offset))
+
+    def _read_memento_content(self, urim):
+
+        if urim in self.warc_index:
+            return self._read_warc_record(urim)[0]
+
+        return super()._read_memento_content(urim)
+
+    def _read_memento_content_view(self, urim):
+
+        if urim in self.warc_index:
+            return memoryview(self._read_warc_record(urim)[0])
+
+        return super()._read_memento_content_view(urim)
+
+    def getHeaders(self, objecttype, uri):
+        """Returns the headers associated with URI `uri`.
+        `objecttype` must be set to timemaps if headers
+        for a TimeMap are desired.
+        """
+
+        if objecttype == "mementos" and uri in self.warc_index:
+            return self._read_warc_record(uri)[1]
+
+        return super().getHeaders(objecttype, uri)
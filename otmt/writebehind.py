@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+"""
+otmt.writebehind
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module moves the small file writes made while storing mementos off of
+the thread that downloads them. Writes are queued and carried out by a
+background thread in batches, and the index files given to the writer are
+flushed once per batch rather than once per write.
+
+Durability: writes are carried out in the order they were submitted, and an
+index file is only flushed after every write of its batch completed. If the
+process crashes, the index files therefore only describe data that was
+completely written, and the data recorded in them up to the last completed
+batch can be loaded again. Anything queued after that batch is lost.
+"""
+
+import queue
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+max_queue_size_default = 1000
+batch_size_default = 100
+
+class WriteBehindWriterException(Exception):
+    """An exception indicating that a queued write failed, raised by the next
+    call to the writer after the failure.
+    """
+    pass
+
+class WriteBehindWriter:
+    """
+        Carries out writes, given as a function and its arguments, on a
+        background thread.
+
+        No more than `max_queue_size` writes wait at once, `submit` blocks
+        until there is room. After every batch of up to `batch_size` writes
+        the files in `index_files` are flushed.
+    """
+
+    def __init__(self, index_files, max_queue_size=max_queue_size_default,
+        batch_size=batch_size_default):
+
+        self.index_files = index_files
+        self.batch_size = batch_size
+
+        self.queue = queue.Queue(maxsize=max_queue_size)
+
+        # key -> number of queued writes for that key that have not yet
+        # been flushed
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+
+        self.error = None
+        self.closed = False
+
+        self.thread = threading.Thread(target=self._run, daemon=True,
+            name="WriteBehindWriter")
+        self.thread.start()
+
+        # the thread is a daemon so that it never keeps the interpreter
+        # alive, queued writes are still completed at exit
+        atexit.register(self.close)
+
+    def _run(self):
+
+        while True:
+
+            batch = [ self.queue.get() ]
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = False
+
+            for item in batch:
+
+                if item is None:
+                    stopping = True
+                    continue
+
+                key, function, args = item
+
+                # once a write fails, later writes are skipped so that the
+                # index files never describe data written after the failure
+                if self.error is None:
+
+                    try:
+                        function(*args)
+                    except Exception as e:
+                        logger.exception("write for {} failed".format(key))
+                        self.error = e
+
+            if self.error is None:
+
+                for f in self.index_files:
+                    f.flush()
+
+            with self.pending_lock:
+
+                for item in batch:
+
+                    if item is not None:
+                        key = item[0]
+                        self.pending[key] -= 1
+
+                        if self.pending[key] == 0:
+                            del self.pending[key]
+
+            for item in batch:
+                self.queue.task_done()
+
+            if stopping:
+                break
+
+    def _raise_error(self):
+
+        if self.error is not None:
+            raise WriteBehindWriterException(
+                "a queued write failed: {}".format(repr(self.error)))
+
+    def submit(self, key, function, *args):
+        """Queues a call of `function` with `args`, identified by `key`, so
+        that `is_pending` can report whether it has been flushed.
+        """
+
+        self._raise_error()
+
+        if self.closed:
+            raise WriteBehindWriterException("this writer has been closed")
+
+        with self.pending_lock:
+            self.pending[key] = self.pending.get(key, 0) + 1
+
+        self.queue.put( (key, function, args) )
+
+    def is_pending(self, key):
+        """Returns True if writes identified by `key` have not yet been
+        flushed.
+        """
+
+        with self.pending_lock:
+            return key in self.pending
+
+    def flush(self):
+        """Blocks until all queued writes are complete and flushed."""
+
+        if not self.closed:
+            self.queue.join()
+
+        self._raise_error()
+
+    def close(self):
+        """Completes and flushes all queued writes and stops the background
+        thread.
+        """
+
+        if self.closed:
+            return
+
+        self.closed = True
+
+        self.queue.put(None)
+        self.thread.join()
+
+        atexit.unregister(self.close)
+
+        self._raise_error()
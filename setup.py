@@ -66,9 +66,11 @@ setup(
         'requests_futures',
         'scikit-learn',
         'scipy',
-        'simhash',
         'warcio'
     ],
+    extras_require={
+        'zstd': ['zstandard']
+    },
     setup_requires=['nltk'],
     test_suite="tests",
     zip_safe=True,
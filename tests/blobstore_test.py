@@ -0,0 +1,73 @@
+import os
+import shutil
+import hashlib
+import unittest
+
+from otmt.blobstore import BlobStore, BlobStoreException, \
+    BlobStoreNoSuchBlobException, supported_compression_types
+
+class TestingBlobStore(unittest.TestCase):
+
+    def test_put_get_all_compression_types(self):
+
+        for compression in supported_compression_types:
+
+            if compression == "zstd":
+                try:
+                    import zstandard
+                    zstandard # here to shut up pylint
+                except ImportError:
+                    continue
+
+            directory = "/tmp/blobstore_test/test_put_get_{}".format(compression)
+
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+
+            bs = BlobStore(directory, compression=compression)
+
+            content = b"<html><body>some content</body></html>" * 100
+
+            digest = bs.put(content)
+
+            self.assertEqual( digest, hashlib.sha3_256(content).hexdigest() )
+            self.assertTrue( bs.exists(digest) )
+            self.assertEqual( bs.get(digest), content )
+
+            # storing the same content again returns the same digest
+            self.assertEqual( bs.put(content), digest )
+
+            shutil.rmtree(directory)
+
+    def test_compression_is_remembered(self):
+
+        directory = "/tmp/blobstore_test/test_compression_is_remembered"
+
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+
+        bs = BlobStore(directory, compression="none")
+        digest = bs.put(b"content")
+
+        bs = BlobStore(directory, compression="gzip")
+
+        self.assertEqual( bs.compression, "none" )
+        self.assertEqual( bs.get(digest), b"content" )
+
+        shutil.rmtree(directory)
+
+    def test_missing_blob(self):
+
+        directory = "/tmp/blobstore_test/test_missing_blob"
+
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+
+        bs = BlobStore(directory, compression="gzip")
+
+        self.assertRaises( BlobStoreNoSuchBlobException, bs.get, "nosuchdigest" )
+
+        self.assertRaises( BlobStoreException, BlobStore, 
+            "/tmp/blobstore_test/test_bad_compression", compression="lzma" )
+
+        shutil.rmtree(directory)
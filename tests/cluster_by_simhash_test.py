@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import runpy
+import shutil
+import unittest
+
+from unittest import mock
+
+script_filename = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    "..", "bin", "cluster_by_simhash")
+
+class TestingClusterBySimhash(unittest.TestCase):
+
+    def run_script(self, *arguments):
+
+        working_directory = "/tmp/cluster_by_simhash_test/{}".format(
+            self._testMethodName)
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        os.makedirs(working_directory)
+
+        output = {
+            "timemap1": {
+                "memento1": { "raw memento simhash value": 0b1111 },
+                "memento2": { "raw memento simhash value": 0b1110 },
+                "memento3": { "raw memento simhash value": 0b1111 },
+                "memento4": { "raw memento simhash value": "No Simhash due to error" },
+                "memento5": { "raw memento simhash value": "No Simhash due to error" }
+            }
+        }
+
+        with open("{}/output.json".format(working_directory), 'w') as f:
+            json.dump(output, f)
+
+        with open("{}/slices.tsv".format(working_directory), 'w') as f:
+            for urim in output["timemap1"]:
+                f.write("0\t{}\n".format(urim))
+
+        argv = [ script_filename,
+            "-i", "{}/output.json".format(working_directory),
+            "-s", "{}/slices.tsv".format(working_directory),
+            "-o", "{}/clusters.tsv".format(working_directory) ] + list(arguments)
+
+        with mock.patch.object(sys, "argv", argv):
+            runpy.run_path(script_filename, run_name="__main__")
+
+        with open("{}/clusters.tsv".format(working_directory)) as f:
+            clusters = { urim: int(cluster) for slice_number, cluster, urim in
+                ( line.strip().split('\t') for line in f ) }
+
+        shutil.rmtree(working_directory)
+
+        return clusters
+
+    def test_identical_simhashes_by_default(self):
+
+        self.assertEqual( self.run_script(), {
+            "memento1": 0, "memento2": -1, "memento3": 0,
+            "memento4": -1, "memento5": -1 } )
+
+    def test_threshold(self):
+
+        # 0.02 of 64 bits is 1 bit
+        self.assertEqual( self.run_script("-t", "0.02"), {
+            "memento1": 0, "memento2": 0, "memento3": 0,
+            "memento4": -1, "memento5": -1 } )
@@ -4,6 +4,8 @@ import os
 import hashlib
 import shutil
 import zipfile
+import mmap
+import glob
 
 import pprint
 
@@ -14,6 +16,7 @@ from datetime import datetime
 import lxml.etree
 
 from otmt import collectionmodel
+from otmt.blobstore import sharded_filename
 
 # Disabled this pylint rule because of too many false positives
 # Ref: http://pylint-messages.wikidot.com/messages:e1101
@@ -126,9 +129,9 @@ class TestingCollectionModel(unittest.TestCase):
         testurit2filename_digest = hashlib.sha3_256(bytes(testurit2, "utf8")).hexdigest()
 
         files_to_check = [
-            "{}/{}_headers.json".format( timemap_directory, testurit2filename_digest ),
-            "{}/{}.json".format( timemap_directory, testurit2filename_digest ),
-            "{}/{}.orig".format( timemap_directory, testurit2filename_digest )
+            sharded_filename( timemap_directory, "{}_headers.json".format(testurit2filename_digest) ),
+            sharded_filename( timemap_directory, "{}.json".format(testurit2filename_digest) ),
+            sharded_filename( timemap_directory, "{}.orig".format(testurit2filename_digest) )
         ]
 
         cm.addTimeMap(testurit2, testtimemap2, testtimemapheaders )
@@ -173,10 +176,11 @@ class TestingCollectionModel(unittest.TestCase):
         self.assertEqual(cm.getMementoContentWithoutBoilerplate(testurim1), b"mementotext\n")
 
         filename_digest = hashlib.sha3_256(bytes(testurim1, "utf8")).hexdigest()
+        blob_digest = hashlib.sha3_256(testmemcontent).hexdigest()
 
         files_to_check = [
-            "{}/{}_headers.json".format( memento_directory, filename_digest ),
-            "{}/{}.orig".format( memento_directory, filename_digest )
+            sharded_filename( memento_directory, "{}_headers.json".format(filename_digest) ),
+            cm.blobstore.blob_filename(blob_digest)
         ]
 
         self.check_fileobjects_exist(files_to_check)
@@ -206,9 +210,9 @@ class TestingCollectionModel(unittest.TestCase):
         cm.addMementoError(uri, content, headers, errorinformation)
 
         files_to_check = [
-            "{}/{}_error_info.txt".format( memento_error_directory, filename_digest ),
-            "{}/{}_headers.json".format( memento_error_directory, filename_digest ),
-            "{}/{}.orig".format( memento_error_directory, filename_digest )
+            sharded_filename( memento_error_directory, "{}_error_info.txt".format(filename_digest) ),
+            sharded_filename( memento_error_directory, "{}_headers.json".format(filename_digest) ),
+            sharded_filename( memento_error_directory, "{}.orig".format(filename_digest) )
         ]
 
         self.assertRaises( collectionmodel.CollectionModelMementoErrorException,
@@ -231,6 +235,8 @@ class TestingCollectionModel(unittest.TestCase):
 
         self.check_fileobjects_exist(files_to_check)
 
+        cm.close()
+
         shutil.rmtree(working_directory)
 
     def test_string_not_bytes_memento(self):
@@ -258,16 +264,55 @@ class TestingCollectionModel(unittest.TestCase):
         self.assertEqual(cm.getMementoContent(testurim1), testmemcontent)
 
         filename_digest = hashlib.sha3_256(bytes(testurim1, "utf8")).hexdigest()
+        blob_digest = hashlib.sha3_256(testmemcontent).hexdigest()
 
         files_to_check = [
-            "{}/{}_headers.json".format( memento_directory, filename_digest ),
-            "{}/{}.orig".format( memento_directory, filename_digest )
+            sharded_filename( memento_directory, "{}_headers.json".format(filename_digest) ),
+            cm.blobstore.blob_filename(blob_digest)
         ]
 
         self.check_fileobjects_exist(files_to_check)
 
         shutil.rmtree(working_directory)
 
+    def test_mementos_share_content(self):
+
+        working_directory="/tmp/collectionmodel_test/test_mementos_share_content"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        headers = {
+            "key1": "value1"
+        }
+
+        content = b"<html><body>the same content</body></html>"
+
+        cm.addMemento("testing-storage:memento1", content, headers)
+        cm.addMemento("testing-storage:memento2", content, headers)
+        cm.addMemento("testing-storage:memento3", b"<html><body>other</body></html>", headers)
+
+        cm.flush()
+
+        self.assertEqual( len(os.listdir(cm.blob_directory)), 3 ) # 2 blobs + config
+
+        self.assertEqual( cm.getMementoContent("testing-storage:memento1"), content )
+        self.assertEqual( cm.getMementoContent("testing-storage:memento2"), content )
+        self.assertEqual( cm.getMementoContentWithoutBoilerplate("testing-storage:memento2"),
+            b"the same content\n" )
+
+        del cm
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        self.assertEqual( cm.getMementoContent("testing-storage:memento2"), content )
+        self.assertEqual( cm.getMementoContent("testing-storage:memento3"), 
+            b"<html><body>other</body></html>" )
+
+        shutil.rmtree(working_directory)
+
     def test_missing_memento(self):
 
         working_directory="/tmp/collectionmodel_test/test_missing_memento"
@@ -425,6 +470,95 @@ class TestingCollectionModel(unittest.TestCase):
 
         shutil.rmtree(test_directory)
 
+    def test_timemaps_loaded_lazily(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_timemaps_loaded_lazily"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        timemap_template = """<original{0}>; rel="original",
+<timemap{0}>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate{0}>; rel="timegate",
+<memento{0}1>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento{0}2>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory,
+            timemap_cache_size=2)
+
+        for i in range(0, 5):
+            cm.addTimeMap("timemap{}".format(i), timemap_template.format(i), {})
+
+        self.assertEqual( len(cm.collection_timemaps), 2 )
+
+        del cm
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory,
+            timemap_cache_size=2)
+
+        self.assertEqual( len(cm.collection_timemaps), 0 )
+        self.assertEqual( len(cm.getTimeMapURIList()), 5 )
+
+        for i in range(0, 5):
+            timemap = cm.getTimeMap("timemap{}".format(i))
+            self.assertEqual( timemap["mementos"]["first"]["uri"], "memento{}1".format(i) )
+            self.assertEqual( timemap["mementos"]["last"]["datetime"],
+                datetime(2018, 1, 21, 15, 45, 12) )
+
+        self.assertEqual( list(cm.collection_timemaps.keys()), ["timemap3", "timemap4"] )
+
+        self.assertRaises( collectionmodel.CollectionModelNoSuchTimeMapException,
+            cm.getTimeMap, "timemap5" )
+
+        shutil.rmtree(working_directory)
+
+    def test_timemaps_and_uri_lists_are_read_only(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_read_only_views"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        timemap_content = """<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        cm.addTimeMap("timemap1", timemap_content, {})
+        cm.addMemento("memento11", b"<html><body>hi</body></html>", {})
+
+        timemap = cm.getTimeMap("timemap1")
+
+        # no copies are made
+        self.assertIs( timemap, cm.getTimeMap("timemap1") )
+        self.assertIs( cm.getMementoURIList(), cm.getMementoURIList() )
+
+        with self.assertRaises(TypeError):
+            timemap["mementos"]["list"].append({ "uri": "memento13" })
+
+        with self.assertRaises(TypeError):
+            timemap["mementos"]["first"]["uri"] = "memento12"
+
+        with self.assertRaises(TypeError):
+            cm.getTimeMapURIList().append("timemap2")
+
+        self.assertEqual( len(timemap["mementos"]["list"]), 2 )
+
+        urimlist = cm.getMementoURIList()
+        cm.addMemento("memento12", b"<html><body>hi</body></html>", {})
+
+        self.assertEqual( urimlist, ["memento11"] )
+        self.assertEqual( cm.getMementoURIList(), ["memento11", "memento12"] )
+
+        cm.close()
+
+        shutil.rmtree(working_directory)
+
     def test_problematic_timemap(self):
 
         timemapcontent="""<http://digitalinnovations.ucla.edu/>; rel="original",
@@ -548,4 +682,239 @@ class TestingCollectionModel(unittest.TestCase):
                 "http://arxiv.example.net/web/20000621044156/http://a.example.org")
             data # here to shut up pylint
 
-        shutil.rmtree(working_directory)
\ No newline at end of file
+        shutil.rmtree(working_directory)
+    def test_prepare_boilerplate(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_prepare_boilerplate"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        cm.addMemento("testing-storage:memento1", b"<html><body>hi</body></html>", {})
+        cm.addMemento("testing-storage:memento2", b"<html><body>hi</body></html>", {})
+        cm.addMemento("testing-storage:memento3", b"<html><body>bye</body></html>", {})
+        cm.addMemento("testing-storage:memento4", b"", {})
+        cm.addMementoError("testing-storage:memento5", b"", {}, b"ERROR MESSAGE")
+
+        failures = cm.prepareMementoContentWithoutBoilerplate(processes=2)
+
+        self.assertEqual( list(failures.keys()), ["testing-storage:memento4"] )
+
+        for urim in ["testing-storage:memento1", "testing-storage:memento2"]:
+            self.assertTrue( os.path.exists(cm._get_boilerplate_filename(urim)) )
+
+        # a second run has nothing left to do
+        self.assertEqual( cm.prepareMementoContentWithoutBoilerplate(processes=2), {} )
+
+        del cm
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        self.assertEqual( cm.getMementoContentWithoutBoilerplate(
+            "testing-storage:memento2"), b"hi\n" )
+        self.assertEqual( cm.getMementoContentWithoutBoilerplate(
+            "testing-storage:memento3"), b"bye\n" )
+
+        with self.assertRaises(collectionmodel.CollectionModelBoilerPlateRemovalFailureException) as context:
+            cm.getMementoContentWithoutBoilerplate("testing-storage:memento4")
+
+        self.assertEqual( repr(context.exception),
+            repr(collectionmodel.CollectionModelBoilerPlateRemovalFailureException(
+                failures["testing-storage:memento4"])) )
+
+        shutil.rmtree(working_directory)
+
+    def test_resume_after_crash(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_resume_after_crash"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        cm.addMemento("testing-storage:memento1", b"<html><body>hi</body></html>", {})
+        cm.addMementoError("testing-storage:memento2", b"", {}, b"ERROR MESSAGE")
+
+        cm.close()
+
+        # simulate a crash in the middle of writing a row
+        with open("{}/mementos/metadata.csv".format(working_directory), 'a') as f:
+            f.write("testing-storage:memento3,0123")
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        self.assertEqual( cm.getMementoURIList(), ["testing-storage:memento1"] )
+
+        cm.addMemento("testing-storage:memento4", b"<html><body>bye</body></html>", {})
+
+        cm.close()
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory,
+            write_queue_size=0)
+
+        self.assertEqual( cm.getMementoURIList(),
+            ["testing-storage:memento1", "testing-storage:memento4"] )
+        self.assertEqual( cm.getMementoContent("testing-storage:memento4"),
+            b"<html><body>bye</body></html>" )
+        self.assertEqual( cm.getMementoErrorInformation("testing-storage:memento2"),
+            b"ERROR MESSAGE" )
+
+        cm.close()
+
+        shutil.rmtree(working_directory)
+
+    def test_read_only(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_read_only"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        with self.assertRaises(collectionmodel.CollectionModelException):
+            collectionmodel.CollectionModel(working_directory=working_directory,
+                read_only=True)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        cm.addMemento("testing-storage:memento1",
+            b"<html><body><p>hi</p></body></html>", {})
+
+        cm.flush()
+
+        # a row still being written by the process owning the collection
+        metadatafilename = "{}/mementos/metadata.csv".format(working_directory)
+
+        with open(metadatafilename, 'a') as f:
+            f.write("testing-storage:memento2,0123")
+
+        with open(metadatafilename, 'rb') as f:
+            metadata = f.read()
+
+        reader = collectionmodel.CollectionModel(
+            working_directory=working_directory, read_only=True)
+
+        self.assertIsNone( reader.writer )
+        self.assertEqual( reader.getMementoURIList(), ["testing-storage:memento1"] )
+        self.assertEqual( reader.getMementoContent("testing-storage:memento1"),
+            b"<html><body><p>hi</p></body></html>" )
+        self.assertTrue( reader.getTokenCache().read_only )
+
+        reader.getMementoContentWithoutBoilerplate("testing-storage:memento1")
+
+        with self.assertRaises(collectionmodel.CollectionModelException):
+            reader.addMemento("testing-storage:memento3", b"bye", {})
+
+        reader.close()
+
+        with open(metadatafilename, 'rb') as f:
+            self.assertEqual( f.read(), metadata )
+
+        self.assertEqual( glob.glob("{}/**/*.noboilerplate".format(
+            working_directory), recursive=True), [] )
+
+        cm.close()
+
+        shutil.rmtree(working_directory)
+
+    def test_migrate_to_sharded_layout(self):
+
+        testdatafile="{}/testdata/test_loaddata.zip".format(
+            os.path.dirname(os.path.realpath(__file__))
+        )
+
+        test_directory = "/tmp/collectionmodel_test/test_migrate"
+
+        if os.path.exists(test_directory):
+            shutil.rmtree(test_directory)
+
+        os.makedirs(test_directory)
+
+        working_directory = "{}/test_loaddata".format(test_directory)
+
+        zipref = zipfile.ZipFile(testdatafile, 'r')
+        zipref.extractall(test_directory)
+        zipref.close()
+
+        memento_directory = "{}/mementos".format(working_directory)
+        filename_digest = hashlib.sha3_256(
+            bytes("testing-storage:memento1", "utf8")).hexdigest()
+
+        self.assertTrue( os.path.exists("{}/{}.orig".format(
+            memento_directory, filename_digest)) )
+
+        # the first file is moved as if a migration was interrupted
+        os.makedirs("{}/{}/{}".format(memento_directory, filename_digest[0:2],
+            filename_digest[2:4]))
+        os.replace("{}/{}.orig".format(memento_directory, filename_digest),
+            sharded_filename(memento_directory, "{}.orig".format(filename_digest)))
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        # only the shard directories are left next to metadata.csv
+        for directory in ["timemaps", "mementos", "memento_errors"]:
+            for filename in os.listdir("{}/{}".format(working_directory, directory)):
+                if filename != "metadata.csv":
+                    self.assertEqual( len(filename), 2 )
+
+        self.assertTrue( os.path.exists("{}/layout.json".format(working_directory)) )
+        self.assertTrue( os.path.exists(sharded_filename(
+            memento_directory, "{}_headers.json".format(filename_digest))) )
+
+        self.assertEqual( cm.getMementoContent("testing-storage:memento1"),
+            b"<html><body>mementotext</body></html>" )
+        self.assertEqual( cm.getMementoErrorInformation("testing-storage:bad-memento1"),
+            b"ERROR MESSAGE" )
+
+        cm.close()
+
+        shutil.rmtree(test_directory)
+
+    def test_memento_content_view(self):
+
+        working_directory = "/tmp/collectionmodel_test/test_memento_content_view"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        content = b"<html><body>mementotext</body></html>"
+
+        for compression in ["none", "gzip"]:
+
+            cm = collectionmodel.CollectionModel(working_directory=working_directory,
+                compression=compression)
+
+            cm.addMemento("testing-storage:memento1", content, {})
+            cm.addMemento("testing-storage:memento2", b"", {})
+            cm.addMementoError("testing-storage:memento3", b"", {}, b"ERROR MESSAGE")
+
+            view = cm.getMementoContentView("testing-storage:memento1")
+
+            self.assertEqual( view, content )
+            self.assertTrue( view.readonly )
+            self.assertEqual( cm.getMementoContentView("testing-storage:memento2"), b"" )
+
+            if compression == "none":
+                self.assertIsInstance( view.obj, mmap.mmap )
+
+            self.assertRaises( collectionmodel.CollectionModelMementoErrorException,
+                cm.getMementoContentView, "testing-storage:memento3" )
+            self.assertRaises( collectionmodel.CollectionModelNoSuchMementoException,
+                cm.getMementoContentView, "testing-storage:memento4" )
+
+            cm.close()
+
+            cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+            # lengths come from metadata.csv without reading any content
+            os.remove(cm.blobstore.blob_filename(cm.memento_blobs["testing-storage:memento1"]))
+
+            self.assertEqual( cm.getMementoContentLength("testing-storage:memento1"),
+                len(content) )
+            self.assertEqual( cm.getMementoContentLength("testing-storage:memento2"), 0 )
+
+            cm.close()
+
+            shutil.rmtree(working_directory)
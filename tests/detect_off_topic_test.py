@@ -0,0 +1,179 @@
+import os
+import sys
+import glob
+import json
+import runpy
+import shutil
+import unittest
+import subprocess
+
+from unittest import mock
+
+import requests_cache
+
+import otmt
+
+from otmt import collectionmodel
+
+script_filename = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    "..", "bin", "detect_off_topic")
+
+timemap_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:06 GMT",
+<memento13>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:06 GMT"
+"""
+
+on_topic_text = "The city council met on Tuesday to discuss the new budget " \
+    "for the public library and the repairs to the old bridge over the river. "
+
+off_topic_text = "This domain is for sale. Contact the registrar to make " \
+    "an offer and buy this premium domain name today at a low price. "
+
+def build_collection(working_directory):
+
+    cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+    headers = {
+        "key1": "value1",
+        "key2": "value2"
+    }
+
+    cm.addTimeMap("timemap1", timemap_content, headers)
+
+    for urim, text in [ ("memento11", on_topic_text),
+        ("memento12", on_topic_text * 2), ("memento13", off_topic_text) ]:
+
+        cm.addMemento(urim, "<html><body><p>{}</p></body></html>".format(
+            text * 5).encode("utf8"), headers)
+
+    cm.flush()
+
+class TestingDetectOffTopic(unittest.TestCase):
+
+    def setUp(self):
+
+        self.working_directory = "/tmp/detect_off_topic_test/{}".format(
+            self._testMethodName)
+
+        if os.path.exists(self.working_directory):
+            shutil.rmtree(self.working_directory)
+
+        build_collection("{}/collection".format(self.working_directory))
+
+        self.output_filename = "{}/output.json".format(self.working_directory)
+
+    def tearDown(self):
+
+        # the script installs an HTTP cache for the whole process
+        requests_cache.uninstall_cache()
+        otmt.set_text_pipeline(otmt.TextPipeline())
+
+        shutil.rmtree(self.working_directory)
+
+    def run_script(self, *arguments):
+        """Runs detect_off_topic on the test collection with `arguments`,
+        returning the keyword arguments it passed to
+        compute_timemap_measures and its JSON output.
+        """
+
+        argv = [ script_filename,
+            "-i", "dir={}/collection".format(self.working_directory),
+            "-o", self.output_filename,
+            "-cf", "{}/cache".format(self.working_directory),
+            "--no-detect-languages", "-q" ] + list(arguments)
+
+        with mock.patch.object(otmt, "compute_timemap_measures",
+            wraps=otmt.compute_timemap_measures) as compute_timemap_measures, \
+            mock.patch.object(sys, "argv", argv):
+
+            runpy.run_path(script_filename, run_name="__main__")
+
+        self.assertEqual( compute_timemap_measures.call_count, 1 )
+
+        with open(self.output_filename) as f:
+            output = json.load(f)
+
+        return compute_timemap_measures.call_args[1], output
+
+    def test_stop_at_threshold(self):
+
+        kwargs, output = self.run_script("-tm", "levenshtein=5",
+            "--stop-at-threshold")
+
+        self.assertEqual( kwargs["thresholds"], {"levenshtein": 5} )
+
+        self.assertEqual(
+            output["timemap1"]["memento13"]["timemap measures"]["levenshtein"]["topic status"],
+            "off-topic" )
+
+        kwargs, output = self.run_script("-tm", "levenshtein=5")
+
+        self.assertIsNone( kwargs["thresholds"] )
+
+    def test_cosine_batch_size(self):
+
+        kwargs, output = self.run_script("-tm", "cosine", "--cosine-batch-size", "7")
+
+        self.assertEqual( kwargs["batch_size"], 7 )
+
+        self.assertEqual(
+            output["timemap1"]["memento13"]["timemap measures"]["cosine"]["topic status"],
+            "off-topic" )
+
+    def test_collection_topic_models(self):
+
+        kwargs, output = self.run_script("-tm", "gensim_lsi",
+            "--number-of-topics", "2", "--collection-topic-models")
+
+        self.assertTrue( kwargs["collection_topic_models"] )
+
+        # the model trained on the collection is kept in the working directory
+        self.assertTrue( os.path.exists(
+            "{}/collection/topicmodels".format(self.working_directory)) )
+
+        self.assertIn( "gensim_lsi",
+            output["timemap1"]["memento12"]["timemap measures"] )
+
+        kwargs, output = self.run_script("-tm", "gensim_lsi")
+
+        self.assertFalse( kwargs["collection_topic_models"] )
+
+    def test_prepare_boilerplate(self):
+
+        # runs the script in its own process, as from the command line,
+        # using the otmt package of this source tree
+        environment = dict(os.environ)
+        python_path = [ os.path.join(os.path.dirname(script_filename), "..") ]
+
+        if "PYTHONPATH" in environment:
+            python_path.append(environment["PYTHONPATH"])
+
+        environment["PYTHONPATH"] = os.pathsep.join(python_path)
+
+        completed = subprocess.run([ sys.executable, script_filename,
+            "-i", "dir={}/collection".format(self.working_directory),
+            "-o", self.output_filename,
+            "-cf", "{}/cache".format(self.working_directory),
+            "-tm", "cosine,levenshtein", "--prepare-boilerplate",
+            "--workers", "2", "--stop-at-threshold", "--cosine-batch-size", "7",
+            "--no-detect-languages", "-q" ],
+            env=environment, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+        self.assertEqual( completed.returncode, 0, completed.stdout.decode("utf8") )
+
+        # one file without boilerplate for each distinct memento content
+        self.assertEqual( len(glob.glob("{}/collection/**/*.noboilerplate".format(
+            self.working_directory), recursive=True)), 3 )
+
+        with open(self.output_filename) as f:
+            output = json.load(f)
+
+        self.assertEqual( sorted(output["timemap1"].keys()),
+            ["memento11", "memento12", "memento13"] )
+
+        self.assertEqual(
+            output["timemap1"]["memento13"]["timemap measures"]["cosine"]["topic status"],
+            "off-topic" )
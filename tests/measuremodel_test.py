@@ -275,4 +275,35 @@ timemap5,http://examplearchive.org/19700101000000/http://memento3,Memento Measur
             mm.get_tokenized("timemap1", "http://examplearchive.org/19700101000000/http://memento1", "measuretype1", "measure1")
 
         with self.assertRaises(MeasureModelNoSuchMeasure):
-            mm.get_removed_boilerplate("timemap1", "http://examplearchive.org/19700101000000/http://memento1", "measuretype1", "measure1")
\ No newline at end of file
+            mm.get_removed_boilerplate("timemap1", "http://examplearchive.org/19700101000000/http://memento1", "measuretype1", "measure1")
+
+    def test_measuremodel_update(self):
+
+        mm1 = MeasureModel()
+        mm1.set_score("timemap1", "memento11", "measuretype1", "measure1", 1)
+        mm1.set_score("timemap1", "memento12", "measuretype1", "measure1", 2)
+        mm1.set_score("timemap1", "memento11", "measuretype1", "measure2", 6)
+
+        mm2 = MeasureModel()
+        mm2.set_score("timemap1", "memento12", "measuretype1", "measure1", 3)
+        mm2.set_score("timemap1", "memento12", "measuretype1", "measure2", 4)
+        mm2.set_Memento_access_error("timemap2", "memento21", "failed to download")
+
+        # the same calls made on a single MeasureModel
+        expected = MeasureModel()
+        expected.set_score("timemap1", "memento11", "measuretype1", "measure1", 1)
+        expected.set_score("timemap1", "memento12", "measuretype1", "measure1", 2)
+        expected.set_score("timemap1", "memento11", "measuretype1", "measure2", 6)
+        expected.set_score("timemap1", "memento12", "measuretype1", "measure1", 3)
+        expected.set_score("timemap1", "memento12", "measuretype1", "measure2", 4)
+        expected.set_Memento_access_error("timemap2", "memento21", "failed to download")
+
+        mm1.update(mm2)
+
+        self.assertEqual( mm1.generate_dict(), expected.generate_dict() )
+        self.assertEqual( mm1.get_Measures(), expected.get_Measures() )
+
+        # later changes to mm2 do not affect mm1
+        mm2.set_score("timemap1", "memento12", "measuretype1", "measure2", 5)
+        self.assertEqual(
+            mm1.get_score("timemap1", "memento12", "measuretype1", "measure2"), 4 )
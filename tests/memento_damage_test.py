@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import shutil
+import threading
+import unittest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from otmt.memento_damage import MementoDamageClient, MementoDamageCache, \
+    MementoDamageException
+
+class StubDamageHandler(BaseHTTPRequestHandler):
+    """Answers requests like the Memento Damage API, slowly, recording how
+    many requests for each URI-M it received and how many were in flight at
+    once.
+    """
+
+    def do_GET(self):
+
+        server = self.server
+        urim = self.path[len("/api/damage/"):]
+
+        with server.lock:
+            server.requests[urim] = server.requests.get(urim, 0) + 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+
+        time.sleep(0.05)
+
+        with server.lock:
+            server.in_flight -= 1
+
+        if "missing" in urim:
+            status, body = 404, b"not found"
+        elif "broken" in urim:
+            status, body = 200, b"<html>not JSON</html>"
+        else:
+            status = 200
+            body = json.dumps({
+                "uri": urim,
+                "total_damage": len(urim) / 100
+            }).encode("utf8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestingMementoDamage(unittest.TestCase):
+
+    def setUp(self):
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubDamageHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = {}
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+
+        self.thread = threading.Thread(target=self.server.serve_forever,
+            daemon=True)
+        self.thread.start()
+
+        self.damage_uri = "http://127.0.0.1:{}/".format(self.server.server_port)
+
+    def tearDown(self):
+
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_damages(self):
+
+        working_directory = "/tmp/memento_damage_test/test_get_damages"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cachefile = "{}/damage.csv".format(working_directory)
+
+        urims = [ "http://archive.example/2016/http://example.com/{}".format(i)
+            for i in range(20) ]
+
+        missing = "http://archive.example/2016/http://example.com/missing"
+        broken = "http://archive.example/2016/http://example.com/broken"
+
+        client = MementoDamageClient(self.damage_uri,
+            cache=MementoDamageCache(cachefile), max_workers=4)
+
+        damages = client.get_damages(urims + [missing, broken, urims[0]])
+
+        self.assertEqual( damages,
+            { urim: len(urim) / 100 for urim in urims } )
+
+        # each URI-M was requested once, several at a time
+        self.assertEqual( self.server.requests[urims[0]], 1 )
+        self.assertEqual( self.server.requests[missing], 1 )
+        self.assertEqual( self.server.max_in_flight, 4 )
+
+        self.assertEqual( client.get_damage(urims[3]), len(urims[3]) / 100 )
+        self.assertEqual( self.server.requests[urims[3]], 1 )
+
+        client.cache.close()
+
+        # damages are read from the cache by later clients, failures are
+        # requested again
+        client = MementoDamageClient(self.damage_uri,
+            cache=MementoDamageCache(cachefile), max_workers=4)
+
+        self.assertEqual( client.get_damages(urims + [missing]),
+            { urim: len(urim) / 100 for urim in urims } )
+
+        self.assertEqual( sum(self.server.requests.values()), 23 )
+        self.assertEqual( self.server.requests[missing], 2 )
+
+        client.cache.close()
+
+        self.assertIsNone(
+            MementoDamageClient(self.damage_uri).get_damage(broken) )
+
+        with self.assertRaises(MementoDamageException):
+            MementoDamageClient(self.damage_uri, max_workers=0)
+
+        shutil.rmtree(working_directory)
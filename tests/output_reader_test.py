@@ -0,0 +1,112 @@
+import os
+import json
+import shutil
+import unittest
+
+from datetime import datetime
+
+from otmt import MeasureModel
+from otmt.output_reader import read_output_records, read_consideration_file, \
+    OutputReaderException
+
+class TestingOutputReader(unittest.TestCase):
+
+    def test_read_output_records(self):
+
+        working_directory = "/tmp/output_reader_test/test_read_output_records"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        os.makedirs(working_directory)
+
+        mm = MeasureModel()
+
+        for urit, count in [ ("timemap1", 3), ("timemap2", 40) ]:
+
+            for i in range(count):
+                urim = "{}/memento{}".format(urit, i)
+
+                mm.set_simhash(urit, urim, 2 ** 63 + i)
+                mm.set_language(urit, urim, "en" if i % 2 else "fr")
+                mm.set_content_length(urit, urim, 1000 + i)
+                mm.set_memento_datetime(urit, urim, datetime(2016, 1, 1 + i % 28, 12, 30))
+                mm.set_score(urit, urim, "timemap measures", "cosine", 0.5)
+
+        mm.set_Memento_access_error("timemap1", "timemap1/memento3", "not found")
+        mm.set_TimeMap_access_error("timemap3", "could not download")
+
+        filename = "{}/output.json".format(working_directory)
+
+        mm.save_as_JSON(filename)
+
+        with open(filename) as f:
+            jsondata = json.load(f)
+
+        expected = [ (urit, urim, jsondata[urit][urim])
+            for urit in jsondata for urim in jsondata[urit]
+            if type(jsondata[urit][urim]) == dict ]
+
+        # small chunks split keys, numbers, and records across reads
+        for chunk_size in [1, 7, 1048576]:
+
+            records = list(read_output_records(filename, chunk_size=chunk_size))
+
+            self.assertEqual(
+                [ (record.urit, record.urim, record.data) for record in records ],
+                expected
+            )
+
+        records = { record.urim: record for record in read_output_records(filename) }
+
+        self.assertEqual( len(records), 44 )
+
+        record = records["timemap2/memento5"]
+
+        self.assertEqual( record.urit, "timemap2" )
+        self.assertEqual( record.simhash, 2 ** 63 + 5 )
+        self.assertEqual( record.language, "en" )
+        self.assertEqual( record.content_length, 1005 )
+        self.assertEqual( record.memento_datetime, datetime(2016, 1, 6, 12, 30) )
+        self.assertIsNone( record.access_error )
+
+        record = records["timemap1/memento3"]
+
+        self.assertEqual( record.access_error, "not found" )
+        self.assertIsNone( record.simhash )
+        self.assertIsNone( record.memento_datetime )
+
+        for content in ['{"timemap1": {"memento1": {"language": "en"}', '[]',
+            '{"timemap1": {"memento1": {}}} {}', '{"timemap1" {}}']:
+
+            with open(filename, 'w') as f:
+                f.write(content)
+
+            with self.assertRaises(OutputReaderException):
+                list(read_output_records(filename, chunk_size=4))
+
+        with open(filename, 'w') as f:
+            f.write('  {}\n')
+
+        self.assertEqual( list(read_output_records(filename)), [] )
+
+        shutil.rmtree(working_directory)
+
+    def test_read_consideration_file(self):
+
+        working_directory = "/tmp/output_reader_test/test_read_consideration_file"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        os.makedirs(working_directory)
+
+        filename = "{}/consider.txt".format(working_directory)
+
+        with open(filename, 'w') as f:
+            f.write("memento1\n  memento2\t\n\nmemento1\n")
+
+        self.assertEqual( read_consideration_file(filename),
+            {"memento1", "memento2"} )
+
+        shutil.rmtree(working_directory)
@@ -0,0 +1,349 @@
+import os
+import shutil
+import random
+import unittest
+
+import numpy as np
+
+from otmt import collectionmodel, MeasureModel, compute_timemap_measures, \
+    compute_Simhashes
+from otmt.simhashes import SimhashCache, simhash_bytes, simhash_token_ids, \
+    simhash_distance, SimhashIndex, SimhashIndexException, \
+    simhash_distance_graph, cluster_simhashes
+from otmt.tokencache import TokenCache
+
+class TestingSimhashes(unittest.TestCase):
+
+    def test_simhash_bytes(self):
+
+        random.seed(13)
+
+        words = [ "word{}".format(i) for i in range(500) ]
+
+        text = " ".join(random.choices(words, k=2000))
+        changed = text[:len(text) - 500] + " ".join(random.choices(words, k=50))
+        different = " ".join(random.choices(
+            [ "term{}".format(i) for i in range(500) ], k=2000))
+
+        fingerprint = simhash_bytes(text.encode("utf8"))
+
+        self.assertEqual(fingerprint, simhash_bytes(text.encode("utf8")))
+        self.assertEqual(fingerprint, simhash_bytes(memoryview(text.encode("utf8"))))
+        self.assertLess(fingerprint, 2 ** 64)
+
+        # case, punctuation, and markup spacing are not part of the shingles
+        self.assertEqual(fingerprint,
+            simhash_bytes(text.upper().replace(" ", ", ").encode("utf8")))
+
+        self.assertLess(
+            simhash_distance(fingerprint, simhash_bytes(changed.encode("utf8"))),
+            simhash_distance(fingerprint, simhash_bytes(different.encode("utf8")))
+        )
+
+        self.assertEqual(simhash_bytes(b""), 0)
+        self.assertEqual(simhash_bytes(b"<>!"), 0)
+        self.assertNotEqual(simhash_bytes(b"ab"), simhash_bytes(b"ba"))
+        self.assertNotEqual(simhash_bytes("café".encode("utf8")),
+            simhash_bytes(b"caf"))
+
+    def test_simhash_token_ids(self):
+
+        directory = "/tmp/simhashes_test/test_simhash_token_ids"
+
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+
+        tokens = ["three", "one", "four", "one", "five", "nine", "two", "six"]
+
+        tokencache = TokenCache("{}/first".format(directory))
+        token_ids = tokencache.put("memento1", tokens)
+
+        fingerprint = simhash_token_ids(token_ids, tokencache)
+
+        # only the frequency of each token matters
+        self.assertEqual(fingerprint, simhash_token_ids(token_ids[::-1], tokencache))
+        self.assertEqual(fingerprint, simhash_token_ids(token_ids.tolist(), tokencache))
+        self.assertNotEqual(fingerprint,
+            simhash_token_ids(np.unique(token_ids), tokencache))
+
+        self.assertEqual(simhash_token_ids(np.zeros(0, dtype=np.uint32), tokencache), 0)
+
+        # the same tokens have the same fingerprint whatever IDs they were
+        # given, here by tokenizing other content first
+        other_tokencache = TokenCache("{}/second".format(directory))
+        other_tokencache.put("memento2", ["six", "seven", "two", "eight"])
+        other_token_ids = other_tokencache.put("memento1", tokens)
+
+        self.assertNotEqual( token_ids.tolist(), other_token_ids.tolist() )
+        self.assertEqual(fingerprint,
+            simhash_token_ids(other_token_ids, other_tokencache))
+
+        tokencache.close()
+        other_tokencache.close()
+
+        shutil.rmtree(directory)
+
+        self.assertEqual(simhash_distance(fingerprint, fingerprint), 0)
+        self.assertEqual(simhash_distance(0, 2 ** 64 - 1), 64)
+        self.assertEqual(simhash_distance(0b1011, 0b0110), 3)
+
+    def test_simhash_cache(self):
+
+        directory = "/tmp/simhashes_test/test_simhash_cache"
+
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+
+        sc = SimhashCache(directory)
+
+        self.assertIsNone( sc.get("memento1", "raw") )
+
+        sc.put("memento1", "raw", 2 ** 63 + 5)
+        sc.put("memento1", "stemmed_noboilerplate", 7)
+
+        self.assertEqual( sc.get("memento1", "raw"), 2 ** 63 + 5 )
+
+        sc.close()
+
+        sc = SimhashCache(directory, read_only=True)
+
+        self.assertEqual( sc.get("memento1", "raw"), 2 ** 63 + 5 )
+        self.assertEqual( sc.get("memento1", "stemmed_noboilerplate"), 7 )
+
+        # kept in memory only
+        sc.put("memento2", "raw", 11)
+        self.assertEqual( sc.get("memento2", "raw"), 11 )
+
+        sc.close()
+
+        sc = SimhashCache(directory)
+        self.assertIsNone( sc.get("memento2", "raw") )
+        sc.close()
+
+        shutil.rmtree(directory)
+
+    def test_fingerprints_shared_with_metadata(self):
+
+        working_directory = "/tmp/simhashes_test/test_fingerprints_shared_with_metadata"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        class CountingCollectionModel(collectionmodel.CollectionModel):
+
+            raw_reads = 0
+
+            def getMementoContentView(self, urim):
+                self.raw_reads += 1
+                return super().getMementoContentView(urim)
+
+            def getMementoContent(self, urim):
+                self.raw_reads += 1
+                return super().getMementoContent(urim)
+
+        cm = CountingCollectionModel(working_directory=working_directory)
+
+        headers = {
+            "key1": "value1",
+            "key2": "value2"
+        }
+
+        timemap_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="last memento"; datetime="Tue, 21 Jan 2017 15:45:06 GMT"
+"""
+
+        cm.addTimeMap("timemap1", timemap_content, headers)
+        cm.addMemento("memento11",
+            b"<html><body><p>The quick brown fox jumps over the lazy dog</p></body></html>",
+            headers)
+        cm.addMemento("memento12",
+            b"<html><body><p>Sphinx of black quartz, judge my vow</p></body></html>",
+            headers)
+
+        mm = compute_timemap_measures(cm, MeasureModel(), ["raw_simhash"])
+
+        self.assertEqual( cm.raw_reads, 2 )
+
+        self.assertEqual(
+            mm.get_score("timemap1", "memento12", "timemap measures", "raw_simhash"),
+            simhash_distance(
+                simhash_bytes(cm.getMementoContent("memento11")),
+                simhash_bytes(cm.getMementoContent("memento12")))
+        )
+
+        cm.raw_reads = 0
+
+        mm = compute_Simhashes(cm, mm)
+
+        # the fingerprints computed for raw_simhash are read back
+        self.assertEqual( cm.raw_reads, 0 )
+
+        self.assertEqual( mm.get_simhash("timemap1", "memento11"),
+            simhash_bytes(cm.getMementoContent("memento11")) )
+
+        shutil.rmtree(working_directory)
+
+    def test_simhash_index(self):
+
+        random.seed(7)
+
+        fingerprints = {}
+
+        for i in range(3000):
+
+            if i % 3 == 0 or i < 10:
+                fingerprint = random.getrandbits(64)
+            else:
+                # near-duplicates of an earlier memento
+                fingerprint = fingerprints["memento{}".format(random.randrange(10))]
+
+                for bit in random.sample(range(64), random.randrange(8)):
+                    fingerprint ^= 1 << bit
+
+            fingerprints["memento{}".format(i)] = fingerprint
+
+        index = SimhashIndex(max_distance=12)
+
+        items = list(fingerprints.items())
+
+        self.assertEqual( index.insert_many(items[:2000]), 2000 )
+
+        # the rest stays in the buffer of unmerged fingerprints
+        for urim, fingerprint in items[2000:]:
+            self.assertEqual( index.insert(urim, fingerprint), 1 )
+
+        self.assertEqual( index.insert("memento0", 0), 0 )
+        self.assertEqual( index.get("memento0"), fingerprints["memento0"] )
+        self.assertIsNone( index.get("memento-missing") )
+        self.assertEqual( len(index), 3000 )
+
+        def expected(fingerprint, max_distance):
+
+            matches = [ (simhash_distance(fingerprint, other), i, urim)
+                for i, (urim, other) in enumerate(items)
+                if simhash_distance(fingerprint, other) <= max_distance ]
+
+            return [ (urim, distance) for distance, i, urim in sorted(matches) ]
+
+        for query in [ fingerprints["memento{}".format(i)] for i in range(10) ] \
+            + [ random.getrandbits(64) ]:
+
+            self.assertEqual( index.query(query), expected(query, 12) )
+
+            for max_distance in [0, 1, 3, 7]:
+                self.assertEqual( index.query(query, max_distance),
+                    expected(query, max_distance) )
+
+        # an index for every distance compares all fingerprints
+        full_index = SimhashIndex(max_distance=64)
+        full_index.insert_many(items)
+
+        self.assertEqual( full_index.query(fingerprints["memento3"]),
+            expected(fingerprints["memento3"], 64) )
+
+        # the blocks of an index are chosen for its largest distance
+        with self.assertRaises(SimhashIndexException):
+            index.query(fingerprints["memento3"], 13)
+
+        with self.assertRaises(SimhashIndexException):
+            SimhashIndex(max_distance=0).query(5, 1)
+
+        self.assertEqual( SimhashIndex().query(5), [] )
+
+        working_directory = "/tmp/simhashes_test/test_simhash_index"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        os.makedirs(working_directory)
+
+        filename = "{}/simhashes.index".format(working_directory)
+
+        index.save(filename)
+        loaded = SimhashIndex.load(filename)
+
+        self.assertEqual( len(loaded), 3000 )
+        self.assertEqual( loaded.max_distance, 12 )
+        self.assertEqual( loaded.query(fingerprints["memento5"], 5),
+            index.query(fingerprints["memento5"], 5) )
+
+        with open("{}/broken.index".format(working_directory), 'w') as f:
+            f.write("not an index")
+
+        with self.assertRaises(SimhashIndexException):
+            SimhashIndex.load("{}/broken.index".format(working_directory))
+
+        with self.assertRaises(SimhashIndexException):
+            SimhashIndex(blocks=65)
+
+        shutil.rmtree(working_directory)
+
+    def test_simhash_index_from_measuremodel(self):
+
+        mm = MeasureModel()
+
+        mm.set_simhash("timemap1", "memento11", 0b1111)
+        mm.set_simhash("timemap1", "memento12", 0b1110)
+        mm.set_simhash("timemap1", "memento13", "No Simhash due to error")
+        mm.set_simhash("timemap2", "memento21", 2 ** 64 - 1)
+
+        index = SimhashIndex(max_distance=1)
+
+        self.assertEqual( index.insert_measuremodel(mm), 3 )
+
+        self.assertNotIn( "memento13", index )
+
+        self.assertEqual( index.query(0b1111),
+            [ ("memento11", 0), ("memento12", 1) ] )
+
+        self.assertEqual( index.query(2 ** 64 - 2), [ ("memento21", 1) ] )
+
+    def test_cluster_simhashes(self):
+
+        random.seed(11)
+
+        centers = [ random.getrandbits(64) for i in range(3) ]
+
+        fingerprints = []
+
+        for i in range(60):
+            fingerprint = centers[i % 3]
+
+            for bit in random.sample(range(64), random.randrange(3)):
+                fingerprint ^= 1 << bit
+
+            fingerprints.append(fingerprint)
+
+        outlier = centers[0] ^ (2 ** 64 - 1)
+        fingerprints.append(outlier)
+
+        # a small block size splits the comparisons over many blocks
+        graph = simhash_distance_graph(fingerprints, 4, block_size=100)
+
+        for i, first in enumerate(fingerprints):
+            for j, second in enumerate(fingerprints):
+
+                if simhash_distance(first, second) <= 4:
+                    self.assertEqual( graph[i, j], simhash_distance(first, second) )
+                else:
+                    self.assertNotIn( j, graph[i].indices )
+
+        # identical fingerprints are kept as explicit zeros
+        self.assertEqual( graph.diagonal().tolist(), [0] * len(fingerprints) )
+        self.assertIn( 0, graph[0].indices )
+
+        labels = cluster_simhashes(fingerprints, 4, block_size=100).tolist()
+
+        self.assertEqual( len(set(labels[:60])), 3 )
+
+        for i in range(60):
+            self.assertEqual( labels[i], labels[i % 3] )
+
+        self.assertEqual( labels[60], -1 )
+
+        self.assertEqual( cluster_simhashes([7, 7, 2 ** 63], 0).tolist(),
+            [0, 0, -1] )
+        self.assertEqual( cluster_simhashes([], 3).tolist(), [] )
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from otmt.slicing import parse_memento_datetimes, default_slice_count, \
+    slice_mementos, SlicingException
+
+class TestingSlicing(unittest.TestCase):
+
+    def test_parse_memento_datetimes(self):
+
+        memento_datetimes = parse_memento_datetimes([
+            "2016/01/21 15:45:06 GMT", "1999/12/31 23:59:59 GMT"])
+
+        self.assertEqual( memento_datetimes.dtype, np.dtype('datetime64[s]') )
+        self.assertEqual( memento_datetimes.tolist()[0].isoformat(),
+            "2016-01-21T15:45:06" )
+        self.assertEqual( memento_datetimes[1],
+            np.datetime64("1999-12-31T23:59:59") )
+
+        self.assertEqual( len(parse_memento_datetimes([])), 0 )
+
+        with self.assertRaises(SlicingException):
+            parse_memento_datetimes(["yesterday"])
+
+    def test_slice_mementos(self):
+
+        self.assertEqual( default_slice_count(5), 5 )
+        self.assertEqual( default_slice_count(1000), 31 )
+
+        memento_datetimes = np.array([
+            "2016-01-05", "2016-01-01", "2016-01-03", "2016-01-02",
+            "2016-01-10", "2016-01-04", "2016-01-01", "2016-01-09"
+        ], dtype='datetime64[s]')
+
+        slices = slice_mementos(memento_datetimes, 3)
+
+        self.assertEqual( [ indices.tolist() for indices in slices ],
+            [ [1, 6, 3], [2, 5, 0], [7, 4] ] )
+
+        # one slice per memento for small collections
+        self.assertEqual( len(slice_mementos(memento_datetimes)), 8 )
+
+        # 2016-01-01 to 2016-01-10 in three spans of three days
+        slices = slice_mementos(memento_datetimes, 3, method="time")
+
+        self.assertEqual( [ indices.tolist() for indices in slices ],
+            [ [1, 6, 3, 2], [5, 0], [7, 4] ] )
+
+        slices = slice_mementos(memento_datetimes[[1, 6]], 2, method="time")
+
+        self.assertEqual( [ indices.tolist() for indices in slices ],
+            [ [], [0, 1] ] )
+
+        self.assertEqual( slice_mementos([]), [] )
+
+        with self.assertRaises(SlicingException):
+            slice_mementos(memento_datetimes, 3, method="size")
@@ -0,0 +1,165 @@
+import os
+import shutil
+import unittest
+
+from datetime import datetime
+
+from otmt import collectionmodel, SQLiteCollectionModel, MeasureModel, \
+    compute_jaccard_across_TimeMap
+
+testtimemap = """<http://a.example.org>;rel="original",
+<http://arxiv.example.net/timemap/http://a.example.org>
+; rel="self";type="application/link-format"
+; from="Tue, 20 Jun 2000 18:02:59 GMT"
+; until="Wed, 09 Apr 2008 20:30:51 GMT",
+<http://arxiv.example.net/timegate/http://a.example.org>
+; rel="timegate",
+<http://arxiv.example.net/web/20000620180259/http://a.example.org>
+; rel="first memento";datetime="Tue, 20 Jun 2000 18:02:59 GMT",
+<http://arxiv.example.net/web/20091027204954/http://a.example.org>
+; rel="last memento";datetime="Tue, 27 Oct 2009 20:49:54 GMT",
+"""
+
+class TestingSQLiteCollectionModel(unittest.TestCase):
+
+    def setUp(self):
+
+        self.working_directory = "/tmp/sqlitecollectionmodel_test/{}".format(
+            self._testMethodName)
+
+        if os.path.exists(self.working_directory):
+            shutil.rmtree(self.working_directory)
+
+    def tearDown(self):
+
+        shutil.rmtree(self.working_directory)
+
+    def test_timemaps_and_mementos(self):
+
+        cm = SQLiteCollectionModel(self.working_directory, batch_size=2)
+
+        headers = { "header1": "value1" }
+
+        cm.addTimeMap("testing-storage:timemap", testtimemap, headers)
+
+        timemap = cm.getTimeMap("testing-storage:timemap")
+
+        self.assertEqual( timemap["mementos"]["first"]["datetime"], 
+            datetime(2000, 6, 20, 18, 2, 59) )
+        self.assertEqual( len(timemap["mementos"]["list"]), 2 )
+        self.assertEqual( cm.getTimeMapHeaders("testing-storage:timemap"), headers )
+
+        content = b"<html><body>mementotext</body></html>"
+
+        cm.addMemento("testing-storage:memento1", content, headers)
+        cm.addMemento("testing-storage:memento2", content, headers)
+
+        self.assertEqual( cm.getMementoContent("testing-storage:memento1"), content )
+        self.assertEqual( cm.getMementoContentWithoutBoilerplate(
+            "testing-storage:memento2"), b"mementotext\n" )
+        self.assertEqual( cm.getMementoHeaders("testing-storage:memento2"), headers )
+        self.assertIsNone( cm.getMementoErrorInformation("testing-storage:memento1") )
+
+        cm.addMementoError("testing-storage:bad-memento", b"", {}, b"ERROR MESSAGE")
+
+        self.assertRaises( collectionmodel.CollectionModelMementoErrorException,
+            cm.getMementoContent, "testing-storage:bad-memento" )
+        self.assertRaises( collectionmodel.CollectionModelNoSuchMementoException,
+            cm.getMementoContent, "testing-storage:missing-memento" )
+        self.assertRaises( collectionmodel.CollectionModelNoSuchTimeMapException,
+            cm.getTimeMap, "testing-storage:missing-timemap" )
+
+        cm.close()
+
+        cm = SQLiteCollectionModel(self.working_directory)
+
+        self.assertEqual( cm.getMementoURIList(), 
+            ["testing-storage:memento1", "testing-storage:memento2"] )
+        self.assertEqual( cm.getTimeMapURIList(), ["testing-storage:timemap"] )
+        self.assertEqual( cm.getMementoContent("testing-storage:memento2"), content )
+        self.assertEqual( cm.getMementoContentView("testing-storage:memento2"), content )
+        self.assertEqual( cm.getMementoContentLength("testing-storage:memento2"),
+            len(content) )
+        self.assertEqual( cm.getMementoErrorInformation("testing-storage:bad-memento"),
+            b"ERROR MESSAGE" )
+
+        # adding a URI again replaces its data without moving it to the end
+        cm.addTimeMap("testing-storage:timemap2", testtimemap, headers)
+        cm.addTimeMap("testing-storage:timemap", testtimemap, { "header1": "value2" })
+        cm.addMemento("testing-storage:memento1", b"<html>changed</html>", headers)
+
+        self.assertEqual( cm.getMementoURIList(),
+            ["testing-storage:memento1", "testing-storage:memento2"] )
+        self.assertEqual( cm.getTimeMapURIList(),
+            ["testing-storage:timemap", "testing-storage:timemap2"] )
+        self.assertEqual( cm.getMementoContent("testing-storage:memento1"),
+            b"<html>changed</html>" )
+        self.assertEqual( cm.getTimeMapHeaders("testing-storage:timemap"),
+            { "header1": "value2" } )
+
+        cm.close()
+
+    def test_measure_with_sqlite_model(self):
+
+        cm = SQLiteCollectionModel(self.working_directory)
+
+        cm.addTimeMap("testing-storage:timemap", testtimemap, {})
+
+        cm.addMemento("http://arxiv.example.net/web/20000620180259/http://a.example.org",
+            b"<html><body>Content1 is wonderful</body></html>", {})
+        cm.addMemento("http://arxiv.example.net/web/20091027204954/http://a.example.org",
+            b"<html><body>Content1 is wonderful</body></html>", {})
+
+        mm = compute_jaccard_across_TimeMap(cm, MeasureModel())
+
+        for urim in cm.getMementoURIList():
+            self.assertEqual( mm.get_score("testing-storage:timemap", urim,
+                "timemap measures", "jaccard"), 0 )
+
+        cm.close()
+
+    def test_prepare_boilerplate(self):
+
+        cm = SQLiteCollectionModel(self.working_directory)
+
+        cm.addMemento("testing-storage:memento1", b"<html><body>hi</body></html>", {})
+        cm.addMemento("testing-storage:memento2", b"", {})
+
+        failures = cm.prepareMementoContentWithoutBoilerplate(processes=2)
+
+        self.assertEqual( list(failures.keys()), ["testing-storage:memento2"] )
+
+        cm.close()
+
+        cm = SQLiteCollectionModel(self.working_directory)
+
+        self.assertEqual( cm.prepareMementoContentWithoutBoilerplate(processes=2), {} )
+        self.assertEqual( cm.getMementoContentWithoutBoilerplate(
+            "testing-storage:memento1"), b"hi\n" )
+        self.assertRaises( collectionmodel.CollectionModelBoilerPlateRemovalFailureException,
+            cm.getMementoContentWithoutBoilerplate, "testing-storage:memento2" )
+
+        cm.close()
+
+    def test_read_only(self):
+
+        self.assertRaises( collectionmodel.CollectionModelException,
+            SQLiteCollectionModel, self.working_directory, read_only=True )
+
+        cm = SQLiteCollectionModel(self.working_directory)
+
+        cm.addMemento("testing-storage:memento1", b"<html><body>hi</body></html>", {})
+        cm.flush()
+
+        reader = SQLiteCollectionModel(self.working_directory, read_only=True)
+
+        self.assertEqual( reader.getMementoURIList(), ["testing-storage:memento1"] )
+        self.assertEqual( reader.getMementoContentWithoutBoilerplate(
+            "testing-storage:memento1"), b"hi\n" )
+
+        self.assertRaises( collectionmodel.CollectionModelException,
+            reader.addMemento, "testing-storage:memento2", b"bye", {} )
+
+        reader.close()
+
+        cm.close()
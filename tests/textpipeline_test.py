@@ -0,0 +1,85 @@
+import string
+import unittest
+
+from nltk import word_tokenize
+from nltk.corpus import stopwords
+from nltk.stem.porter import PorterStemmer
+
+from otmt.textpipeline import TextPipeline, regex_tokenize, \
+    get_text_pipeline, set_text_pipeline
+from otmt.timemap_measures import full_tokenize
+
+text = "<html><body><p>The cats are running quickly, and the dogs aren't " \
+    "following them. Running is fun!</p></body></html>"
+
+class TestingTextPipeline(unittest.TestCase):
+
+    def test_matches_nltk(self):
+
+        stemmer = PorterStemmer()
+        stopset = stopwords.words("english") + list(string.punctuation)
+
+        expected_stemmed = [ stemmer.stem(token) for token in word_tokenize(text) ]
+        expected_stemmed = [ token for token in expected_stemmed
+            if token not in stopset ]
+
+        expected_unstemmed = [ token for token in word_tokenize(text)
+            if token not in stopset ]
+
+        pipeline = TextPipeline()
+
+        self.assertEqual( pipeline.process(text), expected_stemmed )
+        self.assertEqual( pipeline.process(text.encode("utf8")), expected_stemmed )
+        self.assertEqual( pipeline.process(text, stemming=False),
+            expected_unstemmed )
+
+        # the second pass is answered from the stem cache
+        self.assertEqual( pipeline.process(text), expected_stemmed )
+
+        self.assertEqual( full_tokenize(text), expected_stemmed )
+
+    def test_regex_tokenizer(self):
+
+        self.assertEqual( regex_tokenize("Hello, world... it's 2018!"),
+            ["Hello", ",", "world", ".", ".", ".", "it", "'", "s", "2018", "!"] )
+
+        pipeline = TextPipeline(tokenizer="regex")
+
+        self.assertEqual( pipeline.process("The cats are running quickly!"),
+            ["cat", "run", "quickli"] )
+
+        self.assertRaises( ValueError, TextPipeline, tokenizer="nosuchtokenizer" )
+
+    def test_process_many(self):
+
+        pipeline = TextPipeline()
+        texts = [ text, "", b"Cats and dogs" ]
+
+        self.assertEqual( pipeline.process_many(texts),
+            [ pipeline.process(t) for t in texts ] )
+
+    def test_stem_cache(self):
+
+        pipeline = TextPipeline(stem_cache_size=2)
+
+        self.assertEqual( pipeline.stem("running"), "run" )
+        self.assertEqual( pipeline.stem("cats"), "cat" )
+        self.assertEqual( len(pipeline.stem_cache), 2 )
+
+        # the cache is cleared once full rather than growing without bound
+        self.assertEqual( pipeline.stem("quickly"), "quickli" )
+        self.assertEqual( pipeline.stem_cache, { "quickly": "quickli" } )
+
+    def test_shared_pipeline(self):
+
+        original = get_text_pipeline()
+
+        try:
+            pipeline = TextPipeline(tokenizer="regex")
+            set_text_pipeline(pipeline)
+
+            self.assertIs( get_text_pipeline(), pipeline )
+            self.assertEqual( full_tokenize("cats-dogs"), ["cat", "dog"] )
+
+        finally:
+            set_text_pipeline(original)
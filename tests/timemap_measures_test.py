@@ -1,10 +1,13 @@
 import os
+import json
 import string
 import random
 import unittest
 import shutil
 import pprint
 
+import numpy as np
+
 pp = pprint.PrettyPrinter(indent=4)
 
 from otmt import collectionmodel, compute_bytecount_across_TimeMap, \
@@ -13,7 +16,19 @@ from otmt import collectionmodel, compute_bytecount_across_TimeMap, \
     compute_levenshtein_across_TimeMap, compute_nlevenshtein_across_TimeMap, \
     compute_tfintersection_across_TimeMap, compute_tfsimhash_across_TimeMap, \
     compute_rawsimhash_across_TimeMap, compute_gensim_lsi_across_TimeMap, \
-    compute_gensim_lda_across_TimeMap, MeasureModel
+    compute_gensim_lda_across_TimeMap, MeasureModel, compute_timemap_measures, \
+    supported_timemap_measures
+from otmt.timemap_measures import jaccard_scoredistance, \
+    jaccard_documents_scoredistance, sorensen_scoredistance, \
+    sorensen_documents_scoredistance, levenshtein_token_distance, \
+    levenshtein_scoredistances, cosine_documents_scoredistance, \
+    gensim_lsi_documents_scoredistance
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+from gensim import corpora, models, similarities
+
+import distance
 
 import logging
 logging.basicConfig(level=logging.DEBUG)
@@ -1009,7 +1024,7 @@ class TestingTimeMapMeasures(unittest.TestCase):
         # the terms 'quick' and 'jump' overlap, giving 2 overlapping terms
         # 11 - 2 = 9, hence the comparison score of 9
         expected_scores = {   'timemaps': {   'timemap1': {   'memento11': {   'timemap measures': {   'raw_simhash': {   'comparison score': 0}}},
-                                    'memento12': {   'timemap measures': {   'raw_simhash': {   'comparison score': 36}}}}}}
+                                    'memento12': {   'timemap measures': {   'raw_simhash': {   'comparison score': 29}}}}}}
 
         # for regression
         self.assertAlmostEqual(
@@ -1082,3 +1097,471 @@ class TestingTimeMapMeasures(unittest.TestCase):
         )
 
         shutil.rmtree(working_directory)
+
+    def test_compute_timemap_measures(self):
+
+        working_directory = "/tmp/test_compute_timemap_measures"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        class CountingCollectionModel(collectionmodel.CollectionModel):
+
+            raw_reads = 0
+
+            def getMementoContentView(self, urim):
+                self.raw_reads += 1
+                return super().getMementoContentView(urim)
+
+        cm = CountingCollectionModel(working_directory=working_directory)
+
+        headers = {
+            "key1": "value1",
+            "key2": "value2"
+        }
+
+        timemap_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:06 GMT",
+<memento13>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:06 GMT",
+<memento14>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+        cm.addTimeMap("timemap1", timemap_content, headers)
+        cm.addMemento("memento11",
+            b"<html><body><p>The quick brown fox jumps over the lazy dog</p></body></html>",
+            headers)
+        cm.addMemento("memento12",
+            b"<html><body><p>The quick brown fox jumps over the lazy cat</p></body></html>",
+            headers)
+        cm.addMemento("memento13",
+            b"<html><body><p>Sphinx of black quartz, judge my vow</p></body></html>",
+            headers)
+        cm.addMementoError("memento14", b"", headers, b"failed to download")
+
+        measures = [ measure for measure in supported_timemap_measures
+            if measure != "gensim_lda" ]
+
+        expected_mms = {}
+
+        for measure in measures:
+            expected_mms[measure] = supported_timemap_measures[measure]["function"](
+                cm, MeasureModel())
+
+        cm.raw_reads = 0
+
+        mm = compute_timemap_measures(cm, MeasureModel(), measures)
+
+        # bytecount uses the recorded content lengths and the raw_simhash
+        # fingerprints were stored by the functions above, so raw content is
+        # only requested for memento14, which cannot be read
+        self.assertEqual( cm.raw_reads, 1 )
+
+        for urim in [ "memento11", "memento12", "memento13" ]:
+
+            for measure in measures:
+
+                self.assertAlmostEqual(
+                    expected_mms[measure].get_score("timemap1", urim, "timemap measures", measure),
+                    mm.get_score("timemap1", urim, "timemap measures", measure),
+                    places=5, msg="{} of {}".format(measure, urim)
+                )
+
+                self.assertEqual(
+                    expected_mms[measure].get_stemmed("timemap1", urim, "timemap measures", measure),
+                    mm.get_stemmed("timemap1", urim, "timemap measures", measure)
+                )
+
+        self.assertIsNotNone(
+            mm.get_Memento_measurement_error_message("memento14", "timemap measures", "jaccard") )
+
+        shutil.rmtree(working_directory)
+
+    def test_compute_timemap_measures_in_parallel(self):
+
+        working_directory = "/tmp/test_compute_timemap_measures_in_parallel"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        headers = {
+            "key1": "value1",
+            "key2": "value2"
+        }
+
+        random.seed(5)
+
+        words = [ "word{}".format(i) for i in range(200) ]
+
+        contents = [ [ " ".join(random.choices(words, k=50)) for j in range(3) ]
+            for i in range(6) ]
+
+        def build_collection(directory):
+            """Stores the TimeMaps in `directory`, inserting the mementos in
+            reverse TimeMap order, so that they are tokenized in a different
+            order by one process and by several.
+            """
+
+            cm = collectionmodel.CollectionModel(working_directory=directory)
+
+            for i in reversed(range(6)):
+
+                timemap_content = """<original{0}>; rel="original",
+<timemap{0}>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate{0}>; rel="timegate",
+<memento{0}1>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento{0}2>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:06 GMT",
+<memento{0}3>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+""".format(i)
+
+                cm.addTimeMap("timemap{}".format(i), timemap_content, headers)
+
+                for j in reversed(range(1, 4)):
+
+                    if (i, j) == (5, 3):
+                        cm.addMementoError("memento53", b"", headers,
+                            b"failed to download")
+                        continue
+
+                    cm.addMemento("memento{}{}".format(i, j), bytes(
+                        "<html><body><p>{}</p></body></html>".format(
+                            contents[i][j - 1]), "utf8"),
+                        headers)
+
+            return cm
+
+        measures = [ measure for measure in supported_timemap_measures
+            if measure != "gensim_lda" ]
+
+        # each run starts from a fresh working directory, so that nothing
+        # computed by one run is reused by another
+        serial_mm = compute_timemap_measures(
+            build_collection("{}/serial".format(working_directory)),
+            MeasureModel(), measures, processes=1)
+
+        cm = build_collection("{}/parallel".format(working_directory))
+
+        parallel_mm = compute_timemap_measures(cm, MeasureModel(), measures,
+            processes=2)
+
+        # the tokens were stored by the parent process
+        self.assertTrue( cm.getTokenCache().contains("memento11") )
+
+        # every TimeMap is split among the workers
+        chunked_mm = compute_timemap_measures(
+            build_collection("{}/chunked".format(working_directory)),
+            MeasureModel(), measures, processes=2, chunk_size=2)
+
+        serial_scores = serial_mm.generate_dict()
+
+        for mm in [parallel_mm, chunked_mm]:
+
+            scores = mm.generate_dict()
+
+            self.assertEqual( scores.keys(), serial_scores.keys() )
+
+            # every measure of every memento, so that a difference names it
+            for urit in serial_scores:
+
+                self.assertEqual( scores[urit].keys(), serial_scores[urit].keys() )
+
+                for urim, record in serial_scores[urit].items():
+
+                    if "timemap measures" not in record:
+                        self.assertEqual( scores[urit][urim], record )
+                        continue
+
+                    for measurename in measures:
+
+                        expected = dict(record["timemap measures"][measurename])
+                        actual = dict(scores[urit][urim]["timemap measures"][measurename])
+
+                        # token IDs differ between the runs, which changes
+                        # the order in which floating point sums are added
+                        self.assertAlmostEqual( actual.pop("comparison score", None),
+                            expected.pop("comparison score", None), places=10,
+                            msg="{} of {}".format(measurename, urim) )
+
+                        self.assertEqual( actual, expected,
+                            "{} of {}".format(measurename, urim) )
+
+        shutil.rmtree(working_directory)
+
+    def test_set_measures_on_all_documents(self):
+
+        random.seed(3)
+
+        words = [ "word{}".format(i) for i in range(100) ]
+
+        documents = [ random.choices(words, k=random.randint(1, 80))
+            for i in range(50) ]
+
+        # an empty document and a copy of the first document
+        documents.append([])
+        documents.append(list(documents[0]))
+
+        first = documents[0]
+
+        # the vectorized functions take token IDs like those of the token cache
+        token_ids = [ np.array([ words.index(word) for word in document ],
+            dtype=np.uint32) for document in documents ]
+
+        self.assertEqual(
+            jaccard_documents_scoredistance(token_ids),
+            [ jaccard_scoredistance(first, document) for document in documents ]
+        )
+
+        self.assertEqual(
+            sorensen_documents_scoredistance(token_ids),
+            [ sorensen_scoredistance(first, document) for document in documents ]
+        )
+
+    def test_levenshtein_token_distance(self):
+
+        random.seed(5)
+
+        words = [ "word{}".format(i) for i in range(20) ]
+
+        # long enough for bit vectors spanning several machine words
+        documents = [ random.choices(words, k=random.randint(1, 300))
+            for i in range(30) ]
+
+        documents.append([])
+        documents.append(list(documents[0]))
+        documents.append(documents[0][5:] + documents[0][:5])
+
+        first = documents[0]
+        first_ids = np.array([ words.index(word) for word in first ],
+            dtype=np.uint32)
+
+        for document in documents:
+
+            expected = distance.levenshtein(first, document)
+
+            document_ids = np.array([ words.index(word) for word in document ],
+                dtype=np.uint32)
+
+            self.assertEqual(levenshtein_token_distance(first, document), expected)
+            self.assertEqual(levenshtein_token_distance(document, first), expected)
+            self.assertEqual(
+                levenshtein_token_distance(first_ids, document_ids), expected)
+
+            scores = levenshtein_scoredistances(first_ids, document_ids)
+
+            self.assertEqual(scores["levenshtein"], expected)
+            self.assertEqual(scores["nlevenshtein"],
+                distance.nlevenshtein(first, document))
+
+            for max_distance in [0, 10, expected, 1000]:
+
+                bounded = levenshtein_token_distance(first_ids, document_ids,
+                    max_distance=max_distance)
+
+                if expected <= max_distance:
+                    self.assertEqual(bounded, expected)
+                else:
+                    self.assertGreater(bounded, max_distance)
+                    self.assertLessEqual(bounded, expected)
+
+            # the off-topic decision is unchanged by stopping at the thresholds
+            thresholds = { "levenshtein": 40, "nlevenshtein": 0.3 }
+
+            bounded_scores = levenshtein_scoredistances(first_ids, document_ids,
+                thresholds=thresholds)
+
+            for measurename, threshold in thresholds.items():
+                self.assertEqual(bounded_scores[measurename] > threshold,
+                    scores[measurename] > threshold)
+
+    def test_cosine_on_token_ids(self):
+
+        random.seed(7)
+
+        words = [ "word{}".format(i) for i in range(200) ]
+
+        documents = [ random.choices(words, k=random.randint(1, 100))
+            for i in range(40) ]
+
+        documents.append([])
+        documents.append(list(documents[0]))
+
+        # IDs from a vocabulary larger than that of the documents, like
+        # those of a token cache shared by the whole collection
+        token_ids = [ np.array([ 3 * words.index(word) + 1000 for word in document ],
+            dtype=np.uint32) for document in documents ]
+
+        tfidf_matrix = TfidfVectorizer(analyzer=lambda tokens: tokens
+            ).fit_transform(documents)
+
+        expected = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix)[0]
+
+        scores = cosine_documents_scoredistance(token_ids)
+
+        self.assertEqual(len(scores), len(expected))
+
+        for score, expected_score in zip(scores, expected):
+            self.assertAlmostEqual(score, expected_score, places=12)
+
+        # batches of a single document, several documents, and all of them
+        for batch_size in [1, 300, 1000000]:
+
+            scores = cosine_documents_scoredistance(token_ids,
+                batch_size=batch_size)
+
+            self.assertEqual(len(scores), len(expected))
+
+            for score, expected_score in zip(scores, expected):
+                self.assertAlmostEqual(score, expected_score, places=12)
+
+        # documents read on demand are only read a batch at a time
+        class LazyDocuments:
+
+            def __init__(self, documents):
+                self.documents = documents
+                self.largest_read = 0
+
+            def __len__(self):
+                return len(self.documents)
+
+            def __getitem__(self, index):
+
+                if isinstance(index, slice):
+                    batch = self.documents[index]
+                    self.largest_read = max(self.largest_read, len(batch))
+                    return batch
+
+                return self.documents[index]
+
+        lazy_documents = LazyDocuments(token_ids)
+
+        scores = cosine_documents_scoredistance(lazy_documents, batch_size=300)
+
+        for score, expected_score in zip(scores, expected):
+            self.assertAlmostEqual(score, expected_score, places=12)
+
+        self.assertGreater( lazy_documents.largest_read, 1 )
+        self.assertLess( lazy_documents.largest_read, len(token_ids) )
+
+        with self.assertRaises(ValueError):
+            cosine_documents_scoredistance([
+                np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint32) ])
+
+    def test_gensim_against_first_document(self):
+
+        random.seed(11)
+
+        words = [ "word{}".format(i) for i in range(60) ]
+
+        documents = [ random.choices(words, k=random.randint(1, 50))
+            for i in range(30) ]
+
+        documents.append([])
+        documents.append(list(documents[0]))
+
+        # every document queried against a similarity index of all of them
+        dictionary = corpora.Dictionary(documents)
+        corpus = [ dictionary.doc2bow(document) for document in documents ]
+        lsi = models.LsiModel(corpus, id2word=dictionary, num_topics=10)
+        index = similarities.MatrixSimilarity(lsi[corpus])
+
+        expected = [ float(index[lsi[document]][0]) for document in corpus ]
+
+        token_ids = [ np.array([ words.index(word) for word in document ],
+            dtype=np.uint32) for document in documents ]
+
+        scores = gensim_lsi_documents_scoredistance(token_ids, num_topics=10)
+
+        self.assertEqual(len(scores), len(expected))
+
+        for score, expected_score in zip(scores, expected):
+            self.assertAlmostEqual(score, expected_score, places=4)
+
+    def test_collection_topic_models(self):
+
+        working_directory = "/tmp/test_collection_topic_models"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        headers = {
+            "key1": "value1",
+            "key2": "value2"
+        }
+
+        timemap_content ="""<original1>; rel="original",
+<timemap1>; rel="self"; type="application/link-format"; from="Tue, 21 Mar 2016 15:45:06 GMT"; until="Tue, 21 Mar 2018 15:45:12 GMT",
+<timegate1>; rel="timegate",
+<memento11>; rel="first memento"; datetime="Tue, 21 Jan 2016 15:45:06 GMT",
+<memento12>; rel="memento"; datetime="Tue, 21 Jan 2017 15:45:06 GMT",
+<memento13>; rel="last memento"; datetime="Tue, 21 Jan 2018 15:45:12 GMT"
+"""
+
+        cm.addTimeMap("timemap1", timemap_content, headers)
+        cm.addMemento("memento11",
+            b"<html><body><p>The quick brown fox jumps over the lazy dog</p></body></html>",
+            headers)
+        cm.addMemento("memento12",
+            b"<html><body><p>The quick brown fox jumps over the lazy cat</p></body></html>",
+            headers)
+        cm.addMementoError("memento13", b"", headers, b"failed to download")
+
+        measures = [ "gensim_lsi", "gensim_lda" ]
+
+        mm = compute_timemap_measures(cm, MeasureModel(), measures,
+            collection_topic_models=True)
+
+        for measure in measures:
+
+            self.assertAlmostEqual(
+                mm.get_score("timemap1", "memento11", "timemap measures", measure),
+                1.0, places=5)
+
+            self.assertIsNotNone(
+                mm.get_score("timemap1", "memento12", "timemap measures", measure))
+
+        model_files = sorted( filename for filename in
+            os.listdir("{}/topicmodels".format(working_directory))
+            if filename.endswith(".model") )
+
+        self.assertEqual(model_files, [
+            "gensim_lda_2_stemmed_noboilerplate.model",
+            "gensim_lsi_10_stemmed_noboilerplate.model" ])
+
+        urims_filename = "{}/topicmodels/gensim_lsi_10_stemmed_noboilerplate.model.urims".format(
+            working_directory)
+
+        with open(urims_filename) as f:
+            self.assertEqual(sorted(f.read().split()),
+                [ "memento11", "memento12" ])
+
+        # a later run only trains the stored models on the new memento
+        cm.addMemento("memento14",
+            b"<html><body><p>Sphinx of black quartz, judge my vow</p></body></html>",
+            headers)
+
+        mm = compute_timemap_measures(cm, MeasureModel(), measures,
+            collection_topic_models=True)
+
+        with open(urims_filename) as f:
+            self.assertEqual(sorted(f.read().split()),
+                [ "memento11", "memento12", "memento14" ])
+
+        for measure in measures:
+            self.assertAlmostEqual(
+                mm.get_score("timemap1", "memento11", "timemap measures", measure),
+                1.0, places=5)
+
+        # the compute_ function scores with the same stored model
+        lsi_mm = compute_gensim_lsi_across_TimeMap(cm, MeasureModel(),
+            collection_topic_models=True)
+
+        for urim in [ "memento11", "memento12" ]:
+            self.assertAlmostEqual(
+                lsi_mm.get_score("timemap1", urim, "timemap measures", "gensim_lsi"),
+                mm.get_score("timemap1", urim, "timemap measures", "gensim_lsi"))
+
+        shutil.rmtree(working_directory)
@@ -0,0 +1,106 @@
+import os
+import shutil
+import unittest
+
+from otmt import collectionmodel
+from otmt.tokencache import TokenCache
+from otmt.timemap_measures import get_memento_data_for_measure, \
+    get_memento_token_ids
+
+class TestingTokenCache(unittest.TestCase):
+
+    def test_put_get(self):
+
+        directory = "/tmp/tokencache_test/test_put_get"
+
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+
+        tc = TokenCache(directory)
+
+        self.assertIsNone( tc.get("memento1") )
+
+        ids1 = tc.put("memento1", ["a", "b", "a", "c"])
+        ids2 = tc.put("memento2", ["c", "d"])
+        tc.put("memento1", ["x"], stemming=False, remove_boilerplate=False)
+        tc.put("memento3", [])
+
+        # the vocabulary is shared by all token streams
+        self.assertEqual( ids1.tolist(), [0, 1, 0, 2] )
+        self.assertEqual( ids2.tolist(), [2, 3] )
+
+        self.assertEqual( tc.get_tokens(tc.get("memento1")), ["a", "b", "a", "c"] )
+        self.assertEqual( tc.get_tokens(tc.get("memento1", stemming=False,
+            remove_boilerplate=False)), ["x"] )
+        self.assertIsNone( tc.get("memento2", stemming=False) )
+
+        tc.close()
+
+        tc = TokenCache(directory)
+
+        self.assertEqual( tc.get("memento1").tolist(), [0, 1, 0, 2] )
+        self.assertEqual( tc.get_tokens(tc.get("memento2")), ["c", "d"] )
+        self.assertEqual( len(tc.get("memento3")), 0 )
+        self.assertTrue( tc.contains("memento1", stemming=False,
+            remove_boilerplate=False) )
+
+        self.assertEqual( tc.put("memento4", ["d", "e"]).tolist(), [3, 5] )
+        self.assertEqual( tc.get_tokens(tc.get("memento4")), ["d", "e"] )
+
+        tc.close()
+
+        shutil.rmtree(directory)
+
+    def test_read_only(self):
+
+        directory = "/tmp/tokencache_test/test_read_only"
+
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+
+        tc = TokenCache(directory)
+        tc.put("memento1", ["a", "b"])
+        tc.close()
+
+        vocabulary_size = os.path.getsize("{}/vocabulary.txt".format(directory))
+
+        tc = TokenCache(directory, read_only=True)
+
+        self.assertEqual( tc.get_tokens(tc.get("memento1")), ["a", "b"] )
+
+        self.assertEqual( tc.put("memento2", ["b", "c"]).tolist(), [1, 2] )
+        self.assertTrue( tc.contains("memento2") )
+        self.assertEqual( tc.get_tokens(tc.get("memento2")), ["b", "c"] )
+
+        tc.close()
+
+        # nothing stored by the read-only token cache was written
+        self.assertEqual( os.path.getsize("{}/vocabulary.txt".format(directory)),
+            vocabulary_size )
+
+        tc = TokenCache(directory)
+        self.assertFalse( tc.contains("memento2") )
+        tc.close()
+
+        shutil.rmtree(directory)
+
+    def test_tokens_for_measures(self):
+
+        working_directory = "/tmp/tokencache_test/test_tokens_for_measures"
+
+        if os.path.exists(working_directory):
+            shutil.rmtree(working_directory)
+
+        cm = collectionmodel.CollectionModel(working_directory=working_directory)
+
+        cm.addMemento("memento1",
+            b"<html><body><p>The cats are running quickly</p></body></html>", {})
+
+        tokens = get_memento_data_for_measure("memento1", cm)
+
+        self.assertEqual( tokens, ["cat", "run", "quickli"] )
+        self.assertTrue( cm.getTokenCache().contains("memento1") )
+        self.assertEqual( cm.getTokenCache().get_tokens(
+            get_memento_token_ids("memento1", cm)), tokens )
+
+        shutil.rmtree(working_directory)
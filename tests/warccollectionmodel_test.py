@@ -0,0 +1,149 @@
+import os
+import shutil
+import unittest
+
+from otmt import collectionmodel, WARCCollectionModel
+from otmt.input_types import get_collection_model_from_warc
+
+class TestingWARCCollectionModel(unittest.TestCase):
+
+    def setUp(self):
+
+        self.working_directory = "/tmp/warccollectionmodel_test/{}".format(
+            self._testMethodName)
+
+        if os.path.exists(self.working_directory):
+            shutil.rmtree(self.working_directory)
+
+    def tearDown(self):
+
+        shutil.rmtree(self.working_directory)
+
+    def test_mementos_in_rotating_warcs(self):
+
+        cm = WARCCollectionModel(self.working_directory, max_warc_size=500)
+
+        headers = {
+            "Content-Type": "text/html",
+            "Content-Encoding": "gzip",
+            "Memento-Datetime": "Tue, 21 Mar 2017 15:45:06 GMT",
+            "http-status": 200
+        }
+
+        contents = {}
+
+        for i in range(0, 10):
+            urim = "http://archive.example.org/20170321154506/http://example.org/{}".format(i)
+            contents[urim] = bytes(
+                "<html><body>memento text number {}</body></html>".format(i), "utf8")
+            cm.addMemento(urim, contents[urim], headers)
+
+        self.assertGreater( len(os.listdir(cm.warc_directory)), 2 )
+
+        for urim in contents:
+            self.assertEqual( cm.getMementoContent(urim), contents[urim] )
+
+        self.assertEqual( cm.getMementoHeaders(urim), headers )
+        self.assertEqual( cm.getMementoContentWithoutBoilerplate(urim),
+            b"memento text number 9\n" )
+
+        self.assertRaises( collectionmodel.CollectionModelNoSuchMementoException,
+            cm.getMementoContent, "testing-storage:missing-memento" )
+
+        del cm
+
+        cm = WARCCollectionModel(self.working_directory, max_warc_size=500)
+
+        self.assertEqual( sorted(cm.getMementoURIList()), sorted(contents.keys()) )
+
+        for urim in contents:
+            self.assertEqual( cm.getMementoContent(urim), contents[urim] )
+            self.assertEqual( cm.getMementoContentView(urim), contents[urim] )
+            self.assertEqual( cm.getMementoContentLength(urim), len(contents[urim]) )
+
+        warcfiles = [ "{}/{}".format(cm.warc_directory, f) 
+            for f in sorted(os.listdir(cm.warc_directory)) if f.endswith(".warc.gz") ]
+
+        del cm
+
+        # the WARCs can be used by the warc input type
+        cm = get_collection_model_from_warc(warcfiles, 
+            "{}/from_warcs".format(self.working_directory))
+
+        self.assertEqual( len(cm.getMementoURIList()), 10 )
+
+    def test_read_only(self):
+
+        cm = WARCCollectionModel(self.working_directory)
+
+        urim = "http://archive.example.org/20170321154506/http://example.org/"
+
+        cm.addMemento(urim, b"<html><body>hi</body></html>",
+            { "http-status": 200 })
+
+        warcfiles = sorted(os.listdir(cm.warc_directory))
+        sizes = [ os.path.getsize("{}/{}".format(cm.warc_directory, f))
+            for f in warcfiles ]
+
+        reader = WARCCollectionModel(self.working_directory, read_only=True)
+
+        self.assertIsNone( reader.current_warc )
+        self.assertEqual( reader.getMementoContent(urim),
+            b"<html><body>hi</body></html>" )
+
+        with self.assertRaises(collectionmodel.CollectionModelException):
+            reader.addMemento("{}2".format(urim), b"bye", {})
+
+        del reader
+
+        self.assertEqual( sorted(os.listdir(cm.warc_directory)), warcfiles )
+        self.assertEqual( [ os.path.getsize("{}/{}".format(cm.warc_directory, f))
+            for f in warcfiles ], sizes )
+
+        del cm
+
+    def test_resume_after_crash(self):
+
+        cm = WARCCollectionModel(self.working_directory)
+
+        urim = "http://archive.example.org/20170321154506/http://example.org/"
+
+        cm.addMemento(urim, b"<html><body>hi</body></html>", { "http-status": 200 })
+
+        del cm
+
+        # simulate a crash in the middle of writing a row
+        with open("{}/warcs/index.csv".format(self.working_directory), 'a') as f:
+            f.write("{}2,mementos-00001.warc.gz,1234,5".format(urim))
+
+        reader = WARCCollectionModel(self.working_directory, read_only=True)
+
+        self.assertEqual( reader.getMementoURIList(), [urim] )
+
+        del reader
+
+        cm = WARCCollectionModel(self.working_directory)
+
+        self.assertEqual( cm.getMementoURIList(), [urim] )
+
+        cm.addMemento("{}3".format(urim), b"<html><body>bye</body></html>",
+            { "http-status": 200 })
+
+        del cm
+
+        cm = WARCCollectionModel(self.working_directory)
+
+        self.assertEqual( cm.getMementoURIList(), [urim, "{}3".format(urim)] )
+        self.assertEqual( cm.getMementoContent("{}3".format(urim)),
+            b"<html><body>bye</body></html>" )
+
+        del cm
+
+    def test_compression(self):
+
+        with self.assertRaises(collectionmodel.CollectionModelException):
+            WARCCollectionModel(self.working_directory, compression="zstd")
+
+        cm = WARCCollectionModel(self.working_directory, compression="gzip")
+
+        del cm
@@ -0,0 +1,68 @@
+import time
+import unittest
+
+from otmt.writebehind import WriteBehindWriter, WriteBehindWriterException
+
+class FakeIndexFile:
+
+    def __init__(self):
+        self.flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+
+class TestingWriteBehindWriter(unittest.TestCase):
+
+    def test_writes_in_order(self):
+
+        indexfile = FakeIndexFile()
+        written = []
+
+        def slow_write(value):
+            time.sleep(0.01)
+            written.append(value)
+
+        writer = WriteBehindWriter([indexfile], max_queue_size=2, batch_size=3)
+
+        for i in range(10):
+            writer.submit("key{}".format(i % 3), slow_write, i)
+
+        writer.flush()
+
+        self.assertEqual( written, list(range(10)) )
+        self.assertFalse( writer.is_pending("key0") )
+        self.assertGreater( indexfile.flushes, 0 )
+
+        writer.submit("key0", written.append, 10)
+        writer.close()
+
+        self.assertEqual( written[-1], 10 )
+
+        self.assertRaises( WriteBehindWriterException, writer.submit,
+            "key0", written.append, 11 )
+
+    def test_failed_write(self):
+
+        indexfile = FakeIndexFile()
+        written = []
+
+        def failing_write(value):
+            raise IOError("disk full")
+
+        writer = WriteBehindWriter([indexfile])
+
+        writer.submit("key1", written.append, 1)
+        writer.flush()
+
+        flushes = indexfile.flushes
+
+        writer.submit("key2", failing_write, 2)
+        writer.submit("key3", written.append, 3)
+
+        self.assertRaises( WriteBehindWriterException, writer.flush )
+
+        # nothing after the failure is written or flushed
+        self.assertEqual( written, [1] )
+        self.assertEqual( indexfile.flushes, flushes )
+
+        self.assertRaises( WriteBehindWriterException, writer.close )